@@ -0,0 +1,138 @@
+"""
+Strips Libor and OIS curves for many base dates in a pool of processes.
+
+Usage:
+    python batch.py QUOTE_FILE OUTPUT_DIRECTORY [--workers N] [--chunk-size N] [--method METHOD] [--single-curve]
+
+The quote file is in one of the formats read by marketdata.read_quote_records. The stripped
+curves are streamed to a curvestore.CurveStore in the output directory, with the OIS curves of
+two-curve strips: each chunk's worth of curves is appended as a segment as soon as it is
+stripped, so a run that stops part-way keeps what it finished, and the segments are merged at
+the end. Dates that could not be stripped, or whose quotes appear more than once in the file,
+are reported without stopping the run.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import sys
+from curvestore import append_curves, compact_store, save_curves
+from curvestrippers import strip_libor_curve, strip_libor_and_ois_curves
+from marketdata import InputBuilder, read_quote_records, snapshot_records
+from pools import chunks, map_ahead
+
+
+def _strip_snapshot(base_date, inputs, ois_curve, method, initial_curves):
+    if ois_curve:
+        return strip_libor_and_ois_curves(base_date, inputs, method=method, initial_curves=initial_curves)
+    initial_curve = None if initial_curves is None else initial_curves[0]
+    libor_curve = strip_libor_curve(base_date, inputs, method=method, initial_curve=initial_curve)
+    return libor_curve, libor_curve
+
+
+def _strip_chunk(snapshots, ois_curve, method):
+    """
+    Strips a run of consecutive base dates in one worker, starting each strip from the
+    curves of the last successful one. Returns (base date, curves, error message) triples.
+    """
+    results = []
+    initial_curves = None
+    builder = InputBuilder()
+    for (base_date, records) in snapshots:
+        try:
+            curves = _strip_snapshot(base_date, builder.build_all(base_date, records), ois_curve, method,
+                                     initial_curves)
+        except Exception as error:  # Report any failure and carry on with the other dates.
+            results.append((base_date, None, str(error)))
+            continue
+        results.append((base_date, curves, None))
+        initial_curves = curves
+    return results
+
+
+def strip_history(snapshots, on_curves, ois_curve=True, method="global", max_workers=None, chunk_size=20):
+    """
+    Strips the curves for many base dates in a pool of processes.
+
+    The snapshots are split into chunks of consecutive base dates. Each chunk is stripped in
+    one worker, with each strip starting from the previous date's curves. Only a few chunks
+    are read ahead of the workers, so the snapshots can come from a large file.
+
+    Args:
+        snapshots: an iterable of (base date, list of quote records) pairs, as yielded by
+            marketdata.snapshot_records.
+        on_curves: a function called with the base date and the tuple of Libor and OIS curves
+            as each date is stripped, in the order that chunks finish. For a single-curve strip
+            both curves are the Libor curve.
+        ois_curve: whether to strip separate Libor and OIS curves, or a single Libor curve.
+        method: the stripping method, as for strip_libor_curve.
+        max_workers: the number of processes, which defaults to the number of CPUs.
+        chunk_size: the number of consecutive base dates stripped in each task.
+
+    Returns:
+        A list of (base date, error message) pairs for the dates that could not be stripped.
+    """
+    failures = []
+
+    def collect(arguments, results):
+        for (base_date, curves, error) in results:
+            if curves is None:
+                failures.append((base_date, error))
+            else:
+                on_curves(base_date, curves)
+
+    max_pending = 2 * (max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        map_ahead(executor, _strip_chunk, ((chunk, ois_curve, method) for chunk in chunks(snapshots, chunk_size)),
+                  collect, max_pending, in_order=False)
+    return sorted(failures)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Strip Libor and OIS curves for every base date in a quote history.")
+    parser.add_argument("quote_file", help="a .csv or .jsonl file of quote records, grouped by base date")
+    parser.add_argument("output_directory", help="the directory of the curve store that the curves are saved to")
+    parser.add_argument("--workers", type=int, default=None, help="the number of processes")
+    parser.add_argument("--chunk-size", type=int, default=20, help="the number of consecutive dates per task")
+    parser.add_argument("--method", choices=["global", "bootstrap", "block_newton", "alternating"], default="global")
+    parser.add_argument("--single-curve", action="store_true", help="strip a single Libor curve")
+    args = parser.parse_args(argv)
+
+    ois_curve = not args.single_curve
+    # Start from an empty store, replacing any store already in the directory.
+    save_curves(args.output_directory, [], [] if ois_curve else None)
+    unwritten = {}  # Base date -> curves, for up to one chunk's worth of dates.
+    stripped_dates = set()
+    repeated_dates = set()
+
+    def write_curves():
+        append_curves(args.output_directory, [curves[0] for curves in unwritten.values()],
+                      [curves[1] for curves in unwritten.values()] if ois_curve else None)
+        unwritten.clear()
+
+    def add_curves(base_date, curves):
+        if base_date in stripped_dates:
+            repeated_dates.add(base_date)
+        stripped_dates.add(base_date)
+        unwritten[base_date] = curves
+        if len(unwritten) >= args.chunk_size:
+            write_curves()
+
+    try:
+        failures = strip_history(snapshot_records(read_quote_records(args.quote_file)), add_curves,
+                                 ois_curve=ois_curve, method=args.method, max_workers=args.workers,
+                                 chunk_size=args.chunk_size)
+    finally:
+        if unwritten:
+            write_curves()
+    compact_store(args.output_directory)
+    for (base_date, error) in failures:
+        print("Could not strip curves for " + base_date.isoformat() + ": " + error, file=sys.stderr)
+    for base_date in sorted(repeated_dates):
+        print("Quotes for " + base_date.isoformat() + " appear more than once; the curves stripped last are stored.",
+              file=sys.stderr)
+    return 1 if failures or repeated_dates else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Times the hot paths of curve stripping and valuation, offline and on synthetic market data.
+
+Usage:
+    python benchmarks.py [--output FILE] [--baseline FILE] [--tolerance FRACTION] [--filter TEXT] [--quick]
+
+The results are written as JSON, with the median wall-clock seconds of each benchmark. Given
+a baseline file written by an earlier run, the benchmarks that have become slower by more
+than the tolerance are reported, and the exit status is 1.
+"""
+
+import argparse
+from datetime import date, timedelta
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from cashflows import compile_cashflows
+from curvestore import save_curves
+from curvestrippers import strip_libor_curve, strip_libor_and_ois_curves
+from dates import add_business_days, clear_schedule_cache, date_schedule
+from instruments import LiborDeposit, EurodollarFuture, EurodollarFutureStrip, InterestRateSwap, OisBasisSwap
+from interestratecurve import InterestRateCurve
+
+BASE_DATE = date(2018, 7, 27)
+NOTIONAL = 1e6
+
+
+def _libor_inputs(count):
+    """A deposit, up to eight futures, and semi-annual swaps from three years, with an upward-sloping curve."""
+    spot_start_date = add_business_days(BASE_DATE, 2)
+    inputs = [LiborDeposit(NOTIONAL, spot_start_date, 3, 0.0170)]
+    futures = [(2018, 9), (2018, 12), (2019, 3), (2019, 6), (2019, 9), (2019, 12), (2020, 3), (2020, 6)]
+    for (i, (year, month)) in enumerate(futures[:count - 1]):
+        inputs.append((EurodollarFuture(year, month), 98.10 - 0.1 * i))
+    for i in range(count - len(inputs)):
+        inputs.append(InterestRateSwap(NOTIONAL, spot_start_date, 36 + 6 * i, 0.0250 + 0.0001 * i))
+    return inputs
+
+
+def _ois_inputs(count):
+    spot_start_date = add_business_days(BASE_DATE, 2)
+    return [OisBasisSwap(NOTIONAL, spot_start_date, 6 * (i + 1), 0.0010 + 0.00005 * i) for i in range(count)]
+
+
+def _curve():
+    dates = [BASE_DATE + timedelta(days=days) for days in (91, 182, 365, 730, 1095, 1826, 3652, 7305, 10957)]
+    dfs = [0.996, 0.991, 0.982, 0.96, 0.935, 0.88, 0.75, 0.55, 0.40]
+    return InterestRateCurve(BASE_DATE, dates, dfs)
+
+
+def _swaps(count):
+    """A portfolio of swaps with a spread of start dates, tenors and rates."""
+    spot_start_date = add_business_days(BASE_DATE, 2)
+    return [InterestRateSwap(NOTIONAL * (1 - 2 * (i % 2)), add_business_days(spot_start_date, i % 20),
+                             12 * (1 + i % 10), 0.02 + 0.0001 * (i % 50)) for i in range(count)]
+
+
+"""
+A fresh interpreter loads pre-stripped curves from the curve store in its first argument,
+and values a swap, as a short-lived pricing job would.
+"""
+_COLD_START_SCRIPT = """
+import sys
+from datetime import date
+from curvestore import CurveStore
+from instruments import InterestRateSwap
+(libor_curve, ois_curve) = CurveStore(sys.argv[1]).curves(date(2018, 7, 27))
+InterestRateSwap(1e6, date(2018, 7, 31), 60, 0.025).value(libor_curve, ois_curve)
+"""
+
+
+def _benchmarks(quick):
+    """Yields (name, setup) pairs, where setup returns the function to time."""
+    curve = _curve()
+    dates = [BASE_DATE + timedelta(days=days) for days in range(1, 10001)]
+    ordinals = np.array([d.toordinal() for d in dates])
+
+    def scalar_df():
+        return lambda: [curve.df(d) for d in dates]
+
+    def batch_df():
+        return lambda: curve.df_array(ordinals)
+
+    def cold_start():
+        # The directory is removed when the function being timed is no longer referenced.
+        store_directory = tempfile.TemporaryDirectory()
+        save_curves(store_directory.name, [curve])
+
+        def run():
+            subprocess.run([sys.executable, "-c", _COLD_START_SCRIPT, store_directory.name], check=True,
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+        return run
+
+    yield "cold_start_value_swap", cold_start
+    yield "curve_df_scalar_10k", scalar_df
+    yield "curve_df_array_10k", batch_df
+
+    def schedule(cached):
+        start_dates = [add_business_days(BASE_DATE, i) for i in range(100)]
+
+        def run():
+            if not cached:
+                clear_schedule_cache()
+            for start_date in start_dates:
+                date_schedule(start_date, 3, 120)
+        return lambda: run
+
+    yield "date_schedule_100_uncached", schedule(False)
+    yield "date_schedule_100_cached", schedule(True)
+
+    futures = [EurodollarFuture(2019 + i // 12, i % 12 + 1) for i in range(360)]
+
+    def future_prices():
+        return lambda: [future.price(curve) for future in futures]
+
+    def future_strip_prices():
+        strip = EurodollarFutureStrip(futures)
+        return lambda: strip.prices(curve, convexity_volatility=0.01)
+
+    def future_strip_construct():
+        (years, months) = (2019 + np.arange(360) // 12, np.arange(360) % 12 + 1)
+        return lambda: EurodollarFutureStrip.from_expiries(years, months)
+
+    yield "future_construct_360", lambda: lambda: [EurodollarFuture(2019 + i // 12, i % 12 + 1)
+                                                              for i in range(360)]
+    yield "future_strip_construct_360", future_strip_construct
+    yield "future_price_360", future_prices
+    yield "future_strip_price_360", future_strip_prices
+
+    for count in (1, 1000) if quick else (1, 1000, 100000):
+        def swap_values(count=count):
+            swaps = _swaps(count)
+            return lambda: [swap.value(curve, curve) for swap in swaps]
+
+        def compiled_values(count=count):
+            compiled = compile_cashflows(_swaps(count))
+            return lambda: compiled.values(curve, curve)
+
+        yield "swap_value_" + str(count), swap_values
+        yield "swap_value_compiled_" + str(count), compiled_values
+
+    for count in (10, 30) if quick else (10, 30, 60):
+        def libor_strip(count=count):
+            inputs = _libor_inputs(count)
+            return lambda: strip_libor_curve(BASE_DATE, inputs)
+
+        def two_curve_strip(count=count, method="global"):
+            inputs = _libor_inputs(count // 2) + _ois_inputs(count - count // 2)
+            return lambda: strip_libor_and_ois_curves(BASE_DATE, inputs, method=method)
+
+        yield "strip_libor_" + str(count), libor_strip
+        yield "strip_libor_and_ois_" + str(count), two_curve_strip
+        for method in ("block_newton", "alternating"):
+            yield ("strip_libor_and_ois_" + str(count) + "_" + method,
+                   lambda count=count, method=method: two_curve_strip(count, method))
+
+
+def _time(function, min_seconds, max_repeats):
+    """The median time of repeated calls, after one warm-up call."""
+    function()
+    times = []
+    start_time = time.perf_counter()
+    while len(times) < max_repeats and (not times or time.perf_counter() - start_time < min_seconds):
+        call_start_time = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - call_start_time)
+    return statistics.median(times), len(times)
+
+
+def run_benchmarks(name_filter="", quick=False, min_seconds=0.5, max_repeats=50):
+    """
+    Runs the benchmarks.
+
+    Args:
+        name_filter: only the benchmarks whose names contain this text are run.
+        quick: whether to leave out the largest cases.
+        min_seconds: each benchmark is repeated until it has taken at least this long in total...
+        max_repeats: ...or has run this many times.
+
+    Returns:
+        A dict of the results, which can be written as JSON.
+    """
+    results = {}
+    for (name, setup) in _benchmarks(quick):
+        if name_filter in name:
+            (seconds, repeats) = _time(setup(), min_seconds, max_repeats)
+            results[name] = {"seconds": seconds, "repeats": repeats}
+    return {"environment": {"python": platform.python_version(), "numpy": np.__version__,
+                            "machine": platform.machine(), "system": platform.system()},
+            "results": results}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Compares benchmark results with a baseline.
+
+    Args:
+        results: the results of run_benchmarks.
+        baseline: the results of an earlier run.
+        tolerance: the fraction by which a benchmark can be slower than its baseline.
+
+    Returns:
+        A list of (name, seconds, baseline seconds) triples for the benchmarks that are slower
+        than their baseline by more than the tolerance. Benchmarks missing from either are ignored.
+    """
+    regressions = []
+    for (name, result) in results["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is not None and result["seconds"] > (1.0 + tolerance) * baseline_result["seconds"]:
+            regressions.append((name, result["seconds"], baseline_result["seconds"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time curve stripping and valuation.")
+    parser.add_argument("--output", help="the JSON file that the results are written to")
+    parser.add_argument("--baseline", help="a JSON file of earlier results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="the allowed fractional slowdown")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose names contain this")
+    parser.add_argument("--quick", action="store_true", help="leave out the largest cases")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.filter, args.quick)
+    for (name, result) in results["results"].items():
+        print("{:32}{:12.6f} s  ({} runs)".format(name, result["seconds"], result["repeats"]))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for (name, seconds, baseline_seconds) in regressions:
+            print("Regression in {}: {:.6f} s against {:.6f} s".format(name, seconds, baseline_seconds),
+                  file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Flattens the cashflows of many instruments into arrays, so that a whole portfolio can be
+valued with a few vectorized operations instead of one curve lookup per flow.
+"""
+
+import numpy as np
+from daycountconvention import actual_360
+from instruments import LiborDeposit, InterestRateSwap, OisBasisSwap
+
+
+def _dfs(libor_curve, ois_curve, dates, on_libor_curve):
+    """The DFs for the dates, from the Libor curve where on_libor_curve is true and the OIS curve elsewhere."""
+    dfs = np.empty(len(dates))
+    dfs[on_libor_curve] = libor_curve.df_array(dates[on_libor_curve])
+    dfs[~on_libor_curve] = ois_curve.df_array(dates[~on_libor_curve])
+    return dfs
+
+
+def _adjoint(libor_curve, ois_curve, dates, adjoints, on_libor_curve):
+    """
+    The reverse pass of _dfs(): the sensitivities of sum(adjoints * DFs) to the Libor and the
+    OIS curve node DFs.
+    """
+    return (libor_curve.df_adjoint(dates[on_libor_curve], adjoints[on_libor_curve]),
+            ois_curve.df_adjoint(dates[~on_libor_curve], adjoints[~on_libor_curve]))
+
+
+class CompiledCashflows:
+    """
+    The cashflows of a list of instruments, held as NumPy arrays.
+
+    There are two kinds of flow. A fixed flow is a known amount paid on a date, and is
+    discounted on the OIS curve, or on the Libor curve for LiborDeposits. A floating flow
+    pays multiple * (forward + spread) on its end date, where the forward is the simple
+    Libor or OIS forward over the accrual period, and is discounted on the OIS curve.
+    Dates are held as ordinals, as returned by date.toordinal().
+    """
+
+    def __init__(self, num_trades, fixed_flows, floating_flows):
+        (self.fixed_payment_dates, self.fixed_amounts, self.fixed_on_libor_curve,
+         self.fixed_trade_indices) = fixed_flows
+        (self.floating_start_dates, self.floating_end_dates, self.floating_year_fractions,
+         self.floating_multiples, self.floating_spreads, self.floating_on_libor_curve,
+         self.floating_trade_indices) = floating_flows
+        self.num_trades = num_trades
+
+    def values(self, libor_curve, ois_curve):
+        """The value of each trade, as a NumPy array in the order the trades were compiled."""
+        fixed_values = self.fixed_amounts * _dfs(libor_curve, ois_curve, self.fixed_payment_dates,
+                                                 self.fixed_on_libor_curve)
+        start_dfs = _dfs(libor_curve, ois_curve, self.floating_start_dates, self.floating_on_libor_curve)
+        end_dfs = _dfs(libor_curve, ois_curve, self.floating_end_dates, self.floating_on_libor_curve)
+        forwards = (start_dfs / end_dfs - 1.0) / self.floating_year_fractions
+        floating_values = (self.floating_multiples * (forwards + self.floating_spreads)
+                           * ois_curve.df_array(self.floating_end_dates))
+        return (np.bincount(self.fixed_trade_indices, weights=fixed_values, minlength=self.num_trades)
+                + np.bincount(self.floating_trade_indices, weights=floating_values, minlength=self.num_trades))
+
+    def node_sensitivities(self, libor_curve, ois_curve, trade_weights=None):
+        """
+        The sensitivities of the weighted sum of the trades' values to the node DFs of the curves.
+
+        This is an adjoint (reverse-mode) pass through values(), so it costs about as much as
+        one more valuation, however many nodes the curves have.
+
+        Args:
+            libor_curve: the Libor curve.
+            ois_curve: the OIS curve, which may be the Libor curve itself.
+            trade_weights: optionally, a NumPy array with a weight for each trade, e.g. the
+                positions held. By default every trade has a weight of 1.
+
+        Returns:
+            A tuple of two NumPy arrays, with the derivatives with respect to each Libor curve
+            node DF and each OIS curve node DF respectively. For a single curve, the two add up
+            to the derivatives with respect to its nodes.
+        """
+        if trade_weights is None:
+            trade_weights = np.ones(self.num_trades)
+        fixed_weights = trade_weights[self.fixed_trade_indices]
+        floating_weights = trade_weights[self.floating_trade_indices]
+
+        start_dfs = _dfs(libor_curve, ois_curve, self.floating_start_dates, self.floating_on_libor_curve)
+        end_dfs = _dfs(libor_curve, ois_curve, self.floating_end_dates, self.floating_on_libor_curve)
+        discount_dfs = ois_curve.df_array(self.floating_end_dates)
+        forwards = (start_dfs / end_dfs - 1.0) / self.floating_year_fractions
+        # floating value = multiple * ((start DF / end DF - 1) / year fraction + spread) * discount DF
+        forward_adjoints = floating_weights * self.floating_multiples * discount_dfs / self.floating_year_fractions
+        sensitivities = [
+            _adjoint(libor_curve, ois_curve, self.fixed_payment_dates, fixed_weights * self.fixed_amounts,
+                     self.fixed_on_libor_curve),
+            _adjoint(libor_curve, ois_curve, self.floating_start_dates, forward_adjoints / end_dfs,
+                     self.floating_on_libor_curve),
+            _adjoint(libor_curve, ois_curve, self.floating_end_dates, -forward_adjoints * start_dfs / end_dfs**2,
+                     self.floating_on_libor_curve),
+            (np.zeros(len(libor_curve.dates)),
+             ois_curve.df_adjoint(self.floating_end_dates,
+                                  floating_weights * self.floating_multiples * (forwards + self.floating_spreads)))]
+        return (sum(libor_sensitivities for (libor_sensitivities, _) in sensitivities),
+                sum(ois_sensitivities for (_, ois_sensitivities) in sensitivities))
+
+
+def can_compile(instrument):
+    """Whether compile_cashflows() accepts the instrument."""
+    return isinstance(instrument, (LiborDeposit, InterestRateSwap, OisBasisSwap))
+
+
+def compile_cashflows(instruments):
+    """
+    Compiles the cashflows of a list of instruments for vectorized valuation.
+
+    Args:
+        instruments: a list of any combination of LiborDeposits, InterestRateSwaps and OisBasisSwaps.
+
+    Returns:
+        A CompiledCashflows whose values() agree with the value() of each instrument.
+    """
+    fixed_columns = []     # (payment dates, amounts, on Libor curve, trade indices) for each instrument
+    floating_columns = []  # (start dates, end dates, year fractions, multiples, spreads, on Libor curve, trade indices)
+    for (trade_index, instrument) in enumerate(instruments):
+        if isinstance(instrument, LiborDeposit):
+            fixed_columns.append(([instrument.start_date.toordinal(), instrument.end_date.toordinal()],
+                                  [instrument.flow_on_start_date, instrument.flow_on_end_date],
+                                  [True, True], [trade_index, trade_index]))
+        elif isinstance(instrument, (InterestRateSwap, OisBasisSwap)):
+            legs = [(instrument.libor_leg, 0.0, True)]
+            if isinstance(instrument, InterestRateSwap):
+                fixed_leg = instrument.fixed_leg
+                fixed_columns.append((fixed_leg["end_date"], fixed_leg["amount"], np.zeros(len(fixed_leg), dtype=bool),
+                                      np.full(len(fixed_leg), trade_index)))
+            else:
+                legs.append((instrument.ois_leg, instrument.ois_leg_spread, False))
+            for (leg, spread, on_libor_curve) in legs:
+                floating_columns.append((leg["start_date"], leg["end_date"],
+                                         actual_360.yf_array(leg["start_date"], leg["end_date"]), leg["multiple"],
+                                         np.full(len(leg), spread), np.full(len(leg), on_libor_curve),
+                                         np.full(len(leg), trade_index)))
+        else:
+            raise ValueError("Cannot compile cashflows of " + type(instrument).__name__ + ".")
+
+    def to_arrays(columns, dtypes):
+        return [np.concatenate([instrument_columns[i] for instrument_columns in columns]).astype(dtype)
+                if columns else np.array([], dtype=dtype) for (i, dtype) in enumerate(dtypes)]
+
+    return CompiledCashflows(len(instruments),
+                             to_arrays(fixed_columns, [np.int64, float, bool, np.int64]),
+                             to_arrays(floating_columns, [np.int64, np.int64, float, float, float, bool, np.int64]))
@@ -0,0 +1,145 @@
+"""
+A cache of stripped curves, keyed on a hash of everything that determines them.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date
+from hashlib import sha256
+import json
+import threading
+import time
+import numpy as np
+import curvestrippers
+from interpolation import LogLinearInterpolator
+
+
+def _attributes(value):
+    """The attributes of an object, from its __dict__ and the __slots__ of its type and base types."""
+    attributes = dict(vars(value)) if hasattr(value, "__dict__") else {}
+    for cls in type(value).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in [slots] if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and name not in attributes and hasattr(value, name):
+                attributes[name] = getattr(value, name)
+    return sorted(attributes.items())
+
+
+def _canonical(value):
+    """A JSON-serializable form of a stripper input or option that is equal for equal definitions."""
+    if isinstance(value, np.generic):
+        # NumPy scalars, e.g. a rate or notional read from an array, are equal to Python ones.
+        value = value.item()
+    if isinstance(value, bool) or value is None or isinstance(value, (int, str)):
+        return value
+    if isinstance(value, float):
+        return float.hex(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [_canonical(element) for element in value]
+    if isinstance(value, type):
+        return value.__module__ + "." + value.__qualname__
+    if isinstance(value, np.ndarray):
+        # Packed swap legs: the field names and the rows.
+        return [list(value.dtype.names or ()), _canonical(value.tolist())]
+    # Instruments, their flows and day-count conventions are defined by their type and attributes.
+    return [type(value).__qualname__] + [[name, _canonical(attribute)] for (name, attribute) in _attributes(value)]
+
+
+def curve_key(base_date, inputs, **options):
+    """
+    The cache key of a strip: a SHA-256 hex digest of the base date, the definitions and quotes
+    of the inputs, in order, and the stripper options.
+    """
+    canonical = [_canonical(base_date), _canonical(list(inputs)),
+                 sorted([name, _canonical(option)] for (name, option) in options.items())]
+    return sha256(json.dumps(canonical, separators=(",", ":")).encode()).hexdigest()
+
+
+class CurveCache:
+    """
+    A thread-safe cache of stripped curves with least-recently-used and time-to-live eviction.
+
+    Concurrent requests for the same strip are coalesced: the first one strips the curves
+    and the others wait for its result. Failed strips are not cached.
+    """
+
+    def __init__(self, max_size=128, ttl_seconds=60.0, clock=time.monotonic):
+        """
+        Creates a CurveCache.
+
+        Args:
+            max_size: the maximum number of strips kept.
+            ttl_seconds: how long a strip is kept for after it finishes.
+            clock: a function returning the current time in seconds.
+        """
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # Key -> (expiry time, result), least recently used first.
+        self._in_flight = {}  # Key -> Future of the result.
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expirations": 0}
+
+    def _get_or_compute(self, key, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                (expiry_time, result) = entry
+                if self._clock() < expiry_time:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return result
+                del self._entries[key]
+                self._stats["expirations"] += 1
+            future = self._in_flight.get(key)
+            if future is None:
+                self._stats["misses"] += 1
+                future = self._in_flight[key] = Future()
+                is_owner = True
+            else:
+                self._stats["coalesced"] += 1
+                is_owner = False
+        if not is_owner:
+            return future.result()
+
+        try:
+            result = compute()
+        except BaseException as error:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(error)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            self._entries[key] = (self._clock() + self._ttl_seconds, result)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        future.set_result(result)
+        return result
+
+    def strip_libor_curve(self, base_date, inputs, method="global", interpolation=LogLinearInterpolator):
+        """The same as curvestrippers.strip_libor_curve, served from the cache where possible."""
+        key = curve_key(base_date, inputs, stripper="libor", method=method, interpolation=interpolation)
+        return self._get_or_compute(key, lambda: curvestrippers.strip_libor_curve(
+            base_date, inputs, method=method, interpolation=interpolation))
+
+    def strip_libor_and_ois_curves(self, base_date, inputs, method="global", interpolation=LogLinearInterpolator):
+        """The same as curvestrippers.strip_libor_and_ois_curves, served from the cache where possible."""
+        key = curve_key(base_date, inputs, stripper="libor_and_ois", method=method, interpolation=interpolation)
+        return self._get_or_compute(key, lambda: curvestrippers.strip_libor_and_ois_curves(
+            base_date, inputs, method=method, interpolation=interpolation))
+
+    def stats(self):
+        """
+        Returns a dict of the number of "hits", "misses", "coalesced" requests that waited for
+        another thread's strip, "evictions" for size, "expirations", and the current "size".
+        """
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,171 @@
+"""
+A long-running asyncio service that restrips the Libor and OIS curves as quote ticks arrive.
+"""
+
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import json
+import time
+from curvestrippers import Restripper, input_quote
+from interpolation import LogLinearInterpolator
+
+"""
+The curves from one strip. The version goes up by one with each strip, and the quotes are
+the latest quote of every input, in the order of the service's keys.
+"""
+CurveSnapshot = namedtuple("CurveSnapshot", ["version", "libor_curve", "ois_curve", "quotes"])
+
+
+class CurveService:
+    """
+    Keeps Libor and OIS curves up to date with a feed of quote ticks.
+
+    Ticks that arrive while a strip is running are merged, keeping the latest quote for each
+    input, and are all applied by the next strip, so a burst of ticks costs one strip and the
+    curves for quotes that were already superseded are never stripped. The latest submitted
+    quotes are kept apart from those of the last good strip, so the ticks of a strip that
+    fails are still applied by later strips until their inputs tick again. The strips run in an
+    executor, so the event loop stays free to take ticks and serve readers.
+
+    Each strip publishes a new immutable CurveSnapshot by replacing a single reference, so
+    readers of latest always see a consistent pair of curves without taking a lock.
+    """
+
+    def __init__(self, base_date, inputs, keys=None, ois_curve=True, method="global",
+                 interpolation=LogLinearInterpolator, executor=None):
+        """
+        Creates a CurveService, and strips the curves for the initial quotes.
+
+        Args:
+            base_date: the date on which the curves are stripped.
+            inputs: the inputs, as for curvestrippers.Restripper, with their initial quotes.
+            keys: optionally, a list of the keys that ticks use to refer to the inputs, one for
+                each input, e.g. ["3M deposit", "EDZ8", ...]. By default the key of each input
+                is its position in the list.
+            ois_curve: whether to strip separate Libor and OIS curves, or a single Libor curve.
+            method: the stripping method, as for curvestrippers.strip_libor_curve.
+            interpolation: the interpolation scheme, as for curvestrippers.strip_libor_curve.
+            executor: optionally, the concurrent.futures.Executor that the strips run in. It
+                must run them in the service's process, e.g. a ThreadPoolExecutor. By default
+                the service has its own single thread.
+        """
+        self._keys = list(range(len(inputs))) if keys is None else list(keys)
+        if len(self._keys) != len(inputs) or len(set(self._keys)) != len(inputs):
+            raise ValueError("There must be one distinct key for each input.")
+        self._positions = {key: i for (i, key) in enumerate(self._keys)}
+        self._restripper = Restripper(base_date, inputs, ois_curve=ois_curve, method=method,
+                                      interpolation=interpolation)
+        quotes = tuple(input_quote(input) for input in inputs)
+        self._latest = CurveSnapshot(0, *self._restripper.curves, quotes)
+        self._executor = executor
+        # The latest quote submitted for each input, and whether any are not yet stripped.
+        self._quotes = list(quotes)
+        self._pending = False
+        self._ticks_waiting = None
+        self._stats = {"ticks": 0, "strips": 0, "failed_strips": 0, "strip_seconds": 0.0}
+        self.last_error = None
+
+    @property
+    def latest(self):
+        """The CurveSnapshot of the latest successful strip."""
+        return self._latest
+
+    def stats(self):
+        """
+        Returns a dict of the number of "ticks" received, "strips" run, "failed_strips", and
+        the total wall-clock "strip_seconds".
+        """
+        return dict(self._stats)
+
+    def submit(self, key, quote):
+        """Submits a new quote for the input with the key. It is applied by the next strip."""
+        if key not in self._positions:
+            raise KeyError("Unknown input key: " + str(key))
+        self._stats["ticks"] += 1
+        self._quotes[self._positions[key]] = quote
+        self._pending = True
+        if self._ticks_waiting is not None:
+            self._ticks_waiting.set()
+
+    async def run(self, feed):
+        """
+        Strips the curves for the ticks from the feed until it ends, and then for any ticks
+        still waiting.
+
+        Args:
+            feed: an async iterable of (key, quote) ticks, e.g. replay_ticks(path).
+        """
+        self._ticks_waiting = asyncio.Event()
+        if self._pending:
+            self._ticks_waiting.set()
+        executor = self._executor or ThreadPoolExecutor(max_workers=1)
+        feed_done = asyncio.Event()
+
+        async def read_feed():
+            try:
+                async for (key, quote) in feed:
+                    self.submit(key, quote)
+            finally:
+                feed_done.set()
+                self._ticks_waiting.set()
+
+        reader = asyncio.ensure_future(read_feed())
+        try:
+            while not (feed_done.is_set() and not self._pending):
+                await self._ticks_waiting.wait()
+                self._ticks_waiting.clear()
+                if self._pending:
+                    await self._strip(executor)
+            await reader
+        finally:
+            reader.cancel()
+            self._ticks_waiting = None
+            if self._executor is None:
+                executor.shutdown(wait=False)
+
+    async def _strip(self, executor):
+        quotes = list(self._quotes)
+        self._pending = False
+        start_time = time.perf_counter()
+        try:
+            curves = await asyncio.get_running_loop().run_in_executor(executor, self._restripper.restrip, quotes)
+        except Exception as error:  # A bad tick must not stop the service.
+            # Keep serving the last good curves, and try again with the next ticks.
+            self._stats["failed_strips"] += 1
+            self.last_error = error
+            return
+        finally:
+            self._stats["strip_seconds"] += time.perf_counter() - start_time
+        self._stats["strips"] += 1
+        self._latest = CurveSnapshot(self._latest.version + 1, *curves, tuple(quotes))
+
+
+async def replay_ticks(path, speed=None):
+    """
+    Replays the quote ticks in a JSONL file, as a stand-in for a live market data feed.
+
+    Each line is a JSON object with the "key" and the "quote" of a tick, and optionally the
+    "time" of the tick in seconds from the start of the replay.
+
+    Args:
+        path: the path of the file.
+        speed: optionally, how many times faster than real time to replay the ticks. By default
+            the times are ignored and the ticks are replayed as fast as they are read.
+
+    Yields:
+        (key, quote) pairs.
+    """
+    start_time = time.monotonic()
+    with open(path) as tick_file:
+        for line in tick_file:
+            if not line.strip():
+                continue
+            tick = json.loads(line)
+            if speed is not None and "time" in tick:
+                delay = tick["time"] / speed - (time.monotonic() - start_time)
+                if delay > 0.0:
+                    await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)
+            yield tick["key"], tick["quote"]
@@ -0,0 +1,250 @@
+"""
+Stores many stripped curves on disk in a columnar format that is read through memory maps.
+
+A store is a directory of four NumPy .npy files:
+    base_dates.npy: the curves' base dates as int64 date ordinals, in increasing order.
+    offsets.npy: int64 offsets into the node arrays, one more than the number of curves. The
+        nodes of curve i are at positions offsets[i] to offsets[i + 1] - 1.
+    node_yfs.npy: the float64 Actual/365 year-fractions of every curve's node dates from its
+        base date, one curve after another.
+    log_dfs.npy: the float64 log discount factors at those nodes.
+
+A store of two-curve strips also holds the OIS curve for each base date, in the files
+ois_offsets.npy, ois_node_yfs.npy and ois_log_dfs.npy, laid out in the same way. batch.py
+writes its strips to a store.
+
+Curves can also be appended to a store without rewriting it. Each append_curves() call
+writes a complete store of its own to a new segment_<n> subdirectory, which is renamed into
+place once written, so a run that stops part-way keeps every segment it finished. A reader
+sees the curves of the files in the directory and of every segment, and where a base date
+is stored more than once, the curves appended last are used. compact_store() merges the
+segments back into one.
+
+Only NumPy and the standard library are imported, so a short-lived pricing job can load
+pre-stripped curves and value trades without importing SciPy.
+
+Opening a store maps the files rather than reading them, so looking up one curve only reads
+the pages that hold its nodes.
+"""
+
+from datetime import date, timedelta
+import os
+import re
+import shutil
+import numpy as np
+from interestratecurve import InterestRateCurve
+from interpolation import LogLinearInterpolator
+
+_FILE_NAMES = ("base_dates", "offsets", "node_yfs", "log_dfs")
+_OIS_FILE_NAMES = ("ois_offsets", "ois_node_yfs", "ois_log_dfs")
+_SEGMENT_NAME = re.compile(r"segment_(\d+)$")
+
+
+def _file_path(path, name):
+    return os.path.join(path, name + ".npy")
+
+
+def _segment_paths(path):
+    """The paths of the store's segments, oldest first."""
+    if not os.path.isdir(path):
+        return []
+    numbered = [(int(match.group(1)), os.path.join(path, name))
+                for (name, match) in ((name, _SEGMENT_NAME.match(name)) for name in os.listdir(path)) if match]
+    return [segment_path for (_, segment_path) in sorted(numbered)]
+
+
+def _node_arrays(curves):
+    """The offsets, node year-fractions and log DFs of curves stored one after another."""
+    offsets = np.zeros(len(curves) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(curve.dates) for curve in curves])
+    node_yfs = np.empty(offsets[-1])
+    log_dfs = np.empty(offsets[-1])
+    for (i, curve) in enumerate(curves):
+        base_ordinal = curve.base_date.toordinal()
+        nodes = slice(offsets[i], offsets[i + 1])
+        node_yfs[nodes] = [(node_date.toordinal() - base_ordinal) / 365.0 for node_date in curve.dates]
+        log_dfs[nodes] = np.log(curve.dfs)
+    return offsets, node_yfs, log_dfs
+
+
+def save_curves(path, curves, ois_curves=None):
+    """
+    Saves curves to a new store, replacing any store already in the directory, with its
+    segments.
+
+    Args:
+        path: the directory of the store, which is created if needed.
+        curves: an iterable of InterestRateCurves with different base dates, in any order. For
+            two-curve strips these are the Libor curves.
+        ois_curves: optionally, the OIS curves of two-curve strips, with the same base dates as
+            the curves, in any order.
+    """
+    curves = sorted(curves, key=lambda curve: curve.base_date)
+    base_dates = np.array([curve.base_date.toordinal() for curve in curves], dtype=np.int64)
+    if np.any(np.diff(base_dates) == 0):
+        raise ValueError("Cannot store two curves with the same base date.")
+    arrays = [base_dates, *_node_arrays(curves)]
+    if ois_curves is not None:
+        ois_curves = sorted(ois_curves, key=lambda curve: curve.base_date)
+        if [curve.base_date.toordinal() for curve in ois_curves] != base_dates.tolist():
+            raise ValueError("Cannot store OIS curves whose base dates differ from the Libor curves'.")
+        arrays.extend(_node_arrays(ois_curves))
+
+    os.makedirs(path, exist_ok=True)
+    for (name, array) in zip(_FILE_NAMES + _OIS_FILE_NAMES, arrays):
+        np.save(_file_path(path, name), array)
+    if ois_curves is None:
+        for name in _OIS_FILE_NAMES:
+            if os.path.exists(_file_path(path, name)):
+                os.remove(_file_path(path, name))
+    for segment_path in _segment_paths(path):
+        shutil.rmtree(segment_path)
+
+
+def append_curves(path, curves, ois_curves=None):
+    """
+    Appends curves to a store as a new segment, without rewriting the curves already stored.
+
+    The segment is written under a temporary name and then renamed, so readers never see a
+    part-written segment. Curves for a base date that is already stored replace the old ones.
+
+    Args:
+        path: the directory of the store, which is created if needed.
+        curves: the curves, as for save_curves.
+        ois_curves: optionally, the OIS curves, as for save_curves.
+    """
+    os.makedirs(path, exist_ok=True)
+    segment_paths = _segment_paths(path)
+    number = int(_SEGMENT_NAME.search(segment_paths[-1]).group(1)) + 1 if segment_paths else 1
+    temporary_path = os.path.join(path, ".writing_segment_" + str(number))
+    save_curves(temporary_path, curves, ois_curves)
+    os.rename(temporary_path, os.path.join(path, "segment_" + str(number)))
+
+
+def compact_store(path):
+    """
+    Merges the segments of a store into one segment, keeping the curves that readers see.
+
+    The merged segment is appended before the old files are removed, so a store that is
+    compacted part-way still reads the same.
+    """
+    segment_paths = _segment_paths(path)
+    if not segment_paths or (len(segment_paths) == 1 and not os.path.exists(_file_path(path, _FILE_NAMES[0]))):
+        return
+    store = CurveStore(path)
+    pairs = [store.curves(base_date) for base_date in store.base_dates]
+    append_curves(path, [libor_curve for (libor_curve, _) in pairs],
+                  [ois_curve for (_, ois_curve) in pairs] if store.has_ois_curves else None)
+    # The base dates file goes first, as it marks the files in the directory as part of the store.
+    for name in _FILE_NAMES + _OIS_FILE_NAMES:
+        if os.path.exists(_file_path(path, name)):
+            os.remove(_file_path(path, name))
+    for segment_path in segment_paths:
+        shutil.rmtree(segment_path)
+
+
+class CurveStore:
+    """
+    A read-only view of a store of curves saved by save_curves and append_curves.
+
+    The arrays are memory-mapped, so opening a store is cheap whatever its size, and only
+    the curves that are used are read from disk, apart from the base dates of the segments,
+    which are read when the store is opened. For a store of single-curve strips, the OIS
+    curve for a base date is the Libor curve, as for the strippers.
+    """
+
+    def __init__(self, path, interpolation=LogLinearInterpolator):
+        """
+        Opens a CurveStore.
+
+        Args:
+            path: the directory of the store.
+            interpolation: the interpolation scheme of the curves that are returned.
+        """
+        part_paths = ([path] if os.path.exists(_file_path(path, _FILE_NAMES[0])) else []) + _segment_paths(path)
+        if not part_paths:
+            raise FileNotFoundError("There is no curve store in " + str(path) + ".")
+        # For each part, the arrays of the Libor curves, and of the OIS curves or None.
+        self._parts = [(tuple(np.load(_file_path(part_path, name), mmap_mode="r") for name in _FILE_NAMES[1:]),
+                        tuple(np.load(_file_path(part_path, name), mmap_mode="r") for name in _OIS_FILE_NAMES)
+                        if os.path.exists(_file_path(part_path, _OIS_FILE_NAMES[0])) else None)
+                       for part_path in part_paths]
+        if len({ois_nodes is None for (_, ois_nodes) in self._parts}) > 1:
+            raise ValueError("The store mixes single-curve and two-curve strips.")
+        part_base_dates = [np.load(_file_path(part_path, _FILE_NAMES[0])) for part_path in part_paths]
+        base_dates = np.concatenate(part_base_dates)
+        part_numbers = np.repeat(np.arange(len(part_paths)), [len(dates) for dates in part_base_dates])
+        rows = np.concatenate([np.arange(len(dates)) for dates in part_base_dates])
+        # The parts are in the order they were written, so the last of each base date is used.
+        order = np.argsort(base_dates, kind="stable")
+        sorted_base_dates = base_dates[order]
+        last = np.append(sorted_base_dates[1:] != sorted_base_dates[:-1], True)
+        self._base_dates = sorted_base_dates[last]
+        self._part_numbers = part_numbers[order][last]
+        self._rows = rows[order][last]
+        self._interpolation = interpolation
+
+    def __len__(self):
+        return len(self._base_dates)
+
+    def __contains__(self, base_date):
+        return self._find(base_date) is not None
+
+    @property
+    def has_ois_curves(self):
+        """Whether the store holds separate OIS curves, i.e. it is of two-curve strips."""
+        return self._parts[0][1] is not None
+
+    @property
+    def base_dates(self):
+        """The base dates of the stored curves, in order."""
+        return [date.fromordinal(int(ordinal)) for ordinal in self._base_dates]
+
+    def _find(self, base_date):
+        ordinal = base_date.toordinal()
+        i = int(np.searchsorted(self._base_dates, ordinal))
+        if i == len(self._base_dates) or self._base_dates[i] != ordinal:
+            return None
+        return i
+
+    def _index(self, base_date):
+        i = self._find(base_date)
+        if i is None:
+            raise KeyError("No curve is stored for " + base_date.isoformat() + ".")
+        return i
+
+    def _curve(self, base_date, row, offsets, node_yfs, log_dfs):
+        nodes = slice(offsets[row], offsets[row + 1])
+        # The year-fractions are whole numbers of days over 365, so the dates are recovered exactly.
+        days = np.rint(node_yfs[nodes] * 365.0).astype(np.int64)
+        dates = [base_date + timedelta(days=int(day)) for day in days]
+        return InterestRateCurve(base_date, dates, np.exp(log_dfs[nodes]).tolist(), self._interpolation)
+
+    def curve(self, base_date):
+        """
+        Returns the InterestRateCurve for the base date, which is the Libor curve of a two-curve
+        strip, or raises a KeyError if it is not stored.
+        """
+        i = self._index(base_date)
+        (libor_nodes, _) = self._parts[self._part_numbers[i]]
+        return self._curve(base_date, self._rows[i], *libor_nodes)
+
+    def curves(self, base_date):
+        """
+        Returns the (Libor curve, OIS curve) pair for the base date, or raises a KeyError if it
+        is not stored. For a store of single-curve strips, both curves are the Libor curve.
+        """
+        i = self._index(base_date)
+        (libor_nodes, ois_nodes) = self._parts[self._part_numbers[i]]
+        libor_curve = self._curve(base_date, self._rows[i], *libor_nodes)
+        if ois_nodes is None:
+            return libor_curve, libor_curve
+        return libor_curve, self._curve(base_date, self._rows[i], *ois_nodes)
+
+    def df_array(self, base_date, dates):
+        """Calculate the discount factors for many dates on the curve for the base date."""
+        return self.curve(base_date).df_array(dates)
+
+    def forward_array(self, base_date, start_dates, end_dates, dcc):
+        """Calculate the simple forward rates for many periods on the curve for the base date."""
+        return self.curve(base_date).forward_array(start_dates, end_dates, dcc)
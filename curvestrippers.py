@@ -1,6 +1,8 @@
-from scipy.optimize import root
+import metrics
+import numpy as np
 from instruments import OisBasisSwap
-from interestratecurve import InterestRateCurve
+from interestratecurve import InterestRateCurve, MutableInterestRateCurve
+from interpolation import LogLinearInterpolator
 
 
 def _is_eurodollar_future_and_price(input):
@@ -21,7 +23,327 @@ def _scalar_objective_function(input, libor_curve, ois_curve):
         return input.value(libor_curve, ois_curve)
 
 
-def strip_libor_curve(base_date, inputs):
+def _instrument_name(input):
+    return type(input[0] if _is_eurodollar_future_and_price(input) else input).__name__
+
+
+def _scalar_objective_sensitivities(input, libor_curve, ois_curve):
+    """The sensitivities of the scalar objective to the Libor and the OIS curve node DFs."""
+    if _is_eurodollar_future_and_price(input):
+        return input[0].price_sensitivities(libor_curve), np.zeros(len(ois_curve.dates))
+    else:
+        return input.node_sensitivities(libor_curve, ois_curve)
+
+
+class _StripProblem:
+    """
+    The system of equations solved by the strippers. Not meant to be used by itself.
+
+    The unknowns are the node DFs of the Libor curve followed by those of the OIS curve.
+    For a single-curve strip there are no OIS nodes and the Libor curve is used for both.
+    """
+
+    def __init__(self, base_date, libor_inputs, ois_inputs, single_curve, interpolation):
+        self.base_date = base_date
+        self.single_curve = single_curve
+        self.interpolation = interpolation
+        self.libor_inputs = sorted(libor_inputs, key=_node_date)
+        self.ois_inputs = sorted(ois_inputs, key=_node_date)
+        self.inputs = self.libor_inputs + self.ois_inputs
+        self.libor_dates = [_node_date(input) for input in self.libor_inputs]
+        self.ois_dates = [_node_date(input) for input in self.ois_inputs]
+        # The solver updates these curves in place rather than creating new ones.
+        self._libor_curve = MutableInterestRateCurve(base_date, self.libor_dates, interpolation=interpolation)
+        self._ois_curve = (self._libor_curve if single_curve
+                           else MutableInterestRateCurve(base_date, self.ois_dates, interpolation=interpolation))
+
+    def make_curves(self, dfs):
+        """Creates the (immutable) Libor and OIS curves for the node DFs."""
+        libor_curve = InterestRateCurve(self.base_date, self.libor_dates, list(dfs[:len(self.libor_dates)]),
+                                        self.interpolation)
+        if self.single_curve:
+            return libor_curve, libor_curve
+        return libor_curve, InterestRateCurve(self.base_date, self.ois_dates, list(dfs[len(self.libor_dates):]),
+                                              self.interpolation)
+
+    def _update_curves(self, dfs):
+        """Sets the node DFs of the solver's mutable curves, and returns them."""
+        self._libor_curve.set_dfs(dfs[:len(self.libor_dates)])
+        if not self.single_curve:
+            self._ois_curve.set_dfs(dfs[len(self.libor_dates):])
+        return self._libor_curve, self._ois_curve
+
+    def residuals(self, dfs):
+        libor_curve, ois_curve = self._update_curves(dfs)
+        report = metrics.active_report()
+        if report is not None:
+            return self._timed_residuals(libor_curve, ois_curve, report)
+        return np.array([_scalar_objective_function(input, libor_curve, ois_curve) for input in self.inputs])
+
+    def _timed_residuals(self, libor_curve, ois_curve, report, inputs=None):
+        report.count("objective_evaluations")
+        residuals = []
+        for input in self.inputs if inputs is None else inputs:
+            with report.timer("valuation." + _instrument_name(input)):
+                residuals.append(_scalar_objective_function(input, libor_curve, ois_curve))
+        return np.array(residuals)
+
+    def _jacobian_row(self, input, libor_curve, ois_curve):
+        (libor_sensitivities, ois_sensitivities) = _scalar_objective_sensitivities(input, libor_curve, ois_curve)
+        if self.single_curve:
+            return libor_sensitivities + ois_sensitivities
+        return np.concatenate([libor_sensitivities, ois_sensitivities])
+
+    def _timed_jacobian(self, libor_curve, ois_curve, report, inputs=None):
+        report.count("jacobian_evaluations")
+        rows = []
+        for input in self.inputs if inputs is None else inputs:
+            with report.timer("sensitivities." + _instrument_name(input)):
+                rows.append(self._jacobian_row(input, libor_curve, ois_curve))
+        return np.array(rows)
+
+    def jacobian(self, dfs):
+        libor_curve, ois_curve = self._update_curves(dfs)
+        report = metrics.active_report()
+        if report is not None:
+            return self._timed_jacobian(libor_curve, ois_curve, report)
+        return np.array([self._jacobian_row(input, libor_curve, ois_curve) for input in self.inputs])
+
+    def residual_norm(self, dfs):
+        """The norm of the residuals, without counting an objective evaluation."""
+        libor_curve, ois_curve = self._update_curves(dfs)
+        return float(np.linalg.norm([_scalar_objective_function(input, libor_curve, ois_curve)
+                                     for input in self.inputs]))
+
+    def residuals_and_jacobian(self, dfs):
+        return self.residuals(dfs), self.jacobian(dfs)
+
+    def blocks(self):
+        """The slices of the inputs and of the node DFs for the OIS curve and for the Libor curve."""
+        num_libor_nodes = len(self.libor_dates)
+        return slice(num_libor_nodes, len(self.inputs)), slice(0, num_libor_nodes)
+
+    def block_residuals_and_jacobian(self, dfs, block):
+        """
+        The residuals of the inputs in the block, and their derivatives with respect to the
+        node DFs in the block only. The block is a slice or a list of indices.
+        """
+        libor_curve, ois_curve = self._update_curves(dfs)
+        inputs = [self.inputs[i] for i in np.arange(len(self.inputs))[block]]
+        report = metrics.active_report()
+        if report is not None:
+            return (self._timed_residuals(libor_curve, ois_curve, report, inputs),
+                    self._timed_jacobian(libor_curve, ois_curve, report, inputs)[:, block])
+        residuals = np.array([_scalar_objective_function(input, libor_curve, ois_curve) for input in inputs])
+        jacobian = np.array([self._jacobian_row(input, libor_curve, ois_curve)[block] for input in inputs])
+        return residuals, jacobian
+
+    def initial_dfs(self, libor_curve, ois_curve):
+        """An initial guess of the node DFs read off previously stripped curves."""
+        dfs = [libor_curve.df(date) for date in self.libor_dates]
+        if not self.single_curve:
+            dfs += [ois_curve.df(date) for date in self.ois_dates]
+        return np.array(dfs)
+
+    def bootstrap_order(self):
+        """
+        The order in which to solve the inputs one at a time: by node date, with Libor inputs
+        first when a Libor and an OIS node fall on the same date.
+        """
+        keys = ([(date, 0) for date in self.libor_dates] + [(date, 1) for date in self.ois_dates])
+        return sorted(range(len(self.inputs)), key=lambda i: keys[i])
+
+    def bootstrap_blocks(self):
+        """
+        Splits the inputs, in bootstrap order, into the smallest runs that can be solved one
+        after another, because the inputs of each run only depend on its own nodes and on
+        earlier ones. The dependencies are read off the Jacobian at irregular, upward-sloping
+        node DFs, as some schemes have derivatives that happen to vanish on a flat curve.
+
+        Returns:
+            A list of lists of indices. Input i determines node DF i, so each list holds the
+            indices of both the inputs and the nodes of a block.
+        """
+        order = self.bootstrap_order()
+        if not order:
+            return []
+        node_yfs = np.array([(node_date - self.base_date).days / 365.0
+                             for node_date in self.libor_dates + self.ois_dates])
+        irregular_dfs = np.exp(-node_yfs * (0.02 + 0.01 * np.sqrt(np.arange(1, len(order) + 1) % 7)))
+        depends = self.jacobian(irregular_dfs)[np.ix_(order, order)] != 0.0
+        last_dependencies = np.max(np.where(depends, np.arange(len(order)), -1), axis=1)
+        blocks = []
+        start = 0
+        reach = -1
+        for position in range(len(order)):
+            reach = max(reach, last_dependencies[position], position)
+            if reach == position:
+                blocks.append(order[start:position + 1])
+                start = position + 1
+        return blocks
+
+
+def _solve_globally(problem, initial_dfs, curve_description, tolerance=None, max_iterations=None):
+    from scipy.optimize import root  # Imported here so that only strips pay for importing SciPy.
+    options = {} if max_iterations is None else {"maxfev": max_iterations}
+    sol = root(problem.residuals_and_jacobian, initial_dfs, jac=True, tol=tolerance, options=options)
+    if sol.success:
+        # SciPy's default solver does not report iterations, but takes one per Jacobian evaluation.
+        return sol.x, sol.get("nit", sol.get("njev", sol.nfev))
+    else:
+        raise ValueError("Could not strip " + curve_description + ": " + sol.message)
+
+
+def _bootstrap(problem, initial_dfs, curve_description, tolerance=None, max_iterations=None):
+    """
+    Solves for a few nodes at a time, in node date order. Input i determines node DF i.
+
+    The inputs are split into problem.bootstrap_blocks(). For a single curve with a local
+    interpolation scheme a block is usually one node, and for two curves it is usually a
+    Libor node and the OIS node at or after it, which depend on each other. Each block is
+    solved by Newton's method with the earlier nodes fixed, and then the later nodes take the
+    value of its last node on the same curve, as a first guess. If one block holds all of
+    the nodes, e.g. for a scheme that is not local, the global solve is used instead.
+    """
+    dfs = np.array(initial_dfs, dtype=float)
+    blocks = problem.bootstrap_blocks()
+    if len(blocks) == 1 and len(blocks[0]) > 1:
+        return _solve_globally(problem, dfs, curve_description, tolerance, max_iterations)
+    tolerance = BLOCK_TOLERANCE if tolerance is None else tolerance
+    max_iterations = BLOCK_MAX_ITERATIONS if max_iterations is None else max_iterations
+    num_libor_nodes = len(problem.libor_dates)
+    iterations = 0
+    for (position, block) in enumerate(blocks):
+        for iteration in range(max_iterations):
+            (residuals, jacobian) = problem.block_residuals_and_jacobian(dfs, block)
+            step = -_solve_linear(jacobian, residuals, curve_description)
+            dfs[block] += step
+            iterations += 1
+            if np.max(np.abs(step)) < tolerance:
+                break
+        else:
+            raise ValueError("Could not strip " + curve_description + ": no convergence in "
+                             + str(max_iterations) + " Newton iterations on a block of nodes.")
+        unsolved = [i for later_block in blocks[position + 1:] for i in later_block]
+        for on_libor_curve in (True, False):
+            solved = [i for i in block if (i < num_libor_nodes) == on_libor_curve]
+            if solved:
+                dfs[[i for i in unsolved if (i < num_libor_nodes) == on_libor_curve]] = dfs[solved[-1]]
+
+    return dfs, iterations
+
+
+"""The default tolerance on the node DFs of the block solvers."""
+BLOCK_TOLERANCE = 1e-12
+
+"""The default iteration limit of the block solvers."""
+BLOCK_MAX_ITERATIONS = 50
+
+
+def _solve_linear(matrix, vector, curve_description):
+    try:
+        return np.linalg.solve(matrix, vector)
+    except np.linalg.LinAlgError as error:
+        raise ValueError("Could not strip " + curve_description + ": " + str(error))
+
+
+def _block_newton_step(jacobian, residuals, ois_block, libor_block, curve_description):
+    """
+    The Newton step -J^-1 r, found by eliminating the Libor block and solving the Schur
+    complement of the Libor-Libor block for the OIS nodes.
+    """
+    jacobian_ll = jacobian[libor_block, libor_block]
+    libor_solutions = _solve_linear(jacobian_ll, np.column_stack([residuals[libor_block],
+                                                                  jacobian[libor_block, ois_block]]),
+                                    curve_description)
+    (libor_residual_solution, libor_ois_solution) = (libor_solutions[:, 0], libor_solutions[:, 1:])
+    jacobian_ol = jacobian[ois_block, libor_block]
+    schur_complement = jacobian[ois_block, ois_block] - jacobian_ol @ libor_ois_solution
+    ois_step = -_solve_linear(schur_complement, residuals[ois_block] - jacobian_ol @ libor_residual_solution,
+                              curve_description)
+    libor_step = -libor_residual_solution - libor_ois_solution @ ois_step
+    step = np.empty(len(residuals))
+    step[libor_block] = libor_step
+    step[ois_block] = ois_step
+    return step
+
+
+def _block_newton(problem, initial_dfs, curve_description, tolerance=None, max_iterations=None):
+    """Newton's method on all of the node DFs, solving each linear system block by block."""
+    tolerance = BLOCK_TOLERANCE if tolerance is None else tolerance
+    max_iterations = BLOCK_MAX_ITERATIONS if max_iterations is None else max_iterations
+    (ois_block, libor_block) = problem.blocks()
+    dfs = np.array(initial_dfs, dtype=float)
+    for iteration in range(1, max_iterations + 1):
+        (residuals, jacobian) = problem.residuals_and_jacobian(dfs)
+        step = _block_newton_step(jacobian, residuals, ois_block, libor_block, curve_description)
+        dfs += step
+        if np.max(np.abs(step), initial=0.0) < tolerance:
+            return dfs, iteration
+    raise ValueError("Could not strip " + curve_description + ": no convergence in "
+                     + str(max_iterations) + " block Newton iterations.")
+
+
+def _alternate(problem, initial_dfs, curve_description, tolerance=None, max_iterations=None):
+    """
+    Solves for the OIS node DFs with the Libor ones fixed, then for the Libor node DFs with
+    the OIS ones fixed, by Newton's method on each block, until neither changes.
+    """
+    tolerance = BLOCK_TOLERANCE if tolerance is None else tolerance
+    max_iterations = BLOCK_MAX_ITERATIONS if max_iterations is None else max_iterations
+    dfs = np.array(initial_dfs, dtype=float)
+    iterations = 0
+    for sweep in range(max_iterations):
+        previous_dfs = dfs.copy()
+        for block in problem.blocks():
+            for iteration in range(max_iterations):
+                (residuals, jacobian) = problem.block_residuals_and_jacobian(dfs, block)
+                step = -_solve_linear(jacobian, residuals, curve_description) if len(residuals) else residuals
+                dfs[block] += step
+                iterations += 1
+                if np.max(np.abs(step), initial=0.0) < tolerance:
+                    break
+            else:
+                raise ValueError("Could not strip " + curve_description + ": no convergence in "
+                                 + str(max_iterations) + " Newton iterations on a curve.")
+        if np.max(np.abs(dfs - previous_dfs)) < tolerance:
+            return dfs, iterations
+    raise ValueError("Could not strip " + curve_description + ": no convergence in "
+                     + str(max_iterations) + " alternating sweeps.")
+
+
+_SOLVERS = {"global": _solve_globally, "bootstrap": _bootstrap, "block_newton": _block_newton,
+            "alternating": _alternate}
+
+
+def _solve(problem, method, initial_dfs, curve_description, tolerance=None, max_iterations=None):
+    """
+    Solves the problem with the method, and returns the node DFs. Each solver returns the node
+    DFs and the number of iterations it took, which are recorded here once for each strip.
+    """
+    report = metrics.active_report()
+    if report is None:
+        return _solve_uninstrumented(problem, method, initial_dfs, curve_description, tolerance, max_iterations)[0]
+    with report.timer("strip"):
+        (dfs, iterations) = _solve_uninstrumented(problem, method, initial_dfs, curve_description, tolerance,
+                                                  max_iterations)
+    report.count("solver_iterations", iterations)
+    report.record("solver_iterations", iterations)
+    report.record("residual_norms", problem.residual_norm(dfs))
+    return dfs
+
+
+def _solve_uninstrumented(problem, method, initial_dfs, curve_description, tolerance, max_iterations):
+    if initial_dfs is None:
+        initial_dfs = np.ones(len(problem.inputs))
+    solver = _SOLVERS.get(method)
+    if solver is None:
+        raise ValueError("Unknown stripping method: " + str(method))
+    return solver(problem, initial_dfs, curve_description, tolerance, max_iterations)
+
+
+def strip_libor_curve(base_date, inputs, method="global", initial_curve=None,
+                      interpolation=LogLinearInterpolator, tolerance=None, max_iterations=None):
     """
     Strips a Libor curve from market data.
 
@@ -30,31 +352,204 @@ def strip_libor_curve(base_date, inputs):
         inputs: a list of any combination of LiborDeposits, fair InterestRateSwaps,
             and/or two-element tuples where the first element is a
             EurodollarFuture and the second element is its market price.
+        method: "global" to solve for all the node DFs at once, or "bootstrap" to solve
+            for them one at a time in date order, or a few at a time where inputs depend on
+            later nodes. Bootstrapping falls back to a global solve if every input depends
+            on the last node. "block_newton" and
+            "alternating" are also accepted, as for strip_libor_and_ois_curves, and are
+            both plain Newton's method for a single curve.
+        initial_curve: optionally, a previously stripped InterestRateCurve whose DFs at the
+            new node dates are used as the initial guess. Its base date must not be after
+            any of the node dates.
+        interpolation: the interpolation scheme of the curve, from the interpolation module.
+            Bootstrapping falls back to a global solve for schemes that are not local.
+        tolerance: optionally, the convergence tolerance on the node DFs. The default is
+            SciPy's for "global", and BLOCK_TOLERANCE for the other methods.
+        max_iterations: optionally, the iteration limit: of function evaluations for "global",
+            of Newton iterations on each block of nodes for "bootstrap", and of Newton
+            iterations or sweeps for the block methods. The default for all but "global" is
+            BLOCK_MAX_ITERATIONS.
 
     Returns:
         An InterestRateCurve that, when used as both the Libor and the OIS curves,
         gives values of zero to the input LiborDeposits and InterestRateSwaps,
         and fair prices of the Eurodollar futures that match their market prices.
     """
-    dates = sorted([_node_date(input) for input in inputs])
+    problem = _StripProblem(base_date, inputs, [], single_curve=True, interpolation=interpolation)
+    initial_dfs = None if initial_curve is None else problem.initial_dfs(initial_curve, initial_curve)
+    dfs = _solve(problem, method, initial_dfs, "Libor curve", tolerance, max_iterations)
+    return problem.make_curves(dfs)[0]
+
 
-    def make_curve(dfs):
-        return InterestRateCurve(base_date, dates, dfs)
+def _is_ois_input(input):
+    return isinstance(input, OisBasisSwap)
 
-    def vector_objective_function(dfs):
-        curve = make_curve(dfs)
-        return [_scalar_objective_function(input, curve, curve) for input in inputs]
 
-    sol = root(vector_objective_function, [1.0] * len(inputs))
-    if sol.success:
-        return make_curve(sol.x)
+def strip_libor_and_ois_curves(base_date, inputs, method="global", initial_curves=None,
+                               interpolation=LogLinearInterpolator, tolerance=None, max_iterations=None):
+    """
+    Strips Libor and OIS curves from market data.
+
+    Args:
+        base_date: the date on which the curves are stripped.
+        inputs: a list of any combination of LiborDeposits, fair InterestRateSwaps,
+            two-element tuples where the first element is a EurodollarFuture and the
+            second element is its market price, and fair OisBasisSwaps.
+        method: "global" or "bootstrap", as for strip_libor_curve, or one of two solvers
+            that use the block structure of the equations, where the Libor inputs mostly
+            depend on the Libor nodes and the OisBasisSwaps on the OIS nodes.
+            "block_newton" takes Newton steps on all the nodes, solving each linear system
+            by eliminating the Libor block. "alternating" solves for the OIS nodes with the
+            Libor nodes fixed, then for the Libor nodes with the OIS nodes fixed, and repeats
+            until neither moves by more than the tolerance.
+        initial_curves: optionally, a tuple of previously stripped Libor and OIS curves to
+            use as the initial guess, as for strip_libor_curve.
+        interpolation: the interpolation scheme of both curves, as for strip_libor_curve.
+        tolerance: optionally, the convergence tolerance, as for strip_libor_curve.
+        max_iterations: optionally, the iteration limit, as for strip_libor_curve.
+
+    Returns:
+        A tuple of the Libor and OIS InterestRateCurves. The OisBasisSwaps determine the
+        nodes of the OIS curve and the other inputs those of the Libor curve. All of the
+        inputs are fair when valued with the two curves.
+
+        The wall-clock time of the solve, and the solver iterations, are reported under
+        "strip" and "solver_iterations" when metrics are being collected.
+    """
+    libor_inputs = [input for input in inputs if not _is_ois_input(input)]
+    ois_inputs = [input for input in inputs if _is_ois_input(input)]
+    problem = _StripProblem(base_date, libor_inputs, ois_inputs, single_curve=False, interpolation=interpolation)
+    initial_dfs = None if initial_curves is None else problem.initial_dfs(*initial_curves)
+    dfs = _solve(problem, method, initial_dfs, "Libor and OIS curves", tolerance, max_iterations)
+    return problem.make_curves(dfs)
+
+
+def input_quote(input):
+    """The market quote of a stripper input: a rate, a futures price or a basis spread."""
+    if _is_eurodollar_future_and_price(input):
+        return input[1]
     else:
-        raise ValueError("Could not strip Libor curve: " + sol.message)
+        return input.quote
 
 
-def _is_ois_input(input):
-    return isinstance(input, OisBasisSwap)
-    
+def input_with_quote(input, quote):
+    """A copy of a stripper input with a different market quote."""
+    if _is_eurodollar_future_and_price(input):
+        return (input[0], quote)
+    else:
+        return input.with_quote(quote)
+
+
+def residual_sensitivities(inputs, libor_curve, ois_curve):
+    """
+    The sensitivities of the strippers' equations to the node DFs and to the input quotes.
+
+    Each input gives one equation: its value, or its fair price less its market price, is zero.
+
+    Args:
+        inputs: the inputs, as for strip_libor_and_ois_curves.
+        libor_curve: the Libor curve. Pass the same curve as the OIS curve for a single-curve strip.
+        ois_curve: the OIS curve.
+
+    Returns:
+        A tuple of the Jacobian with respect to the node DFs, as a NumPy array with one row for
+        each input and one column for each Libor node followed by each OIS node, and a NumPy array
+        of the derivative of each equation with respect to its own quote. For a single-curve strip
+        the Jacobian only has columns for the Libor nodes.
+    """
+    single_curve = libor_curve is ois_curve
+    jacobian = []
+    quote_derivatives = []
+    for input in inputs:
+        (libor_sensitivities, ois_sensitivities) = _scalar_objective_sensitivities(input, libor_curve, ois_curve)
+        if single_curve:
+            jacobian.append(libor_sensitivities + ois_sensitivities)
+        else:
+            jacobian.append(np.concatenate([libor_sensitivities, ois_sensitivities]))
+        if _is_eurodollar_future_and_price(input):
+            quote_derivatives.append(-1.0)
+        else:
+            quote_derivatives.append(input.quote_sensitivity(libor_curve, ois_curve))
+    return np.array(jacobian), np.array(quote_derivatives)
+
+
+def _structure(input):
+    """The parts of an input that must stay the same for a Restripper to reuse its node dates."""
+    if _is_eurodollar_future_and_price(input):
+        return (type(input[0]), _node_date(input))
+    return (type(input), _node_date(input))
+
+
+class Restripper:
+    """
+    A handle for quickly restripping curves when only the market quotes have moved.
+
+    The node dates and instrument schedules of the first strip are kept, and each restrip
+    starts the solver from the previous solution, so that small quote moves only need a
+    few solver iterations.
+    """
+
+    def __init__(self, base_date, inputs, ois_curve=True, method="global", interpolation=LogLinearInterpolator):
+        """
+        Strips the curves for the first time.
+
+        Args:
+            base_date: the date on which the curves are stripped.
+            inputs: the inputs, as for strip_libor_and_ois_curves, or as for strip_libor_curve
+                if ois_curve is False.
+            ois_curve: whether to strip separate Libor and OIS curves, or a single Libor curve.
+            method: "global" or "bootstrap", as for strip_libor_curve.
+            interpolation: the interpolation scheme, as for strip_libor_curve.
+        """
+        self._method = method
+        self._curve_description = "Libor and OIS curves" if ois_curve else "Libor curve"
+        libor_inputs = [input for input in inputs if not (ois_curve and _is_ois_input(input))]
+        ois_inputs = [input for input in inputs if ois_curve and _is_ois_input(input)]
+        self._problem = _StripProblem(base_date, libor_inputs, ois_inputs, single_curve=not ois_curve,
+                                      interpolation=interpolation)
+        # Position of each of the given inputs in the problem's (sorted) order.
+        positions = {id(input): i for (i, input) in enumerate(self._problem.inputs)}
+        self._positions = [positions[id(input)] for input in inputs]
+        self._dfs = _solve(self._problem, method, None, self._curve_description)
+
+    @property
+    def curves(self):
+        """The latest Libor and OIS curves. They are the same curve for a single-curve strip."""
+        return self._problem.make_curves(self._dfs)
+
+    def restrip(self, quotes):
+        """
+        Restrips the curves with new quotes, and returns them as for the curves property.
+
+        Args:
+            quotes: a list with one element for each of the original inputs, in the same order.
+                The element is the new rate of a LiborDeposit or an InterestRateSwap, the new
+                price of a Eurodollar future, the new spread of an OisBasisSwap, or None if
+                the quote has not changed.
+
+        If the curves cannot be stripped, a ValueError is raised and the Restripper keeps the
+        quotes and curves of its last successful strip. It keeps them too if a malformed quote
+        raises some other exception.
+        """
+        if len(quotes) != len(self._positions):
+            raise ValueError("Number of quotes does not match the number of inputs.")
+        inputs = list(self._problem.inputs)
+        for (position, quote) in zip(self._positions, quotes):
+            if quote is not None:
+                inputs[position] = input_with_quote(inputs[position], quote)
+        previous_inputs = self._problem.inputs
+        self._problem.inputs = inputs
+        try:
+            self._dfs = _solve(self._problem, self._method, self._dfs, self._curve_description)
+        except Exception:
+            # Keep the quotes of the last successful strip, which match its curves.
+            self._problem.inputs = previous_inputs
+            raise
+        return self.curves
 
-def strip_libor_and_ois_curves(base_date, inputs):
-    pass
+    def is_compatible(self, inputs):
+        """Whether the inputs have the same structure as the ones the Restripper was created with."""
+        if len(inputs) != len(self._positions):
+            return False
+        return all(_structure(input) == _structure(self._problem.inputs[position])
+                   for (position, input) in zip(self._positions, inputs))
@@ -1,6 +1,30 @@
 from datetime import date, timedelta
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
-from dateutil.rrule import rrule, WEEKLY, WE
+import numpy as np
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def to_ordinals(dates):
+    """
+    Converts dates to a NumPy array of proleptic Gregorian ordinals, as returned by date.toordinal().
+
+    Args:
+        dates: a sequence of dates, a NumPy datetime64 array, or an integer array of ordinals.
+    """
+    array = np.asarray(dates)
+    if array.dtype.kind == 'M':
+        return array.astype('datetime64[D]').astype(np.int64) + _EPOCH_ORDINAL
+    if array.dtype.kind in 'iu':
+        return array.astype(np.int64)
+    return np.array([d.toordinal() for d in array.ravel()], dtype=np.int64).reshape(array.shape)
+
+
+def _months(ordinals):
+    """The number of months since January 1970 of each of the date ordinals."""
+    return (ordinals - _EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
 
 def is_business_day(date):
     """
@@ -8,26 +32,202 @@ def is_business_day(date):
     
     Only returns false for weekends. Public holidays are ignored by this function.
     """
-    pass
+    return date.weekday() < 5
 
 
 def adjust_following(date):
     """Adjust the date according to the "Following" business day convention."""
-    pass
+    while not is_business_day(date):
+        date += timedelta(days=1)
+    return date
 
 
 def adjust_preceding(date):
     """Adjust the date according to the "Preceding" business day convention."""
-    pass
+    while not is_business_day(date):
+        date -= timedelta(days=1)
+    return date
 
 
 def adjust_modified_following(date):
     """Adjust the date according to the "Modified Following" business day convention."""
-    pass
+    following = adjust_following(date)
+    if following.month != date.month:
+        return adjust_preceding(date)
+    return following
 
 
 def add_business_days(start_date, num_days):
-    pass
+    """
+    Adds a non-negative number of business days to a business day.
+
+    Raises a ValueError if the start date is not a business day or the number of days is negative.
+    """
+    if not is_business_day(start_date):
+        raise ValueError("Start date is not a business day.")
+    if num_days < 0:
+        raise ValueError("Number of business days cannot be negative.")
+    result = start_date
+    for _ in range(num_days):
+        result = adjust_following(result + timedelta(days=1))
+    return result
+
+
+class BusinessCalendar:
+    """
+    Represents a calendar of business days: weekdays that are not holidays.
+
+    The business days in a range of dates are precomputed, so that checking and adjusting
+    dates, and adding business days, are lookups. Each operation also has an array version
+    that takes any of the forms accepted by to_ordinals() and returns date ordinals.
+    """
+
+    def __init__(self, holidays=(), start_date=date(1970, 1, 1), end_date=date(2100, 12, 31)):
+        """
+        Creates a BusinessCalendar.
+
+        Args:
+            holidays: an iterable of dates that are not business days, in addition to weekends.
+            start_date: the first date the calendar covers.
+            end_date: the last date the calendar covers.
+        """
+        self._start = start_date.toordinal()
+        ordinals = np.arange(self._start, end_date.toordinal() + 1)
+        # date.fromordinal(1) is a Monday, so (ordinal - 1) % 7 is the weekday.
+        is_business_day = (ordinals - 1) % 7 < 5
+        holiday_indices = np.array([holiday.toordinal() for holiday in holidays], dtype=np.int64) - self._start
+        is_business_day[holiday_indices[(holiday_indices >= 0) & (holiday_indices < len(ordinals))]] = False
+        self._is_business_day = is_business_day
+        self._business_day_indices = np.flatnonzero(is_business_day)
+        # The number of business days up to and including each date.
+        self._cumulative_count = np.cumsum(is_business_day)
+
+    @classmethod
+    def from_holiday_files(cls, paths, start_date=date(1970, 1, 1), end_date=date(2100, 12, 31)):
+        """
+        Creates a BusinessCalendar from the union of the holidays in the files.
+
+        Each file lists one holiday per line as YYYY-MM-DD. Blank lines and lines starting
+        with # are ignored.
+        """
+        holidays = set()
+        for path in paths:
+            with open(path) as holiday_file:
+                for line in holiday_file:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        holidays.add(date.fromisoformat(line))
+        return cls(holidays, start_date, end_date)
+
+    def _indices(self, dates):
+        indices = to_ordinals(dates) - self._start
+        if np.any((indices < 0) | (indices >= len(self._is_business_day))):
+            raise ValueError("Date is outside the range of the business calendar.")
+        return indices
+
+    def _business_day_index(self, positions):
+        """The index of the business day at each position in the list of business days."""
+        if np.any((positions < 0) | (positions >= len(self._business_day_indices))):
+            raise ValueError("Date is outside the range of the business calendar.")
+        return self._business_day_indices[positions]
+
+    def _following_indices(self, indices):
+        return self._business_day_index(self._cumulative_count[indices] - self._is_business_day[indices])
+
+    def _preceding_indices(self, indices):
+        return self._business_day_index(self._cumulative_count[indices] - 1)
+
+    def is_business_day_array(self, dates):
+        return self._is_business_day[self._indices(dates)]
+
+    def adjust_following_array(self, dates):
+        return self._start + self._following_indices(self._indices(dates))
+
+    def adjust_preceding_array(self, dates):
+        return self._start + self._preceding_indices(self._indices(dates))
+
+    def adjust_modified_following_array(self, dates):
+        indices = self._indices(dates)
+        adjusted = self._following_indices(indices)
+        next_month = _months(self._start + adjusted) != _months(self._start + indices)
+        if np.any(next_month):
+            adjusted[next_month] = self._preceding_indices(indices[next_month])
+        return self._start + adjusted
+
+    def add_business_days_array(self, start_dates, num_days):
+        """Adds numbers of business days to business days, as for add_business_days()."""
+        indices = self._indices(start_dates)
+        num_days = np.asarray(num_days)
+        if not np.all(self._is_business_day[indices]):
+            raise ValueError("Start date is not a business day.")
+        if np.any(num_days < 0):
+            raise ValueError("Number of business days cannot be negative.")
+        return self._start + self._business_day_index(self._cumulative_count[indices] - 1 + num_days)
+
+    def _index(self, date):
+        index = date.toordinal() - self._start
+        if index < 0 or index >= len(self._is_business_day):
+            raise ValueError("Date is outside the range of the business calendar.")
+        return index
+
+    def _business_day(self, position):
+        if position < 0 or position >= len(self._business_day_indices):
+            raise ValueError("Date is outside the range of the business calendar.")
+        return date.fromordinal(self._start + int(self._business_day_indices[position]))
+
+    def is_business_day(self, date):
+        """Returns true if the date is a business day, and false otherwise."""
+        return bool(self._is_business_day[self._index(date)])
+
+    def adjust_following(self, date):
+        """Adjust the date according to the "Following" business day convention."""
+        index = self._index(date)
+        if self._is_business_day[index]:
+            return date
+        return self._business_day(self._cumulative_count[index])
+
+    def adjust_preceding(self, date):
+        """Adjust the date according to the "Preceding" business day convention."""
+        index = self._index(date)
+        if self._is_business_day[index]:
+            return date
+        return self._business_day(self._cumulative_count[index] - 1)
+
+    def adjust_modified_following(self, date):
+        """Adjust the date according to the "Modified Following" business day convention."""
+        following = self.adjust_following(date)
+        if following.month != date.month:
+            return self.adjust_preceding(date)
+        return following
+
+    def add_business_days(self, start_date, num_days):
+        """Adds a non-negative number of business days to a business day."""
+        index = self._index(start_date)
+        if not self._is_business_day[index]:
+            raise ValueError("Start date is not a business day.")
+        if num_days < 0:
+            raise ValueError("Number of business days cannot be negative.")
+        return self._business_day(self._cumulative_count[index] - 1 + num_days)
+
+
+"""
+The first and last years of the precomputed table of third Wednesdays. Eurodollar futures
+expiries in these years are looked up, and any others are calculated when needed.
+"""
+IMM_TABLE_START_YEAR = 1950
+IMM_TABLE_END_YEAR = 2150
+
+
+def _third_wednesday_ordinal(year, month):
+    first_day = date(year, month, 1)
+    return first_day.toordinal() + (2 - first_day.weekday()) % 7 + 14
+
+
+# The third Wednesday of each month of the table years, at (year - IMM_TABLE_START_YEAR) * 12 + month - 1.
+_THIRD_WEDNESDAY_ORDINALS = np.array([_third_wednesday_ordinal(year, month)
+                                      for year in range(IMM_TABLE_START_YEAR, IMM_TABLE_END_YEAR + 1)
+                                      for month in range(1, 13)], dtype=np.int64)
+_THIRD_WEDNESDAYS = [date.fromordinal(int(ordinal)) for ordinal in _THIRD_WEDNESDAY_ORDINALS]
 
 
 def third_wednesday(year, month):
@@ -43,35 +243,161 @@ def third_wednesday(year, month):
     Returns:
         The third Wednesday as a date, e.g. date(2020, 3, 18)
     """
-    return rrule(WEEKLY, dtstart=date(year, month, 1), byweekday=WE)[2].date()
+    if IMM_TABLE_START_YEAR <= year <= IMM_TABLE_END_YEAR and 1 <= month <= 12:
+        return _THIRD_WEDNESDAYS[(year - IMM_TABLE_START_YEAR) * 12 + month - 1]
+    return date.fromordinal(_third_wednesday_ordinal(year, month))
 
 
-def add_months_mod_foll(start_date, num_months):
-    """Add the number of months to the date and adjust the result using "Modified Following"."""
-    return adjust_modified_following(start_date + relativedelta(months=num_months))
+def third_wednesday_array(years, months):
+    """
+    Returns the third Wednesdays of many months at once, as for third_wednesday().
 
+    Args:
+        years: the years, as a sequence or NumPy array of integers between
+            IMM_TABLE_START_YEAR and IMM_TABLE_END_YEAR.
+        months: the months, with the same shape as the years.
 
-def date_schedule(start_date, period_in_months, tenor_in_months):
+    Returns:
+        A NumPy array of the third Wednesdays as date ordinals.
+    """
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    if np.any((years < IMM_TABLE_START_YEAR) | (years > IMM_TABLE_END_YEAR) | (months < 1) | (months > 12)):
+        raise ValueError("Third Wednesdays are only tabulated for the months of " + str(IMM_TABLE_START_YEAR)
+                         + " to " + str(IMM_TABLE_END_YEAR) + ".")
+    return _THIRD_WEDNESDAY_ORDINALS[(years - IMM_TABLE_START_YEAR) * 12 + months - 1]
+
+
+def add_months_mod_foll(start_date, num_months, calendar=None):
+    """
+    Add the number of months to the date and adjust the result using "Modified Following".
+
+    The adjustment uses the BusinessCalendar if one is given, and only skips weekends otherwise.
+    """
+    unadjusted = start_date + relativedelta(months=num_months)
+    if calendar is None:
+        return adjust_modified_following(unadjusted)
+    return calendar.adjust_modified_following(unadjusted)
+
+
+def add_months_mod_foll_array(start_dates, num_months, calendar=None):
+    """
+    Adds the number of months to many dates at once, as for add_months_mod_foll().
+
+    Args:
+        start_dates: the dates, in any of the forms accepted by to_ordinals().
+        num_months: the number of months to add.
+        calendar: an optional BusinessCalendar, as for add_months_mod_foll().
+
+    Returns:
+        A NumPy array of the adjusted dates as date ordinals, with the shape of the start dates.
+    """
+    start_days = (to_ordinals(start_dates) - _EPOCH_ORDINAL).astype('datetime64[D]')
+    start_months = start_days.astype('datetime64[M]')
+    months = start_months + num_months
+    day_in_month = (start_days - start_months.astype('datetime64[D]')).astype(np.int64)
+    month_lengths = ((months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')).astype(np.int64)
+    # As with relativedelta, days past the end of a shorter month move back to its last day.
+    unadjusted = (months.astype('datetime64[D]').astype(np.int64) + _EPOCH_ORDINAL
+                  + np.minimum(day_in_month, month_lengths - 1))
+    if calendar is not None:
+        return calendar.adjust_modified_following_array(unadjusted)
+    # Without a calendar only weekends are skipped, so the dates need not be in any calendar's range.
+    weekdays = (unadjusted + 6) % 7
+    adjusted = unadjusted + np.where(weekdays == 5, 2, np.where(weekdays == 6, 1, 0))
+    next_month = _months(adjusted) != _months(unadjusted)
+    return np.where(next_month, unadjusted - np.where(weekdays == 5, 1, 2), adjusted)
+
+
+def _check_schedule(period_in_months, tenor_in_months):
+    if period_in_months not in [1, 3, 6, 12]:
+        raise ValueError("Periods should be monthly, quarterly, semi-annual or annual.")
+    if tenor_in_months % period_in_months != 0:
+        raise ValueError("Tenor (in months) is not a multiple of the period (in months).")
+
+
+"""The maximum number of schedules kept by date_schedule, least recently used first out."""
+SCHEDULE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=SCHEDULE_CACHE_SIZE)
+def _cached_date_schedule(start_date, period_in_months, tenor_in_months, calendar):
+    if not (is_business_day(start_date) if calendar is None else calendar.is_business_day(start_date)):
+        raise ValueError("Start date is not a business day.")
+    _check_schedule(period_in_months, tenor_in_months)
+    date_list = [add_months_mod_foll(start_date, months_ahead, calendar) for months_ahead
+                 in range(0, tenor_in_months + 1, period_in_months)]
+    return tuple(zip(date_list[:-1], date_list[1:]))
+
+
+def date_schedule(start_date, period_in_months, tenor_in_months, calendar=None):
     """
     Creates a schedule of business dates with the given start date, period and length.
 
+    Schedules are cached, since many swaps share the same start dates and tenors.
+
     Args:
         start_date: The start of the first period as a date, e.g. date(2018, 7, 27)
         period_in_months: The number of months in each period, e.g. 3 for a quarterly schedule.
         tenor_in_months: The duration of the schedule as a number of months, e.g. 60 for a 5-year schedule.
+        calendar: An optional BusinessCalendar. Only weekends are holidays if it is not given.
 
     Returns:
         The result is a list of two-element tuples. Each tuple represents a period. The first element of
         the tuple is the start of the period, and the second is the end of the period. The end date of each
         period is the same as the start date of the next one.
     """
-    if not is_business_day(start_date):
+    return list(_cached_date_schedule(start_date, period_in_months, tenor_in_months, calendar))
+
+
+def schedule_cache_info():
+    """Returns the hits, misses, maximum size and current size of the date_schedule cache."""
+    return _cached_date_schedule.cache_info()
+
+
+def clear_schedule_cache():
+    _cached_date_schedule.cache_clear()
+
+
+_weekends_only_calendar = None
+
+
+def _default_calendar():
+    global _weekends_only_calendar
+    if _weekends_only_calendar is None:
+        _weekends_only_calendar = BusinessCalendar()
+    return _weekends_only_calendar
+
+
+def date_schedules(start_dates, period_in_months, tenor_in_months, calendar=None):
+    """
+    Creates the schedules for many start dates at once, with the same period and length.
+
+    Args:
+        start_dates: The start dates, in any of the forms accepted by to_ordinals().
+        period_in_months: The number of months in each period, as for date_schedule().
+        tenor_in_months: The duration of each schedule as a number of months, as for date_schedule().
+        calendar: An optional BusinessCalendar, as for date_schedule().
+
+    Returns:
+        A NumPy array of date ordinals with one row for each start date. Row i holds the dates of
+        date_schedule(start_dates[i], period_in_months, tenor_in_months), i.e. the start date and
+        then the end date of each period.
+    """
+    if calendar is None:
+        calendar = _default_calendar()
+    _check_schedule(period_in_months, tenor_in_months)
+    starts = to_ordinals(start_dates).ravel()
+    if not np.all(calendar.is_business_day_array(starts)):
         raise ValueError("Start date is not a business day.")
-    if period_in_months not in [1, 3, 6, 12]:
-        raise ValueError("Periods should be monthly, quarterly, semi-annual or annual.")
-    if tenor_in_months % period_in_months != 0:
-        raise ValueError("Tenor (in months) is not a multiple of the period (in months).")
-    date_list = [add_months_mod_foll(start_date, months_ahead) for months_ahead
-                 in range(0, tenor_in_months + 1, period_in_months)]
-    return list(zip(date_list[:-1], date_list[1:]))
+    start_days = (starts - _EPOCH_ORDINAL).astype('datetime64[D]')
+    start_months = start_days.astype('datetime64[M]')
+    day_in_month = (start_days - start_months.astype('datetime64[D]')).astype(np.int64)
+    months = start_months[:, np.newaxis] + np.arange(0, tenor_in_months + 1, period_in_months)
+    month_lengths = ((months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')).astype(np.int64)
+    # As with relativedelta, days past the end of a shorter month move back to its last day.
+    unadjusted = (months.astype('datetime64[D]').astype(np.int64) + _EPOCH_ORDINAL
+                  + np.minimum(day_in_month[:, np.newaxis], month_lengths - 1))
+    return calendar.adjust_modified_following_array(unadjusted)
+
 
@@ -1,3 +1,18 @@
+from dates import to_ordinals
+from datetime import date
+import numpy as np
+
+
+def _year_month_day(ordinals):
+    """Splits date ordinals into arrays of years, months and days."""
+    days = (ordinals - date(1970, 1, 1).toordinal()).astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    return (years.astype(np.int64) + 1970,
+            (months - years.astype('datetime64[M]')).astype(np.int64) + 1,
+            (days - months.astype('datetime64[D]')).astype(np.int64) + 1)
+
+
 class Actual360DayCountConvention:
     """Represents the Actual/360 day-count convention."""
 
@@ -5,6 +20,15 @@ class Actual360DayCountConvention:
         """Calculates the year-fraction between the given dates."""
         return (end_date - start_date).days / 360.0
 
+    def yf_array(self, start_dates, end_dates):
+        """
+        Calculates the year-fractions between many pairs of dates at once.
+
+        The dates can be in any of the forms accepted by dates.to_ordinals(), and the result is a
+        NumPy array that agrees exactly with yf() for each pair.
+        """
+        return (to_ordinals(end_dates) - to_ordinals(start_dates)) / 360.0
+
 
 class Actual365DayCountConvention:
     """Represents the Actual/365 Fixed day-count convention."""
@@ -13,6 +37,10 @@ class Actual365DayCountConvention:
         """Calculates the year-fraction between the given dates."""
         return (end_date - start_date).days / 365.0
 
+    def yf_array(self, start_dates, end_dates):
+        """Calculates the year-fractions between many pairs of dates at once, as for Actual/360."""
+        return (to_ordinals(end_dates) - to_ordinals(start_dates)) / 365.0
+
 
 class Thirty360DayCountConvention:
     """Represents the 30/360 Bonds Basis day-count convention."""
@@ -26,6 +54,14 @@ class Thirty360DayCountConvention:
             d2 = min(d2, 30)
         return (360.0*(y2 - y1) + 30.0*(m2 - m1) + (d2 - d1)) / 360.0
 
+    def yf_array(self, start_dates, end_dates):
+        """Calculates the year-fractions between many pairs of dates at once, as for Actual/360."""
+        (y1, m1, d1) = _year_month_day(to_ordinals(start_dates))
+        (y2, m2, d2) = _year_month_day(to_ordinals(end_dates))
+        d1 = np.minimum(d1, 30)
+        d2 = np.where(d1 == 30, np.minimum(d2, 30), d2)
+        return (360.0*(y2 - y1) + 30.0*(m2 - m1) + (d2 - d1)) / 360.0
+
 
 """Variable representing the Actual/360 day-count convention."""
 actual_360 = Actual360DayCountConvention()
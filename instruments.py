@@ -1,11 +1,15 @@
-from dates import third_wednesday, add_months_mod_foll, date_schedule
-from daycountconvention import actual_360, thirty_360
+from dates import third_wednesday, third_wednesday_array, add_months_mod_foll, add_months_mod_foll_array, date_schedule
+from copy import copy
+from datetime import date
+from daycountconvention import actual_360, actual_365, thirty_360
+import numpy as np
 
 class LiborDeposit:
     """Represents Libor deposits."""
 
     def __init__(self, notional, start_date, tenor_in_months, rate):
         """Creates a Libor deposit."""
+        self.rate = rate
         self.start_date = start_date
         self.flow_on_start_date = -notional
         self.end_date = add_months_mod_foll(start_date, tenor_in_months)
@@ -16,6 +20,35 @@ class LiborDeposit:
         return (self.flow_on_start_date * libor_curve.df(self.start_date)
                 + self.flow_on_end_date * libor_curve.df(self.end_date))
 
+    def node_sensitivities(self, libor_curve, ois_curve):
+        """
+        The sensitivities of the value to the node discount factors of the curves.
+
+        Returns:
+            A tuple of two NumPy arrays, with the derivatives of the value with respect to
+            each Libor curve node DF and each OIS curve node DF respectively.
+        """
+        libor_sensitivities = libor_curve.df_adjoint([self.start_date, self.end_date],
+                                                     np.array([self.flow_on_start_date, self.flow_on_end_date]))
+        return libor_sensitivities, np.zeros(len(ois_curve.dates))
+
+    @property
+    def quote(self):
+        """The market quote of the deposit, which is its rate."""
+        return self.rate
+
+    def quote_sensitivity(self, libor_curve, ois_curve):
+        """The sensitivity of the value to the rate."""
+        return -self.flow_on_start_date * actual_360.yf(self.start_date, self.end_date) * libor_curve.df(self.end_date)
+
+    def with_quote(self, rate):
+        """Returns a copy of the deposit with a different rate, without rebuilding its dates."""
+        deposit = copy(self)
+        deposit.rate = rate
+        year_fraction = actual_360.yf(self.start_date, self.end_date)
+        deposit.flow_on_end_date = -self.flow_on_start_date * (1.0 + rate * year_fraction)
+        return deposit
+
 
 class EurodollarFuture:
     """"Represents a Eurodollar futures contract."""
@@ -32,36 +65,232 @@ class EurodollarFuture:
             third Wednesday of the expiry month. (The last trading day is two business
             days before that.)
         """
-        pass
+        self.start_date = third_wednesday(year, month)
+        self.end_date = add_months_mod_foll(self.start_date, 3)
 
     def price(self, libor_curve):
         """Returns the fair futures price, with no convexity adjustment."""
-        pass
+        return 100.0 * (1.0 - libor_curve.forward(self.start_date, self.end_date, actual_360))
+
+    def price_sensitivities(self, libor_curve):
+        """The sensitivities of the fair price to the Libor curve node DFs, as a NumPy array."""
+        dates = [self.start_date, self.end_date]
+        (start_df, end_df) = libor_curve.df_array(dates)
+        scale = -100.0 / actual_360.yf(self.start_date, self.end_date)
+        return libor_curve.df_adjoint(dates, np.array([scale / end_df, -scale * start_df / end_df**2]))
+
+    def value(self, libor_curve, ois_curve):
+        """
+        The value of one long contract in price points, which is its fair price. Futures are
+        margined daily, so there is no discounting. This lets a futures position be a trade in
+        risk.quote_sensitivities(), with the number of contracts times the value of a point as
+        its weight.
+        """
+        return self.price(libor_curve)
+
+    def node_sensitivities(self, libor_curve, ois_curve):
+        """
+        The sensitivities of value() to the node discount factors of the curves.
+
+        Returns:
+            A tuple of two NumPy arrays, with the derivatives of the value with respect to
+            each Libor curve node DF and each OIS curve node DF respectively.
+        """
+        return self.price_sensitivities(libor_curve), np.zeros(len(ois_curve.dates))
+
+
+class EurodollarFutureStrip:
+    """
+    A sequence of Eurodollar futures contracts, held as NumPy arrays so that they can all be
+    priced against a curve at once.
+    """
+
+    def __init__(self, futures):
+        """
+        Creates a EurodollarFutureStrip.
+
+        Args:
+            futures: a list of EurodollarFutures, in any order.
+        """
+        self._futures = list(futures)
+        self.start_dates = np.array([future.start_date.toordinal() for future in self._futures], dtype=np.int64)
+        self.end_dates = np.array([future.end_date.toordinal() for future in self._futures], dtype=np.int64)
+
+    @classmethod
+    def from_expiries(cls, years, months):
+        """
+        Creates a EurodollarFutureStrip from the expiry months of its contracts, without creating
+        a EurodollarFuture for each. The dates are those of EurodollarFuture(year, month).
+
+        Args:
+            years: the expiry years, as a sequence or NumPy array of integers between
+                IMM_TABLE_START_YEAR and IMM_TABLE_END_YEAR.
+            months: the expiry months, with the same shape as the years.
+        """
+        strip = cls([])
+        strip._futures = None
+        strip.start_dates = third_wednesday_array(years, months).ravel()
+        strip.end_dates = add_months_mod_foll_array(strip.start_dates, 3)
+        return strip
+
+    @property
+    def futures(self):
+        """The EurodollarFutures of the strip, in its order."""
+        if self._futures is None:
+            self._futures = [EurodollarFuture(start_date.year, start_date.month)
+                             for start_date in map(date.fromordinal, self.start_dates.tolist())]
+        return self._futures
+
+    def __len__(self):
+        return len(self.start_dates)
+
+    def convexity_adjustments(self, base_date, volatility):
+        """
+        Returns the amounts by which the futures rates exceed the forward rates, as a NumPy array.
+
+        The adjustments are those of the Ho-Lee model, volatility^2 * t1 * t2 / 2, where t1 and
+        t2 are the Actual/365 times from the base date to the start and end of each contract.
+
+        Args:
+            base_date: the base date of the curve.
+            volatility: the annual normal volatility of the short rate, e.g. 0.01 for 100bp.
+        """
+        base_ordinal = base_date.toordinal()
+        return (0.5 * volatility**2 * actual_365.yf_array(base_ordinal, self.start_dates)
+                * actual_365.yf_array(base_ordinal, self.end_dates))
+
+    def prices(self, libor_curve, convexity_volatility=None):
+        """
+        Returns the fair futures prices, as a NumPy array in the order of the futures.
+
+        Args:
+            libor_curve: the Libor curve.
+            convexity_volatility: optionally, the volatility for a convexity adjustment, as for
+                convexity_adjustments(). By default there is no adjustment, and the prices agree
+                with EurodollarFuture.price().
+        """
+        rates = libor_curve.forward_array(self.start_dates, self.end_dates, actual_360)
+        if convexity_volatility is not None:
+            rates = rates + self.convexity_adjustments(libor_curve.base_date, convexity_volatility)
+        return 100.0 * (1.0 - rates)
+
+
+"""
+The packed layout of a swap leg: one record for each accrual period, with the dates as
+ordinals, as returned by date.toordinal(). A fixed leg's notional year-fractions and amounts
+have the sign of the fixed leg's notional, and a floating leg's multiples are the notional
+times the year-fraction.
+"""
+_FIXED_LEG = np.dtype([("start_date", np.int64), ("end_date", np.int64),
+                       ("notional_year_fraction", float), ("amount", float)])
+_FLOATING_LEG = np.dtype([("start_date", np.int64), ("end_date", np.int64), ("multiple", float)])
+
+
+def _leg(dtype, notional, schedule, dcc):
+    leg = np.empty(len(schedule), dtype=dtype)
+    leg["start_date"] = [start_date.toordinal() for (start_date, _) in schedule]
+    leg["end_date"] = [end_date.toordinal() for (_, end_date) in schedule]
+    leg[dtype.names[2]] = notional * dcc.yf_array(leg["start_date"], leg["end_date"])
+    return leg
+
+
+def _fixed_leg(notional, fixed_rate, schedule, dcc):
+    leg = _leg(_FIXED_LEG, notional, schedule, dcc)
+    leg["amount"] = leg["notional_year_fraction"] * fixed_rate
+    return leg
+
+
+def _with_fixed_rate(fixed_leg, fixed_rate):
+    leg = fixed_leg.copy()
+    leg["amount"] = leg["notional_year_fraction"] * fixed_rate
+    return leg
+
+
+def _floating_leg_value(leg, spread, forward_curve, ois_curve, dcc):
+    forwards = forward_curve.forward_array(leg["start_date"], leg["end_date"], dcc)
+    return float(np.dot(leg["multiple"] * (forwards + spread), ois_curve.df_array(leg["end_date"])))
+
+
+def _fixed_leg_sensitivities(leg, ois_curve):
+    """The sensitivities of a fixed leg's value to the OIS curve node DFs."""
+    return ois_curve.df_adjoint(leg["end_date"], leg["amount"])
+
+
+def _floating_leg_sensitivities(leg, notional, spread, forward_curve, ois_curve):
+    """
+    The sensitivities of a floating leg's value to the node DFs of the forward curve and of
+    the OIS curve, which may be the same curve.
+    """
+    # multiple * forward is notional * (start DF / end DF - 1), on the forward curve.
+    start_dfs = forward_curve.df_array(leg["start_date"])
+    end_dfs = forward_curve.df_array(leg["end_date"])
+    ois_dfs = ois_curve.df_array(leg["end_date"])
+    # A reverse pass: the adjoint of each DF is the derivative of the leg's value with respect to it.
+    forward_sensitivities = (forward_curve.df_adjoint(leg["start_date"], notional * ois_dfs / end_dfs)
+                             + forward_curve.df_adjoint(leg["end_date"], -notional * ois_dfs * start_dfs / end_dfs**2))
+    ois_sensitivities = ois_curve.df_adjoint(leg["end_date"],
+                                             notional * (start_dfs / end_dfs - 1.0) + leg["multiple"] * spread)
+    return forward_sensitivities, ois_sensitivities
+
+
+def _dates(ordinals):
+    return [date.fromordinal(ordinal) for ordinal in ordinals.tolist()]
 
 
 class _FixedFlow:
     """ Represents a fixed interest flow on a swap. Not meant to be used by itself."""
 
+    __slots__ = ("notional_year_fraction", "amount", "end_date")
+
     def __init__(self, notional, fixed_rate, start_date, end_date, dcc):
-        self.amount = notional * fixed_rate * dcc.yf(start_date, end_date)
+        self.notional_year_fraction = notional * dcc.yf(start_date, end_date)
+        self.amount = self.notional_year_fraction * fixed_rate
         self.end_date = end_date
 
     def value(self, libor_curve, ois_curve):
         return self.amount * ois_curve.df(self.end_date)
 
+    def node_sensitivities(self, libor_curve, ois_curve):
+        return np.zeros(len(libor_curve.dates)), self.amount * ois_curve.df_gradient(self.end_date)
+
 
 class _LiborFlow:
     """ Represents a Libor interest flow on a swap. Not meant to be used by itself."""
 
+    __slots__ = ("notional", "multiple", "start_date", "end_date", "dcc")
+
     def __init__(self, notional, start_date, end_date, dcc):
-        pass
-    
+        self.notional = notional
+        self.multiple = notional * dcc.yf(start_date, end_date)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.dcc = dcc
+
     def value(self, libor_curve, ois_curve):
-        pass
+        forward = libor_curve.forward(self.start_date, self.end_date, self.dcc)
+        return self.multiple * forward * ois_curve.df(self.end_date)
+
+    def node_sensitivities(self, libor_curve, ois_curve):
+        # multiple * forward is notional * (start DF / end DF - 1), on the Libor curve.
+        start_df = libor_curve.df(self.start_date)
+        end_df = libor_curve.df(self.end_date)
+        ois_df = ois_curve.df(self.end_date)
+        libor_sensitivities = self.notional * ois_df * (libor_curve.df_gradient(self.start_date) / end_df
+                                                        - start_df * libor_curve.df_gradient(self.end_date) / end_df**2)
+        ois_sensitivities = self.notional * (start_df / end_df - 1.0) * ois_curve.df_gradient(self.end_date)
+        return libor_sensitivities, ois_sensitivities
 
 
 class InterestRateSwap:
-    """Represents a standard USD interest rate swap."""
+    """
+    Represents a standard USD interest rate swap.
+
+    The legs are held as packed NumPy record arrays rather than lists of flow objects, to keep
+    large portfolios of swaps small. The fixed_flows and libor_flows properties give flow
+    objects for the legs when they are needed.
+    """
+
+    __slots__ = ("notional", "fixed_rate", "fixed_leg", "libor_leg", "end_date")
 
     def __init__(self, notional, swap_start_date, tenor_in_months, fixed_rate):
         """
@@ -79,22 +308,69 @@ class InterestRateSwap:
             An InterestRateSwap. The fixed flows are semi-annual and use the 30/360 day-count
             convention. The Libor flows are quarterly.
         """
-        self.fixed_flows = [_FixedFlow(-notional, fixed_rate, start_date, end_date, thirty_360)
-                            for (start_date, end_date) in date_schedule(swap_start_date, 6, tenor_in_months)]
-        self.libor_flows = [_LiborFlow(notional, start_date, end_date, actual_360)
-                            for (start_date, end_date) in date_schedule(swap_start_date, 3, tenor_in_months)]
-        self.end_date = self.libor_flows[-1].end_date # Should be the same as the end date of the last fixed period.
+        self.notional = notional
+        self.fixed_rate = fixed_rate
+        self.fixed_leg = _fixed_leg(-notional, fixed_rate, date_schedule(swap_start_date, 6, tenor_in_months),
+                                    thirty_360)
+        libor_schedule = date_schedule(swap_start_date, 3, tenor_in_months)
+        self.libor_leg = _leg(_FLOATING_LEG, notional, libor_schedule, actual_360)
+        self.end_date = libor_schedule[-1][1] # Should be the same as the end date of the last fixed period.
+
+    @property
+    def fixed_flows(self):
+        """The fixed flows, as a list of flow objects."""
+        return [_FixedFlow(-self.notional, self.fixed_rate, start_date, end_date, thirty_360)
+                for (start_date, end_date) in zip(_dates(self.fixed_leg["start_date"]),
+                                                  _dates(self.fixed_leg["end_date"]))]
+
+    @property
+    def libor_flows(self):
+        """The Libor flows, as a list of flow objects."""
+        return [_LiborFlow(self.notional, start_date, end_date, actual_360)
+                for (start_date, end_date) in zip(_dates(self.libor_leg["start_date"]),
+                                                  _dates(self.libor_leg["end_date"]))]
 
     def value(self, libor_curve, ois_curve):
         """The value of the swap."""
-        return (sum([fixed_flow.value(libor_curve, ois_curve) for fixed_flow in self.fixed_flows])
-                + sum([libor_flow.value(libor_curve, ois_curve) for libor_flow in self.libor_flows]))
+        fixed_value = float(np.dot(self.fixed_leg["amount"], ois_curve.df_array(self.fixed_leg["end_date"])))
+        return fixed_value + _floating_leg_value(self.libor_leg, 0.0, libor_curve, ois_curve, actual_360)
+
+    def node_sensitivities(self, libor_curve, ois_curve):
+        """
+        The sensitivities of the value to the node discount factors of the curves.
+
+        Returns:
+            A tuple of two NumPy arrays, with the derivatives of the value with respect to
+            each Libor curve node DF and each OIS curve node DF respectively.
+        """
+        (libor_sensitivities, ois_sensitivities) = _floating_leg_sensitivities(
+            self.libor_leg, self.notional, 0.0, libor_curve, ois_curve)
+        return libor_sensitivities, ois_sensitivities + _fixed_leg_sensitivities(self.fixed_leg, ois_curve)
+
+    @property
+    def quote(self):
+        """The market quote of the swap, which is its fixed rate."""
+        return self.fixed_rate
+
+    def quote_sensitivity(self, libor_curve, ois_curve):
+        """The sensitivity of the value to the fixed rate."""
+        return float(np.dot(self.fixed_leg["notional_year_fraction"], ois_curve.df_array(self.fixed_leg["end_date"])))
+
+    def with_quote(self, fixed_rate):
+        """Returns a copy of the swap with a different fixed rate, sharing its Libor leg."""
+        swap = copy(self)
+        swap.fixed_rate = fixed_rate
+        swap.fixed_leg = _with_fixed_rate(self.fixed_leg, fixed_rate)
+        return swap
 
 
 class _OisFlow:
     """ Represents an OIS-based interest flow on a swap. Not meant to be used by itself."""
 
+    __slots__ = ("notional", "multiple", "spread", "start_date", "end_date", "dcc")
+
     def __init__(self, notional, spread, start_date, end_date, dcc):
+        self.notional = notional
         self.multiple = notional * dcc.yf(start_date, end_date)
         self.spread = spread
         self.start_date = start_date
@@ -105,6 +381,89 @@ class _OisFlow:
         forward = ois_curve.forward(self.start_date, self.end_date, self.dcc)
         return self.multiple * (forward + self.spread) * ois_curve.df(self.end_date)
 
+    def node_sensitivities(self, libor_curve, ois_curve):
+        # multiple * forward * end DF is notional * (start DF - end DF), on the OIS curve.
+        ois_sensitivities = (self.notional * (ois_curve.df_gradient(self.start_date) - ois_curve.df_gradient(self.end_date))
+                             + self.multiple * self.spread * ois_curve.df_gradient(self.end_date))
+        return np.zeros(len(libor_curve.dates)), ois_sensitivities
+
 
 class OisBasisSwap:
-    pass
+    """
+    Represents a USD Libor-OIS basis swap.
+
+    The legs are packed NumPy record arrays, as for InterestRateSwap. The OIS leg's spread is
+    the same for every period, so it is held once, as ois_leg_spread.
+    """
+
+    __slots__ = ("notional", "ois_leg_spread", "libor_leg", "ois_leg", "end_date")
+
+    def __init__(self, notional, swap_start_date, tenor_in_months, ois_leg_spread):
+        """
+        Creates a Libor-OIS basis swap.
+
+        Args:
+            notional: the notional of the swap. Positive for receiving Libor and paying OIS
+                plus the spread, and negative for the reverse.
+            swap_start_date: the effective date of the swap.
+            tenor_in_months: the length of the swap, e.g. 60 for a 5-year swap.
+            ois_leg_spread: the spread over the OIS rate paid on the OIS leg.
+
+        Returns:
+            An OisBasisSwap. Both legs are quarterly and use the Actual/360 day-count convention.
+        """
+        self.notional = notional
+        self.ois_leg_spread = ois_leg_spread
+        schedule = date_schedule(swap_start_date, 3, tenor_in_months)
+        self.libor_leg = _leg(_FLOATING_LEG, notional, schedule, actual_360)
+        self.ois_leg = _leg(_FLOATING_LEG, -notional, schedule, actual_360)
+        self.end_date = schedule[-1][1]
+
+    @property
+    def libor_flows(self):
+        """The Libor flows, as a list of flow objects."""
+        return [_LiborFlow(self.notional, start_date, end_date, actual_360)
+                for (start_date, end_date) in zip(_dates(self.libor_leg["start_date"]),
+                                                  _dates(self.libor_leg["end_date"]))]
+
+    @property
+    def ois_flows(self):
+        """The OIS flows, as a list of flow objects."""
+        return [_OisFlow(-self.notional, self.ois_leg_spread, start_date, end_date, actual_360)
+                for (start_date, end_date) in zip(_dates(self.ois_leg["start_date"]),
+                                                  _dates(self.ois_leg["end_date"]))]
+
+    def value(self, libor_curve, ois_curve):
+        """The value of the swap."""
+        return (_floating_leg_value(self.libor_leg, 0.0, libor_curve, ois_curve, actual_360)
+                + _floating_leg_value(self.ois_leg, self.ois_leg_spread, ois_curve, ois_curve, actual_360))
+
+    def node_sensitivities(self, libor_curve, ois_curve):
+        """
+        The sensitivities of the value to the node discount factors of the curves.
+
+        Returns:
+            A tuple of two NumPy arrays, with the derivatives of the value with respect to
+            each Libor curve node DF and each OIS curve node DF respectively.
+        """
+        (libor_sensitivities, ois_sensitivities) = _floating_leg_sensitivities(
+            self.libor_leg, self.notional, 0.0, libor_curve, ois_curve)
+        # The OIS leg's forwards and discounting are both on the OIS curve.
+        (ois_forward_sensitivities, ois_discount_sensitivities) = _floating_leg_sensitivities(
+            self.ois_leg, -self.notional, self.ois_leg_spread, ois_curve, ois_curve)
+        return libor_sensitivities, ois_sensitivities + ois_forward_sensitivities + ois_discount_sensitivities
+
+    @property
+    def quote(self):
+        """The market quote of the swap, which is its OIS leg spread."""
+        return self.ois_leg_spread
+
+    def quote_sensitivity(self, libor_curve, ois_curve):
+        """The sensitivity of the value to the OIS leg spread."""
+        return float(np.dot(self.ois_leg["multiple"], ois_curve.df_array(self.ois_leg["end_date"])))
+
+    def with_quote(self, ois_leg_spread):
+        """Returns a copy of the swap with a different OIS leg spread, sharing its legs."""
+        swap = copy(self)
+        swap.ois_leg_spread = ois_leg_spread
+        return swap
@@ -1,17 +1,22 @@
 from daycountconvention import actual_365
+from dates import to_ordinals
+from interpolation import LogLinearInterpolator
 from math import exp, log
-from scipy.interpolate import interp1d
+import metrics
+import numpy as np
+
 
 class InterestRateCurve(object):
     """
     Represents an interest rate curve.
 
-    The interpolation is linear in log discount factors, i.e. piecewise-constant
+    By default the interpolation is linear in log discount factors, i.e. piecewise-constant
     forwards, with Actual/365 year-fractions. Linear extrapolation is used after
-    the last node, so that the final piecewise constant segment is extended.
+    the last node, so that the final piecewise constant segment is extended. Other
+    schemes from the interpolation module can be chosen instead.
     """
 
-    def __init__(self, base_date, dates, dfs):
+    def __init__(self, base_date, dates, dfs, interpolation=LogLinearInterpolator):
         """
         Creates an InterestRateCurve.
 
@@ -20,7 +25,11 @@ class InterestRateCurve(object):
                 e.g. date(2018, 7, 27)
             dates: a list of dates, in order, e.g. [date(2018, 10, 27), date(2019, 7, 27)].
             dfs: a list of discount factors, one for each date, e.g. [0.99, 0.98]
+            interpolation: the interpolation scheme, e.g. interpolation.MonotoneConvexInterpolator.
         """
+        report = metrics.active_report()
+        if report is not None:
+            report.count("curve_constructions")
         if len(dates) != len(dfs):
             raise ValueError("Curve cannot be created: dates and DFs are different lengths.")
         if sorted(dates) != dates:
@@ -28,11 +37,12 @@ class InterestRateCurve(object):
         self._base_date = base_date
         self._dates = dates
         self._dfs = dfs
+        self._interpolation = interpolation
         yfs = [actual_365.yf(base_date, date) for date in dates]
         log_dfs = [log(df) for df in dfs]
         yfs.insert(0, 0.0)
         log_dfs.insert(0, 0.0)
-        self._log_df = interp1d(yfs, log_dfs, fill_value="extrapolate")
+        self._interpolator = interpolation(yfs, log_dfs)
 
     @property
     def base_date(self):
@@ -46,12 +56,152 @@ class InterestRateCurve(object):
     def dfs(self):
         return self._dfs
 
+    @property
+    def interpolation(self):
+        return self._interpolation
+
     def df(self, date):
         """Calculate the discount factor for the date."""
+        report = metrics.active_report()
+        if report is not None:
+            report.count("df_calls")
         if date < self._base_date:
             raise ValueError("Cannot get DF for date before base date.")
-        return exp(self._log_df(actual_365.yf(self._base_date, date))[()])
+        return exp(self._interpolator.log_df(actual_365.yf(self._base_date, date)))
 
     def forward(self, start_date, end_date, dcc):
         """Calculate the simple forward rate over the period, with the day-count convention."""
         return (self.df(start_date) / self.df(end_date) - 1.0) / dcc.yf(start_date, end_date)
+
+    def df_gradient(self, date):
+        """
+        Calculate the sensitivity of the discount factor for the date to each node discount factor.
+
+        Returns:
+            A NumPy array with one element for each of the curve's dates, where element i is
+            the derivative of df(date) with respect to dfs[i].
+        """
+        yf = actual_365.yf(self._base_date, date)
+        if yf < 0.0:
+            raise ValueError("Cannot get DF gradient for date before base date.")
+        return self.df(date) * self._interpolator.log_df_gradient(yf) / np.asarray(self._dfs)
+
+    def df_gradient_array(self, dates):
+        """
+        Calculate the sensitivities of the discount factors for many dates to each node discount factor.
+
+        Args:
+            dates: the dates, in any of the forms accepted by df_array().
+
+        Returns:
+            A NumPy matrix with one row for each date, where row i agrees with df_gradient() for date i.
+        """
+        yfs = actual_365.yf_array(self._base_date.toordinal(), dates)
+        if np.any(yfs < 0.0):
+            raise ValueError("Cannot get DF gradient for date before base date.")
+        dfs = np.exp(self._interpolator.log_df_array(yfs))
+        return dfs[:, np.newaxis] * self._interpolator.log_df_gradient_array(yfs) / np.asarray(self._dfs)
+
+    def df_adjoint(self, dates, adjoints):
+        """
+        Calculate the sensitivities of a weighted sum of discount factors to each node discount factor.
+
+        This is the reverse-mode counterpart of df_gradient_array(): the cost grows with the
+        number of dates plus the number of nodes, rather than with their product.
+
+        Args:
+            dates: the dates, in any of the forms accepted by df_array().
+            adjoints: a NumPy array of weights, one for each date.
+
+        Returns:
+            A NumPy array with one element for each of the curve's dates, where element i is
+            the derivative of sum(adjoints * df_array(dates)) with respect to dfs[i].
+        """
+        yfs = actual_365.yf_array(self._base_date.toordinal(), dates)
+        if np.any(yfs < 0.0):
+            raise ValueError("Cannot get DF adjoint for date before base date.")
+        dfs = np.exp(self._interpolator.log_df_array(yfs))
+        return self._interpolator.log_df_adjoint(yfs, adjoints * dfs) / np.asarray(self._dfs)
+
+    def df_array(self, dates):
+        """
+        Calculate the discount factors for many dates at once.
+
+        Args:
+            dates: a sequence of dates, a NumPy datetime64 array, or an integer array of
+                date ordinals.
+
+        Returns:
+            A NumPy array of discount factors with the same shape as the dates, which
+            agree with df() for each date.
+        """
+        report = metrics.active_report()
+        if report is not None:
+            report.count("df_array_calls")
+        yfs = actual_365.yf_array(self._base_date.toordinal(), dates)
+        if np.any(yfs < 0.0):
+            raise ValueError("Cannot get DF for date before base date.")
+        return np.exp(self._interpolator.log_df_array(yfs))
+
+    def forward_array(self, start_dates, end_dates, dcc):
+        """
+        Calculate the simple forward rates over many periods at once, with the day-count convention.
+
+        The start and end dates can be given in any of the forms accepted by df_array().
+        """
+        start_ordinals = to_ordinals(start_dates)
+        end_ordinals = to_ordinals(end_dates)
+        return ((self.df_array(start_ordinals) / self.df_array(end_ordinals) - 1.0)
+                / dcc.yf_array(start_ordinals, end_ordinals))
+
+
+class MutableInterestRateCurve(InterestRateCurve):
+    """
+    An interest rate curve whose node dates are fixed but whose DFs can be changed in place.
+
+    It gives the same numbers as an InterestRateCurve with the same DFs, but the node
+    year-fractions, and the parts of the interpolation that depend only on them, are only
+    computed once. The strippers use it in their inner loops, and return InterestRateCurves.
+    """
+
+    def __init__(self, base_date, dates, dfs=None, interpolation=LogLinearInterpolator):
+        """
+        Creates a MutableInterestRateCurve.
+
+        Args:
+            base_date: the date on which the curve applies, as for InterestRateCurve.
+            dates: a list of dates, in order, as for InterestRateCurve.
+            dfs: an optional list of discount factors, one for each date. They are all 1 if not given.
+            interpolation: the interpolation scheme, as for InterestRateCurve.
+        """
+        report = metrics.active_report()
+        if report is not None:
+            report.count("curve_constructions")
+        if dfs is None:
+            dfs = [1.0] * len(dates)
+        if len(dates) != len(dfs):
+            raise ValueError("Curve cannot be created: dates and DFs are different lengths.")
+        if sorted(dates) != dates:
+            raise ValueError("Curve dates are not in order.")
+        self._base_date = base_date
+        self._dates = dates
+        self._interpolation = interpolation
+        self._node_yfs = np.array([0.0] + [actual_365.yf(base_date, date) for date in dates])
+        self._dfs = np.empty(len(dates))
+        self._log_dfs = np.zeros(len(dates) + 1)
+        self._interpolator = interpolation(self._node_yfs, self._log_dfs)
+        self.set_dfs(dfs)
+
+    def set_dfs(self, dfs):
+        """Changes the DFs at the node dates, updating the interpolation in place."""
+        self._dfs[:] = dfs
+        np.log(self._dfs, out=self._log_dfs[1:])
+        self._interpolator.set_log_dfs(self._log_dfs)
+
+    @property
+    def dfs(self):
+        return self._dfs.tolist()
+
+    def to_curve(self):
+        """Returns an immutable InterestRateCurve with the current DFs."""
+        return InterestRateCurve(self._base_date, self._dates, self.dfs, self._interpolation)
@@ -0,0 +1,388 @@
+"""
+Interpolation schemes for interest rate curves.
+
+Each scheme is a class that is created from the node year-fractions and log discount
+factors of a curve, including the base node with year-fraction 0 and log DF 0. It
+precomputes what depends only on the year-fractions once, and the coefficients that
+depend on the log DFs whenever they are set. It provides:
+
+    set_log_dfs(log_dfs): changes the node log DFs in place, refreshing only the
+        coefficients that depend on them.
+    log_df(yf): the interpolated log DF at a year-fraction.
+    log_df_array(yfs): the same for a NumPy array of year-fractions.
+    log_df_gradient(yf): a NumPy array of the derivatives of log_df(yf) with respect to
+        each node log DF, excluding the base node.
+    log_df_gradient_array(yfs): the same for a NumPy array of year-fractions, as a matrix
+        with one row for each year-fraction.
+    log_df_adjoint(yfs, adjoints): the gradient of sum(adjoints * log_df_array(yfs)) with
+        respect to each node log DF, excluding the base node. This is the reverse-mode
+        pass, which is adjoints @ log_df_gradient_array(yfs) without forming the matrix.
+
+Year-fractions after the last node are extrapolated.
+"""
+
+from bisect import bisect_left
+import numpy as np
+
+
+class _Interpolator:
+    """
+    Shared behaviour of the interpolation schemes. Not meant to be used by itself.
+
+    A scheme other than log-linear describes its node derivatives through _gradient_terms(),
+    from which the gradients and adjoints are all found with vectorized operations.
+    """
+
+    def __init__(self, node_yfs, node_log_dfs):
+        self._yfs = np.array(node_yfs, dtype=float)
+        self._num_segments = len(self._yfs) - 1
+        self._log_dfs = np.zeros(len(self._yfs))
+        self._prepare()
+        self.set_log_dfs(node_log_dfs)
+
+    def _prepare(self):
+        """Precomputes what depends only on the node year-fractions."""
+
+    def set_log_dfs(self, node_log_dfs):
+        """Changes the node log DFs, including the base node's, in place."""
+        self._log_dfs[:] = node_log_dfs
+
+    def _segments(self, yfs):
+        """The index of the node at the end of the segment containing each year-fraction."""
+        # np.minimum and np.maximum are much quicker than np.clip on small arrays.
+        return np.minimum(np.maximum(np.searchsorted(self._yfs, yfs), 1), self._num_segments)
+
+    def _gradient_terms(self, yfs):
+        """
+        The derivatives of log_df_array(yfs) with respect to every node log DF, including the
+        base node's, as two lists of terms that add up to the gradient matrix:
+            (nodes, weights): weights[i] at column nodes[i] of row i.
+            (matrix, rows, coefficients): coefficients[i] * matrix[rows[i]] in row i, where
+                the matrix holds the weights of the node log DFs in a precomputed coefficient.
+        """
+        raise NotImplementedError
+
+    def log_df(self, yf):
+        return float(self.log_df_array(np.array([yf]))[0])
+
+    def log_df_gradient(self, yf):
+        return self.log_df_gradient_array(np.array([float(yf)]))[0]
+
+    def log_df_gradient_array(self, yfs):
+        yfs = np.asarray(yfs, dtype=float)
+        (node_terms, matrix_terms) = self._gradient_terms(yfs)
+        gradients = np.zeros((len(yfs), len(self._yfs)))
+        rows = np.arange(len(yfs))
+        for (nodes, weights) in node_terms:
+            gradients[rows, nodes] += weights
+        for (matrix, matrix_rows, coefficients) in matrix_terms:
+            gradients += coefficients[:, np.newaxis] * matrix[matrix_rows]
+        return gradients[:, 1:]
+
+    def log_df_adjoint(self, yfs, adjoints):
+        yfs = np.asarray(yfs, dtype=float)
+        adjoints = np.asarray(adjoints, dtype=float)
+        (node_terms, matrix_terms) = self._gradient_terms(yfs)
+        num_nodes = len(self._yfs)
+        adjoint = np.zeros(num_nodes)
+        for (nodes, weights) in node_terms:
+            adjoint += np.bincount(nodes, weights=adjoints * weights, minlength=num_nodes)
+        for (matrix, matrix_rows, coefficients) in matrix_terms:
+            adjoint += np.bincount(matrix_rows, weights=adjoints * coefficients, minlength=num_nodes) @ matrix
+        return adjoint[1:]
+
+
+class LogLinearInterpolator(_Interpolator):
+    """
+    Linear interpolation in log DFs, i.e. piecewise-constant forwards. The last segment is
+    extended after the last node.
+    """
+
+    def _prepare(self):
+        self._yf_list = self._yfs.tolist()
+
+    def set_log_dfs(self, node_log_dfs):
+        super().set_log_dfs(node_log_dfs)
+        self._log_df_list = self._log_dfs.tolist()
+
+    def log_df(self, yf):
+        # The same segment and arithmetic as scipy's linear interp1d.
+        yfs = self._yf_list
+        high = min(max(bisect_left(yfs, yf), 1), self._num_segments)
+        (low_yf, high_yf) = (yfs[high - 1], yfs[high])
+        (low_log_df, high_log_df) = (self._log_df_list[high - 1], self._log_df_list[high])
+        return (high_log_df - low_log_df) / (high_yf - low_yf) * (yf - low_yf) + low_log_df
+
+    def log_df_array(self, yfs):
+        high = self._segments(yfs)
+        (low_yfs, high_yfs) = (self._yfs[high - 1], self._yfs[high])
+        (low_log_dfs, high_log_dfs) = (self._log_dfs[high - 1], self._log_dfs[high])
+        return (high_log_dfs - low_log_dfs) / (high_yfs - low_yfs) * (yfs - low_yfs) + low_log_dfs
+
+    def log_df_gradient(self, yf):
+        high = min(max(bisect_left(self._yf_list, yf), 1), self._num_segments)
+        weight = (yf - self._yf_list[high - 1]) / (self._yf_list[high] - self._yf_list[high - 1])
+        gradient = np.zeros(self._num_segments)
+        # Element j is node j + 1, as the base node is excluded.
+        if high > 1:
+            gradient[high - 2] = 1.0 - weight
+        gradient[high - 1] = weight
+        return gradient
+
+    def _gradient_terms(self, yfs):
+        high = self._segments(yfs)
+        weights = (yfs - self._yfs[high - 1]) / (self._yfs[high] - self._yfs[high - 1])
+        return [(high - 1, 1.0 - weights), (high, weights)], []
+
+
+class LinearZeroRateInterpolator(_Interpolator):
+    """
+    Linear interpolation in continuously-compounded zero rates. The zero rate is flat before
+    the first node and after the last one.
+    """
+
+    def _prepare(self):
+        self._zero_rates = np.empty(len(self._yfs))
+
+    def set_log_dfs(self, node_log_dfs):
+        super().set_log_dfs(node_log_dfs)
+        np.divide(-self._log_dfs[1:], self._yfs[1:], out=self._zero_rates[1:])
+        self._zero_rates[0] = self._zero_rates[1]
+
+    def _weights(self, yfs):
+        high = self._segments(yfs)
+        (low_yfs, high_yfs) = (self._yfs[high - 1], self._yfs[high])
+        weights = np.minimum(np.maximum((yfs - low_yfs) / (high_yfs - low_yfs), 0.0), 1.0)
+        return high, weights
+
+    def log_df_array(self, yfs):
+        yfs = np.asarray(yfs, dtype=float)
+        (high, weights) = self._weights(yfs)
+        zero_rates = (1.0 - weights) * self._zero_rates[high - 1] + weights * self._zero_rates[high]
+        return -zero_rates * yfs
+
+    def _gradient_terms(self, yfs):
+        (high, weights) = self._weights(yfs)
+        # The zero rate at node i is -log DF i / yf i, and the first segment uses node 1's rate.
+        first_segment = high == 1
+        low = np.maximum(high - 1, 1)
+        low_weights = np.where(first_segment, 1.0, 1.0 - weights)
+        high_weights = np.where(first_segment, 0.0, weights)
+        return [(low, low_weights * yfs / self._yfs[low]), (high, high_weights * yfs / self._yfs[high])], []
+
+
+class NaturalCubicLogDfInterpolator(_Interpolator):
+    """
+    Natural cubic spline interpolation in log DFs. The spline is extended linearly after the
+    last node.
+    """
+
+    def _prepare(self):
+        # The second derivatives at the nodes are a linear function of the node log DFs:
+        # second_derivatives = self._second_derivative_weights @ log DFs.
+        num_nodes = len(self._yfs)
+        widths = np.diff(self._yfs)
+        self._second_derivative_weights = np.zeros((num_nodes, num_nodes))
+        self._second_derivatives = np.zeros(num_nodes)
+        interior = num_nodes - 2
+        if interior > 0:
+            rows = np.arange(interior)
+            (left_widths, right_widths) = (widths[:-1], widths[1:])
+            lhs = np.zeros((interior, interior))
+            lhs[rows, rows] = 2.0 * (left_widths + right_widths)
+            lhs[rows[1:], rows[1:] - 1] = left_widths[1:]
+            lhs[rows[:-1], rows[:-1] + 1] = right_widths[:-1]
+            rhs = np.zeros((interior, num_nodes))
+            rhs[rows, rows] = 6.0 / left_widths
+            rhs[rows, rows + 1] = -6.0 / left_widths - 6.0 / right_widths
+            rhs[rows, rows + 2] = 6.0 / right_widths
+            self._second_derivative_weights[1:-1] = np.linalg.solve(lhs, rhs)
+
+    def set_log_dfs(self, node_log_dfs):
+        super().set_log_dfs(node_log_dfs)
+        np.dot(self._second_derivative_weights, self._log_dfs, out=self._second_derivatives)
+
+    def _coefficients(self, yfs):
+        """
+        The weights of the segment's end-point log DFs and second derivatives in the spline,
+        for each year-fraction.
+        """
+        high = self._segments(yfs)
+        low = high - 1
+        width = self._yfs[high] - self._yfs[low]
+        beyond = np.maximum(yfs - self._yfs[high], 0.0)
+        within = yfs - beyond
+        (a, b) = ((self._yfs[high] - within) / width, (within - self._yfs[low]) / width)
+        low_weight = a - beyond / width
+        high_weight = b + beyond / width
+        # Past the last node, the slope at the last node is used, with a zero second derivative there.
+        low_curvature = (a**3 - a) * width**2 / 6.0 + beyond * width / 6.0
+        high_curvature = (b**3 - b) * width**2 / 6.0 + beyond * width / 3.0
+        return low, high, low_weight, high_weight, low_curvature, high_curvature
+
+    def log_df_array(self, yfs):
+        yfs = np.asarray(yfs, dtype=float)
+        (low, high, low_weight, high_weight, low_curvature, high_curvature) = self._coefficients(yfs)
+        return (low_weight * self._log_dfs[low] + high_weight * self._log_dfs[high]
+                + low_curvature * self._second_derivatives[low] + high_curvature * self._second_derivatives[high])
+
+    def _gradient_terms(self, yfs):
+        (low, high, low_weight, high_weight, low_curvature, high_curvature) = self._coefficients(yfs)
+        weights = self._second_derivative_weights
+        return ([(low, low_weight), (high, high_weight)],
+                [(weights, low, low_curvature), (weights, high, high_curvature)])
+
+
+def _monotone_convex_cases(g0, g1):
+    """The masks of the four shapes of Hagan and West's forward adjustment g."""
+    # (i) g0 and g1 are such that a quadratic stays monotone.
+    case_1 = (((g0 < 0.0) & (-0.5 * g0 <= g1) & (g1 <= -2.0 * g0))
+              | ((g0 > 0.0) & (-0.5 * g0 >= g1) & (g1 >= -2.0 * g0)))
+    # (ii) g is flat at g0 then rises or falls to g1.
+    case_2 = ~case_1 & (((g0 < 0.0) & (g1 > -2.0 * g0)) | ((g0 > 0.0) & (g1 < -2.0 * g0)))
+    # (iii) g falls or rises from g0 then is flat at g1.
+    case_3 = ~case_1 & ~case_2 & (((g0 > 0.0) & (0.0 > g1) & (g1 > -0.5 * g0))
+                                  | ((g0 < 0.0) & (0.0 < g1) & (g1 < -0.5 * g0)))
+    # (iv) g0 and g1 have the same sign, and g has a turning point in between.
+    case_4 = ~case_1 & ~case_2 & ~case_3 & (g0 + g1 != 0.0)
+    return case_1, case_2, case_3, case_4
+
+
+def _monotone_convex_integral(x, g0, g1):
+    """
+    The integral from 0 to x of Hagan and West's forward adjustment g, for x in [0, 1],
+    where g(0) = g0, g(1) = g1 and the integral from 0 to 1 is 0.
+    """
+    (x, g0, g1) = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(g0, dtype=float),
+                                      np.asarray(g1, dtype=float))
+    (case_1, case_2, case_3, case_4) = _monotone_convex_cases(g0, g1)
+    result = np.zeros(x.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.where(case_1, g0 * (x - 2.0 * x**2 + x**3) + g1 * (x**3 - x**2), result)
+
+        eta = (g1 + 2.0 * g0) / (g1 - g0)
+        after = np.maximum(x - eta, 0.0)
+        result = np.where(case_2, g0 * x + (g1 - g0) * after**3 / (3.0 * (1.0 - eta)**2), result)
+
+        eta = 3.0 * g1 / (g1 - g0)
+        before = np.maximum(eta - x, 0.0)
+        result = np.where(case_3, g1 * x + (g0 - g1) * eta / 3.0 * (1.0 - (before / eta)**3), result)
+
+        eta = g1 / (g1 + g0)
+        a = -g0 * g1 / (g0 + g1)
+        # The turning point can be at either end of the segment, where the guarded terms vanish.
+        before = np.where(eta > 0.0, np.maximum(eta - x, 0.0) / eta, 0.0)
+        after = np.where(eta < 1.0, np.maximum(x - eta, 0.0) / (1.0 - eta), 0.0)
+        result = np.where(case_4, (a * x + (g0 - a) * eta / 3.0 * (1.0 - before**3)
+                                   + (g1 - a) * (1.0 - eta) / 3.0 * after**3), result)
+    return result
+
+
+def _monotone_convex_integral_partials(x, g0, g1):
+    """
+    The partial derivatives of _monotone_convex_integral(x, g0, g1) with respect to g0 and
+    g1, case by case. Where g0 = g1 = 0 the integral is not differentiable, and the
+    derivatives of the quadratic of case (i) are used.
+    """
+    (x, g0, g1) = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(g0, dtype=float),
+                                      np.asarray(g1, dtype=float))
+    (case_1, case_2, case_3, case_4) = _monotone_convex_cases(g0, g1)
+    case_1 = case_1 | ((g0 == 0.0) & (g1 == 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        partial_g0 = np.where(case_1, x - 2.0 * x**2 + x**3, 0.0)
+        partial_g1 = np.where(case_1, x**3 - x**2, 0.0)
+
+        # With d = g1 - g0, the integral is g0 x + d^3 after^3 / (27 g0^2).
+        d = g1 - g0
+        after = np.maximum(x - (g1 + 2.0 * g0) / d, 0.0)
+        partial_g0 = np.where(case_2, x - (3.0 * d**2 * after**3 + 9.0 * g1 * d * after**2) / (27.0 * g0**2)
+                              - 2.0 * d**3 * after**3 / (27.0 * g0**3), partial_g0)
+        partial_g1 = np.where(case_2, (3.0 * d**2 * after**3 + 9.0 * g0 * d * after**2) / (27.0 * g0**2),
+                              partial_g1)
+
+        # The integral is g1 (x - 1 + u^3), where u = max(1 - x / eta, 0).
+        u = np.maximum(1.0 - x * d / (3.0 * g1), 0.0)
+        partial_g0 = np.where(case_3, u**2 * x, partial_g0)
+        partial_g1 = np.where(case_3, x - 1.0 + u**3 - g0 * u**2 * x / g1, partial_g1)
+
+        # The chain rule through eta, a, and the end-point terms of the two parabolas.
+        total = g0 + g1
+        eta = g1 / total
+        a = -g0 * g1 / total
+        before = np.where(eta > 0.0, np.maximum(eta - x, 0.0) / eta, 0.0)
+        after = np.where(eta < 1.0, np.maximum(x - eta, 0.0) / (1.0 - eta), 0.0)
+        (before_weight, after_weight) = ((g0 - a) * eta / 3.0, (g1 - a) * (1.0 - eta) / 3.0)
+        partials = []
+        for (eta_derivative, a_derivative, g0_derivative) in [(-g1 / total**2, -g1**2 / total**2, 1.0),
+                                                              (g0 / total**2, -g0**2 / total**2, 0.0)]:
+            before_derivative = np.where((x < eta) & (eta > 0.0), x / eta**2 * eta_derivative, 0.0)
+            after_derivative = np.where((x > eta) & (eta < 1.0), (x - 1.0) / (1.0 - eta)**2 * eta_derivative, 0.0)
+            before_weight_derivative = ((g0_derivative - a_derivative) * eta + (g0 - a) * eta_derivative) / 3.0
+            after_weight_derivative = ((1.0 - g0_derivative - a_derivative) * (1.0 - eta)
+                                       - (g1 - a) * eta_derivative) / 3.0
+            partials.append(x * a_derivative + before_weight_derivative * (1.0 - before**3)
+                            - 3.0 * before_weight * before**2 * before_derivative
+                            + after_weight_derivative * after**3 + 3.0 * after_weight * after**2 * after_derivative)
+        partial_g0 = np.where(case_4, partials[0], partial_g0)
+        partial_g1 = np.where(case_4, partials[1], partial_g1)
+    return partial_g0, partial_g1
+
+
+class MonotoneConvexInterpolator(_Interpolator):
+    """
+    Hagan and West's monotone convex interpolation of instantaneous forwards, without the
+    positivity constraint. The forward is flat after the last node.
+    """
+
+    def _prepare(self):
+        num_nodes = len(self._yfs)
+        widths = np.diff(self._yfs)
+        # The discrete forward over each segment, and the instantaneous forward at each node,
+        # are linear in the node log DFs. Each row holds the weights of the log DFs.
+        segments = np.arange(1, num_nodes)
+        fd = np.zeros((num_nodes, num_nodes))  # Row 0 is unused.
+        fd[segments, segments - 1] = 1.0 / widths
+        fd[segments, segments] = -1.0 / widths
+        self._discrete_forward_weights = fd
+        self._forward_weights = np.zeros((num_nodes, num_nodes))
+        if num_nodes > 2:
+            interior = segments[:-1]
+            total_widths = widths[:-1] + widths[1:]
+            self._forward_weights[interior] = ((widths[:-1] / total_widths)[:, np.newaxis] * fd[interior + 1]
+                                               + (widths[1:] / total_widths)[:, np.newaxis] * fd[interior])
+            self._forward_weights[0] = fd[1] - 0.5 * (self._forward_weights[1] - fd[1])
+            self._forward_weights[-1] = fd[-1] - 0.5 * (self._forward_weights[-2] - fd[-1])
+        else:
+            self._forward_weights[0] = self._forward_weights[-1] = fd[1]
+        self._discrete_forwards = np.zeros(num_nodes)
+        self._forwards = np.zeros(num_nodes)
+
+    def set_log_dfs(self, node_log_dfs):
+        super().set_log_dfs(node_log_dfs)
+        np.dot(self._discrete_forward_weights, self._log_dfs, out=self._discrete_forwards)
+        np.dot(self._forward_weights, self._log_dfs, out=self._forwards)
+
+    def _segment_values(self, yfs):
+        high = self._segments(yfs)
+        width = self._yfs[high] - self._yfs[high - 1]
+        x = np.minimum((yfs - self._yfs[high - 1]) / width, 1.0)
+        beyond = np.maximum(yfs - self._yfs[high], 0.0)
+        g0 = self._forwards[high - 1] - self._discrete_forwards[high]
+        g1 = self._forwards[high] - self._discrete_forwards[high]
+        return high, width, x, beyond, g0, g1
+
+    def log_df_array(self, yfs):
+        yfs = np.asarray(yfs, dtype=float)
+        (high, width, x, beyond, g0, g1) = self._segment_values(yfs)
+        integral = width * (self._discrete_forwards[high] * x + _monotone_convex_integral(x, g0, g1))
+        return self._log_dfs[high - 1] - integral - beyond * self._forwards[high]
+
+    def _gradient_terms(self, yfs):
+        (high, width, x, beyond, g0, g1) = self._segment_values(yfs)
+        (integral_g0, integral_g1) = _monotone_convex_integral_partials(x, g0, g1)
+        # log DF = log DF[high - 1] - width * (fd * x + integral(x, f0 - fd, f1 - fd)) - beyond * f1,
+        # where fd is the discrete forward of the segment and f0 and f1 the forwards at its ends.
+        return ([(high - 1, np.ones(len(yfs)))],
+                [(self._discrete_forward_weights, high, -width * (x - integral_g0 - integral_g1)),
+                 (self._forward_weights, high - 1, -width * integral_g0),
+                 (self._forward_weights, high, -width * integral_g1 - beyond)])
@@ -0,0 +1,139 @@
+"""
+Reads market quotes from files and builds stripper inputs from them.
+
+Each quote record has these fields:
+    base_date: the date of the market snapshot, as YYYY-MM-DD.
+    instrument: "deposit", "future", "swap" or "ois_basis".
+    tenor: the tenor in months, or the expiry month as YYYY-MM for a future.
+    quote: the deposit rate, futures price, swap fixed rate or OIS basis spread.
+
+Records can be in a CSV file with a header row, or in a JSONL file with one JSON object per line.
+All the records for a base date must be next to each other.
+
+A record can also have a snapshot field, to hold several snapshots for the same base date,
+e.g. intraday ones. load_snapshots keeps them apart; snapshot_records does not.
+"""
+
+from collections import OrderedDict
+import csv
+from datetime import date
+from itertools import groupby
+import json
+import os
+from dates import add_business_days
+from curvestrippers import input_with_quote
+from instruments import LiborDeposit, EurodollarFuture, InterestRateSwap, OisBasisSwap
+
+
+"""The notional of the instruments built from quotes. It does not affect the stripped curves."""
+NOTIONAL = 1e6
+
+
+def read_quote_records(path):
+    """Yields the quote records in a .csv or .jsonl file as dicts, one at a time."""
+    with open(path, newline="") as quote_file:
+        if str(path).endswith(".jsonl"):
+            for line in quote_file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(quote_file)
+
+
+def _new_input(spot_start_date, instrument, tenor, quote):
+    if instrument == "future":
+        (year, month) = str(tenor).split("-")
+        return (EurodollarFuture(int(year), int(month)), quote)
+    tenor_in_months = int(tenor)
+    if instrument == "deposit":
+        return LiborDeposit(NOTIONAL, spot_start_date, tenor_in_months, quote)
+    elif instrument == "swap":
+        return InterestRateSwap(NOTIONAL, spot_start_date, tenor_in_months, quote)
+    elif instrument == "ois_basis":
+        return OisBasisSwap(NOTIONAL, spot_start_date, tenor_in_months, quote)
+    raise ValueError("Unknown instrument in quote record: " + str(instrument))
+
+
+def build_input(base_date, record):
+    """Builds the stripper input for a quote record, with the standard spot start date."""
+    return _new_input(add_business_days(base_date, 2), record["instrument"], record["tenor"], float(record["quote"]))
+
+
+def snapshot_records(records):
+    """Groups consecutive quote records by base date, yielding (base date, list of records) pairs."""
+    for (base_date, group) in groupby(records, key=lambda record: record["base_date"]):
+        yield date.fromisoformat(str(base_date)), list(group)
+
+
+class InputBuilder:
+    """
+    Builds stripper inputs from quote records, reusing the instruments already built.
+
+    The first record for an instrument, spot date and tenor builds a template instrument,
+    and later records copy it with their quote, which shares its dates and schedules. Only
+    the most recently used templates are kept, so memory stays flat over a long history.
+    """
+
+    def __init__(self, max_templates=1024):
+        """
+        Creates an InputBuilder.
+
+        Args:
+            max_templates: the number of template instruments kept, which should be a few
+                times the number of instruments in a snapshot.
+        """
+        self._max_templates = max_templates
+        self._templates = OrderedDict()
+        self._spot_start_dates = {}
+
+    def _spot_start_date(self, base_date):
+        spot_start_date = self._spot_start_dates.get(base_date)
+        if spot_start_date is None:
+            if len(self._spot_start_dates) >= self._max_templates:
+                self._spot_start_dates.clear()
+            spot_start_date = self._spot_start_dates[base_date] = add_business_days(base_date, 2)
+        return spot_start_date
+
+    def build(self, base_date, record):
+        """Builds the stripper input for a quote record, the same as build_input."""
+        spot_start_date = self._spot_start_date(base_date)
+        instrument = record["instrument"]
+        tenor = record["tenor"]
+        quote = float(record["quote"])
+        key = (instrument, spot_start_date if instrument != "future" else None, str(tenor))
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates[key] = _new_input(spot_start_date, instrument, tenor, quote)
+            if len(self._templates) > self._max_templates:
+                self._templates.popitem(last=False)
+            return template
+        self._templates.move_to_end(key)
+        return input_with_quote(template, quote)
+
+    def build_all(self, base_date, records):
+        """Builds the stripper inputs for the quote records of a snapshot."""
+        return [self.build(base_date, record) for record in records]
+
+
+def load_snapshots(source, builder=None):
+    """
+    Streams ready-to-strip inputs from quote records, one snapshot at a time.
+
+    Only one snapshot's records are held at once, so memory use does not grow with the
+    length of the history.
+
+    Args:
+        source: the path of a .csv or .jsonl file of quote records, or an iterable of records.
+        builder: the InputBuilder to use, e.g. to share templates between calls. A new one
+            is used if not given.
+
+    Yields:
+        (base date, list of stripper inputs) pairs, in the order of the records. Records
+        with the same base date but a different snapshot field are yielded separately.
+    """
+    if builder is None:
+        builder = InputBuilder()
+    records = read_quote_records(source) if isinstance(source, (str, os.PathLike)) else source
+    for ((base_date, _), group) in groupby(records, key=lambda record: (record["base_date"], record.get("snapshot"))):
+        base_date = date.fromisoformat(str(base_date))
+        yield base_date, builder.build_all(base_date, group)
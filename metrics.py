@@ -0,0 +1,87 @@
+"""
+Opt-in counters and timers for the curve and stripper hot paths.
+
+Nothing is recorded unless a collect_metrics() block is active, and the instrumented code
+only checks whether the active report is None when it is not. The active report belongs to
+the thread, or asyncio task, that opened the block, so blocks in different threads collect
+separately and cannot leave each other's reports active.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+
+"""The MetricsReport being collected in this context, or None if metrics are not being collected."""
+_active = ContextVar("active_metrics_report", default=None)
+
+
+def active_report():
+    """Returns the MetricsReport being collected in this thread, or None."""
+    return _active.get()
+
+
+class MetricsReport:
+    """
+    Holds the metrics recorded in a collect_metrics() block.
+
+    Attributes:
+        counts: a dict of how many times each event happened, e.g. "df_calls".
+        seconds: a dict of the total wall-clock time spent in each activity, e.g. "strip".
+        values: a dict of lists of recorded values, e.g. "residual_norms", one per strip.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.seconds = {}
+        self.values = {}
+
+    def count(self, name, number=1):
+        self.counts[name] = self.counts.get(name, 0) + number
+
+    def add_time(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def record(self, name, value):
+        self.values.setdefault(name, []).append(value)
+
+    @contextmanager
+    def timer(self, name):
+        """Adds the time spent in the block to the named total."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, perf_counter() - start)
+
+    def as_dict(self):
+        return {"counts": dict(self.counts), "seconds": dict(self.seconds),
+                "values": {name: list(values) for (name, values) in self.values.items()}}
+
+
+@contextmanager
+def collect_metrics(callback=None):
+    """
+    Collects metrics from the curves and strippers used in the block.
+
+    The counts are "curve_constructions", "df_calls", "df_array_calls", "objective_evaluations",
+    "jacobian_evaluations" and "solver_iterations". The times are "strip",
+    "valuation.<instrument type>" and "sensitivities.<instrument type>", the time spent on the
+    instruments' residuals and Jacobian rows. The values are "solver_iterations" and
+    "residual_norms", with one entry for each successful strip. An iteration is a Newton step,
+    or a Jacobian evaluation of SciPy's solver for the "global" method.
+
+    Args:
+        callback: an optional function that is called with the MetricsReport at the end of the block.
+
+    Yields:
+        The MetricsReport being collected.
+    """
+    report = MetricsReport()
+    token = _active.set(report)
+    try:
+        yield report
+    finally:
+        _active.reset(token)
+        if callback is not None:
+            callback(report)
@@ -0,0 +1,57 @@
+"""
+Feeds a stream of tasks to a pool of processes, reading only a few tasks ahead of the
+workers, so that the stream can come from a file too large to hold in memory. batch.py and
+pricingscript.py use it.
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from itertools import islice
+
+
+def chunks(items, chunk_size):
+    """Splits an iterable into lists of up to chunk_size consecutive items, reading it lazily."""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def map_ahead(executor, function, tasks, on_result, max_pending, in_order=True):
+    """
+    Calls a function on each task in an executor, with at most max_pending tasks submitted
+    but not yet handled.
+
+    Args:
+        executor: a concurrent.futures executor.
+        function: the function to call.
+        tasks: an iterable of tuples of arguments for the function.
+        on_result: a function called with each task's arguments and its result. An exception
+            raised by a task is raised here instead.
+        max_pending: the number of tasks read ahead of the workers.
+        in_order: whether the results are handled in the order of the tasks, or as they finish.
+    """
+    # The submitted futures and their tasks' arguments, oldest first.
+    pending = deque() if in_order else {}
+
+    def handle_next():
+        if in_order:
+            (future, arguments) = pending.popleft()
+            on_result(arguments, future.result())
+            return
+        (done, _) = wait(list(pending), return_when=FIRST_COMPLETED)
+        for future in done:
+            on_result(pending.pop(future), future.result())
+
+    for arguments in tasks:
+        if len(pending) >= max_pending:
+            handle_next()
+        future = executor.submit(function, *arguments)
+        if in_order:
+            pending.append((future, arguments))
+        else:
+            pending[future] = arguments
+    while pending:
+        handle_next()
@@ -0,0 +1,174 @@
+"""
+Values large portfolios of trades in a pool of processes.
+
+The curves are published to the workers once, through shared memory, rather than being
+pickled with every task, and the workers write the trades' values straight into a shared
+output array. Where worker processes are forked, they also inherit the trades, so that a
+task is just a range of trade indices.
+
+curve_pool() gives other jobs, such as pricingscript.py, a pool whose workers have the
+curves published in the same way.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from cashflows import compile_cashflows
+from interestratecurve import InterestRateCurve
+
+"""The default number of trades valued in each task."""
+SHARD_SIZE = 10000
+
+# The trades being valued, which forked worker processes inherit.
+_portfolio_trades = None
+
+# The state of a worker process, set up by _attach_curves() and _attach_values().
+_worker_memory = []
+_worker_curves = None
+_worker_values = None
+
+
+def _pack_curves(curves):
+    """
+    Packs curves into one float64 array: for each curve its base date ordinal, its number of
+    nodes, the node date ordinals and the node DFs.
+    """
+    packed = []
+    for curve in curves:
+        packed += [curve.base_date.toordinal(), len(curve.dates)]
+        packed += [node_date.toordinal() for node_date in curve.dates]
+        packed += list(curve.dfs)
+    return np.array(packed, dtype=float)
+
+
+def _unpack_curves(packed, interpolations):
+    curves = []
+    position = 0
+    for interpolation in interpolations:
+        base_date = date.fromordinal(int(packed[position]))
+        num_nodes = int(packed[position + 1])
+        node_ordinals = packed[position + 2:position + 2 + num_nodes]
+        dfs = packed[position + 2 + num_nodes:position + 2 + 2 * num_nodes]
+        curves.append(InterestRateCurve(base_date, [date.fromordinal(int(ordinal)) for ordinal in node_ordinals],
+                                        dfs.tolist(), interpolation))
+        position += 2 + 2 * num_nodes
+    return curves
+
+
+def _shared_array(memory, length):
+    return np.ndarray((length,), dtype=float, buffer=memory.buf)
+
+
+def _attach_curves(curve_memory_name, curve_array_length, interpolations, single_curve, initializer=None,
+                   initargs=()):
+    """
+    Sets up a worker: rebuilds the curves from shared memory, then calls any further initializer
+    with its arguments.
+    """
+    global _worker_curves
+    curve_memory = shared_memory.SharedMemory(name=curve_memory_name)
+    _worker_memory[:] = [curve_memory]  # Keep the mapping open.
+    curves = _unpack_curves(_shared_array(curve_memory, curve_array_length), interpolations)
+    _worker_curves = (curves[0], curves[0]) if single_curve else tuple(curves)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _attach_values(values_memory_name, num_trades):
+    """Maps the shared output array in a worker."""
+    global _worker_values
+    values_memory = shared_memory.SharedMemory(name=values_memory_name)
+    _worker_memory.append(values_memory)
+    _worker_values = _shared_array(values_memory, num_trades)
+
+
+def worker_curves():
+    """The (Libor curve, OIS curve) pair in a worker process of curve_pool()."""
+    return _worker_curves
+
+
+@contextmanager
+def curve_pool(libor_curve, ois_curve, max_workers=None, initializer=None, initargs=()):
+    """
+    Creates a ProcessPoolExecutor whose workers have the curves.
+
+    The curves are published once, through shared memory, and each worker rebuilds them when
+    it starts. Tasks get them from worker_curves(). The shared memory is released when the
+    pool is shut down.
+
+    Args:
+        libor_curve: the Libor curve.
+        ois_curve: the OIS curve, or the Libor curve itself for single-curve valuation.
+        max_workers: the number of processes, which defaults to the number of CPUs.
+        initializer: optionally, a further function to call in each worker once the curves are set up.
+        initargs: the arguments of the initializer.
+    """
+    single_curve = libor_curve is ois_curve
+    curves = [libor_curve] if single_curve else [libor_curve, ois_curve]
+    packed_curves = _pack_curves(curves)
+    curve_memory = shared_memory.SharedMemory(create=True, size=packed_curves.nbytes)
+    try:
+        _shared_array(curve_memory, len(packed_curves))[:] = packed_curves
+        curve_initargs = (curve_memory.name, len(packed_curves), [curve.interpolation for curve in curves],
+                          single_curve, initializer, initargs)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_curves,
+                                 initargs=curve_initargs) as executor:
+            yield executor
+    finally:
+        curve_memory.close()
+        curve_memory.unlink()
+
+
+def _shard_values(trades, libor_curve, ois_curve):
+    """The values of a list of trades, vectorized where their cashflows can be compiled."""
+    try:
+        return compile_cashflows(trades).values(libor_curve, ois_curve)
+    except ValueError:
+        return np.array([trade.value(libor_curve, ois_curve) for trade in trades])
+
+
+def _value_shard(start, stop, trades=None):
+    if trades is None:
+        trades = _portfolio_trades[start:stop]
+    _worker_values[start:stop] = _shard_values(trades, *_worker_curves)
+
+
+def value_portfolio(trades, libor_curve, ois_curve, max_workers=None, shard_size=SHARD_SIZE):
+    """
+    Values a portfolio of trades in a pool of processes.
+
+    The trades are split into shards of consecutive trades, and each shard is valued in one
+    task. Shards of LiborDeposits, InterestRateSwaps and OisBasisSwaps are valued with
+    vectorized cashflows, and any other shards one trade at a time.
+
+    Args:
+        trades: a list of instruments with a value(libor_curve, ois_curve) method.
+        libor_curve: the Libor curve.
+        ois_curve: the OIS curve, or the Libor curve itself for single-curve valuation.
+        max_workers: the number of processes, which defaults to the number of CPUs.
+        shard_size: the number of trades in each task.
+
+    Returns:
+        A NumPy array of the trades' values, in the same order as the trades.
+    """
+    global _portfolio_trades
+    values_memory = shared_memory.SharedMemory(create=True, size=max(len(trades), 1) * np.dtype(float).itemsize)
+    try:
+        inherit_trades = multiprocessing.get_start_method() == "fork"
+        if inherit_trades:
+            _portfolio_trades = trades
+        with curve_pool(libor_curve, ois_curve, max_workers, _attach_values,
+                        (values_memory.name, len(trades))) as executor:
+            shards = [(start, min(start + shard_size, len(trades))) for start in range(0, len(trades), shard_size)]
+            futures = [executor.submit(_value_shard, start, stop, None if inherit_trades else trades[start:stop])
+                       for (start, stop) in shards]
+            for future in futures:
+                future.result()  # Raise any exception from the workers.
+        return _shared_array(values_memory, len(trades)).copy()
+    finally:
+        _portfolio_trades = None
+        values_memory.close()
+        values_memory.unlink()
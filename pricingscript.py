@@ -1,46 +1,219 @@
 """
-Strips Libor and OIS curves from market data, and uses them to find the value
-of a forward-starting swap.
+Strips Libor and OIS curves from a market snapshot, and uses them to value a book of trades.
+
+Usage:
+    python pricingscript.py QUOTE_FILE TRADE_FILE OUTPUT_FILE [--base-date YYYY-MM-DD] [--workers N]
+        [--chunk-size N] [--method METHOD] [--single-curve]
+
+The quote file is in one of the formats read by marketdata.read_quote_records. The curves
+are stripped once, from the quotes for the base date, which can be left out if the file
+only has one.
+
+The trade file is a CSV file with a header row, or a JSONL file with one JSON object per
+line, of trade records with these fields:
+    id: the trade identifier. By default trades are numbered from 1 in the order of the file.
+    instrument: "deposit", "swap" or "ois_basis".
+    notional: the notional, which is negative for a short position, e.g. a swap that
+        receives fixed.
+    start_date: the start date as YYYY-MM-DD. By default the spot date of the base date.
+    tenor: the tenor in months.
+    rate: the deposit rate, swap fixed rate or OIS basis spread.
+
+The trades are read and valued in chunks, so memory stays flat however large the book, and
+the value of each trade is written to the output file as soon as its chunk is done, in the
+order of the trade file. The output is a CSV file of id and value, or JSON lines if its
+name ends in .jsonl. A summary of the timings is written to standard error.
 """
 
+import argparse
+import csv
 from datetime import date
-from curvestrippers import strip_libor_and_ois_curves
-from dates import add_business_days, add_months_mod_foll
-from instruments import LiborDeposit, EurodollarFuture, InterestRateSwap, OisBasisSwap
-
-notional = 100
-base_date = date(2018, 7, 27)
-spot_start_date = add_business_days(base_date, 2)
-inputs = [LiborDeposit(notional, spot_start_date, 3, 0.0170),
-          (EurodollarFuture(2018, 9), 98.10),
-          (EurodollarFuture(2018, 12), 97.90),
-          (EurodollarFuture(2019, 3), 97.80),
-          (EurodollarFuture(2019, 6), 97.70),
-          (EurodollarFuture(2019, 9), 97.60),
-          (EurodollarFuture(2019, 12), 97.50),
-          (EurodollarFuture(2020, 3), 97.45),
-          (EurodollarFuture(2020, 6), 97.40),
-          InterestRateSwap(notional, spot_start_date, 36, 0.0250),
-          InterestRateSwap(notional, spot_start_date, 48, 0.0260),
-          InterestRateSwap(notional, spot_start_date, 60, 0.0270),
-          InterestRateSwap(notional, spot_start_date, 72, 0.0280),
-          InterestRateSwap(notional, spot_start_date, 84, 0.0285),
-          InterestRateSwap(notional, spot_start_date, 96, 0.0290),
-          InterestRateSwap(notional, spot_start_date, 108, 0.0289),
-          InterestRateSwap(notional, spot_start_date, 120, 0.0295),
-          OisBasisSwap(notional, spot_start_date, 12, 0.0010),
-          OisBasisSwap(notional, spot_start_date, 24, 0.0012),
-          OisBasisSwap(notional, spot_start_date, 36, 0.0016),
-          OisBasisSwap(notional, spot_start_date, 48, 0.0020),
-          OisBasisSwap(notional, spot_start_date, 60, 0.0022),
-          OisBasisSwap(notional, spot_start_date, 72, 0.0025),
-          OisBasisSwap(notional, spot_start_date, 84, 0.0026),
-          OisBasisSwap(notional, spot_start_date, 96, 0.0027),
-          OisBasisSwap(notional, spot_start_date, 108, 0.0029),
-          OisBasisSwap(notional, spot_start_date, 120, 0.0030)]
-libor_curve, ois_curve = strip_libor_and_ois_curves(base_date, inputs)
-
-two_years_ahead = add_months_mod_foll(spot_start_date, 24)
-new_swap_2y_5y = InterestRateSwap(-50 * 1e6, two_years_ahead, 60, 0.0305)
-print('Value of short USD50m 2y5y forward-starting swap:')
-print(new_swap_2y_5y.value(libor_curve, ois_curve))
+import json
+import os
+import sys
+import time
+from cashflows import compile_cashflows
+from curvestrippers import strip_libor_curve, strip_libor_and_ois_curves
+from dates import add_business_days
+from instruments import LiborDeposit, InterestRateSwap, OisBasisSwap
+from marketdata import InputBuilder, read_quote_records, snapshot_records
+from pools import chunks, map_ahead
+from portfolio import curve_pool, worker_curves
+
+"""The default number of trades valued together."""
+CHUNK_SIZE = 10000
+
+_TRADE_TYPES = {"deposit": LiborDeposit, "swap": InterestRateSwap, "ois_basis": OisBasisSwap}
+_REQUIRED_FIELDS = ("instrument", "notional", "tenor", "rate")
+
+
+def strip_snapshot(quote_file, base_date=None, ois_curve=True, method="global"):
+    """
+    Strips the curves from the quotes for one base date in a quote file.
+
+    The file is read one base date at a time, and only as far as the quotes that are used.
+
+    Args:
+        quote_file: the path of a .csv or .jsonl file of quote records.
+        base_date: the base date of the quotes to use, which can be left out if the file
+            only has quotes for one base date.
+        ois_curve: whether to strip separate Libor and OIS curves, or a single Libor curve,
+            in which case any OIS basis quotes are left out.
+        method: the stripping method, as for curvestrippers.strip_libor_curve.
+
+    Returns:
+        The base date and the (Libor curve, OIS curve) pair. For a single-curve strip both
+        curves are the Libor curve.
+    """
+    found = None
+    for (snapshot_date, snapshot) in snapshot_records(read_quote_records(quote_file)):
+        if base_date is not None and snapshot_date != base_date:
+            continue
+        if found is not None:
+            raise ValueError("The quote file has quotes for more than one base date, so the base date must be given.")
+        found = (snapshot_date, snapshot)
+        if base_date is not None:
+            break
+    if found is None:
+        raise ValueError("The quote file has no quotes" + (" for " + base_date.isoformat() if base_date else "") + ".")
+    (base_date, records) = found
+    inputs = InputBuilder().build_all(base_date, records)
+    if ois_curve:
+        return base_date, strip_libor_and_ois_curves(base_date, inputs, method=method)
+    libor_curve = strip_libor_curve(base_date, [input for input in inputs if not isinstance(input, OisBasisSwap)],
+                                    method=method)
+    return base_date, (libor_curve, libor_curve)
+
+
+def build_trade(spot_start_date, record):
+    """
+    Builds the instrument for a trade record.
+
+    Args:
+        spot_start_date: the start date of trades whose records do not have one.
+        record: the trade record, as a dict.
+
+    Raises a ValueError naming the trade if the record is missing a required field.
+    """
+    missing = [field for field in _REQUIRED_FIELDS if record.get(field) in (None, "")]
+    if missing:
+        raise ValueError("Trade " + str(record.get("id") or "without an id") + " is missing "
+                         + ", ".join(missing) + ".")
+    trade_type = _TRADE_TYPES.get(record["instrument"])
+    if trade_type is None:
+        raise ValueError("Unknown instrument in trade record: " + str(record["instrument"]))
+    start_date = date.fromisoformat(record["start_date"]) if record.get("start_date") else spot_start_date
+    return trade_type(float(record["notional"]), start_date, int(record["tenor"]), float(record["rate"]))
+
+
+def _value_records(spot_start_date, records, curves):
+    trades = [build_trade(spot_start_date, record) for record in records]
+    return compile_cashflows(trades).values(*curves).tolist()
+
+
+def _value_records_in_worker(spot_start_date, records):
+    return _value_records(spot_start_date, records, worker_curves())
+
+
+def value_trades(records, base_date, curves, on_values, max_workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Values a stream of trade records in chunks.
+
+    The curves are published to the worker processes once, by portfolio.curve_pool(), and
+    then each task is just a chunk of records. Only a few chunks are read ahead of the
+    workers, so the records can come from a large file.
+
+    Args:
+        records: an iterable of trade records.
+        base_date: the base date of the curves, whose spot date is the default start date.
+        curves: the (Libor curve, OIS curve) pair.
+        on_values: a function called with each chunk of records and the list of their values,
+            in the order of the records.
+        max_workers: the number of processes, which defaults to the number of CPUs. With 0,
+            the trades are valued in this process.
+        chunk_size: the number of trades in each chunk.
+
+    Returns:
+        The number of trades valued.
+    """
+    spot_start_date = add_business_days(base_date, 2)
+    num_trades = 0
+
+    def handle_values(chunk, values):
+        nonlocal num_trades
+        on_values(chunk, values)
+        num_trades += len(chunk)
+
+    if max_workers == 0:
+        for chunk in chunks(records, chunk_size):
+            handle_values(chunk, _value_records(spot_start_date, chunk, curves))
+        return num_trades
+
+    max_pending = 2 * (max_workers or os.cpu_count() or 1)
+    with curve_pool(*curves, max_workers=max_workers) as executor:
+        map_ahead(executor, _value_records_in_worker,
+                  ((spot_start_date, chunk) for chunk in chunks(records, chunk_size)),
+                  lambda arguments, values: handle_values(arguments[1], values), max_pending)
+    return num_trades
+
+
+def _numbered(records):
+    """Gives the records without an id their position in the file, counting from 1."""
+    for (i, record) in enumerate(records, 1):
+        if not record.get("id"):
+            record = dict(record, id=str(i))
+        yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Strip Libor and OIS curves from quotes, and value a book of trades.")
+    parser.add_argument("quote_file", help="a .csv or .jsonl file of quote records")
+    parser.add_argument("trade_file", help="a .csv or .jsonl file of trade records")
+    parser.add_argument("output_file", help="the .csv or .jsonl file that the values are written to")
+    parser.add_argument("--base-date", type=date.fromisoformat, help="the base date of the quotes to use")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="the number of processes, or 0 to value the trades in this process")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="the number of trades per task")
+    parser.add_argument("--method", choices=["global", "bootstrap", "block_newton", "alternating"], default="global")
+    parser.add_argument("--single-curve", action="store_true", help="strip a single Libor curve")
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    try:
+        (base_date, curves) = strip_snapshot(args.quote_file, args.base_date, not args.single_curve, args.method)
+    except ValueError as error:
+        print("Could not strip curves: " + str(error), file=sys.stderr)
+        return 1
+    strip_seconds = time.perf_counter() - start_time
+
+    as_jsonl = str(args.output_file).endswith(".jsonl")
+    with open(args.output_file, "w", newline="") as output_file:
+        writer = None if as_jsonl else csv.writer(output_file)
+        if writer:
+            writer.writerow(["id", "value"])
+
+        def write_values(records, values):
+            for (record, value) in zip(records, values):
+                if as_jsonl:
+                    output_file.write(json.dumps({"id": record["id"], "value": value}) + "\n")
+                else:
+                    writer.writerow([record["id"], repr(value)])
+            output_file.flush()
+
+        try:
+            num_trades = value_trades(_numbered(read_quote_records(args.trade_file)), base_date, curves,
+                                      write_values, max_workers=args.workers, chunk_size=args.chunk_size)
+        except ValueError as error:
+            print("Could not value trades: " + str(error), file=sys.stderr)
+            return 1
+    value_seconds = time.perf_counter() - start_time - strip_seconds
+
+    print("Stripped curves for {} in {:.3f} s".format(base_date.isoformat(), strip_seconds), file=sys.stderr)
+    print("Valued {} trades in {:.3f} s ({:.0f} trades/s)".format(
+        num_trades, value_seconds, num_trades / value_seconds if value_seconds > 0.0 else 0.0), file=sys.stderr)
+    print("Total {:.3f} s".format(strip_seconds + value_seconds), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
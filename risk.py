@@ -0,0 +1,139 @@
+"""
+Sensitivities of the values of a portfolio of trades to the market quotes that the curves
+are stripped from.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from cashflows import can_compile, compile_cashflows
+from curvestrippers import (input_quote, input_with_quote, residual_sensitivities,
+                            strip_libor_curve, strip_libor_and_ois_curves)
+
+
+def _trade_node_sensitivities(trades, libor_curve, ois_curve):
+    """The sensitivities of each trade's value to the node DFs, in the same layout as residual_sensitivities()."""
+    rows = []
+    for trade in trades:
+        (libor_sensitivities, ois_sensitivities) = trade.node_sensitivities(libor_curve, ois_curve)
+        if libor_curve is ois_curve:
+            rows.append(libor_sensitivities + ois_sensitivities)
+        else:
+            rows.append(np.concatenate([libor_sensitivities, ois_sensitivities]))
+    return np.array(rows).reshape(len(trades), -1)
+
+
+def quote_sensitivities(trades, inputs, libor_curve, ois_curve):
+    """
+    Calculates the sensitivities of the trades' values to the quotes of the stripper inputs.
+
+    The curves are not restripped. Instead, the implicit function theorem is applied to the
+    stripper's equations: if the inputs' equations are r(dfs, quotes) = 0, then the node DFs
+    move by -inverse(dr/d(dfs)) * dr/d(quotes) per unit move in the quotes.
+
+    Args:
+        trades: a list of instruments with value() and node_sensitivities() methods.
+        inputs: the inputs that the curves were stripped from, as for strip_libor_and_ois_curves.
+        libor_curve: the stripped Libor curve.
+        ois_curve: the stripped OIS curve, or the Libor curve itself for a single-curve strip.
+
+    Returns:
+        A NumPy array with one row for each trade and one column for each input, holding the
+        derivative of the trade's value with respect to the input's quote.
+    """
+    (jacobian, quote_derivatives) = residual_sensitivities(inputs, libor_curve, ois_curve)
+    trade_sensitivities = _trade_node_sensitivities(trades, libor_curve, ois_curve)
+    # Row i of the transposed solve is d(value_i)/d(residuals).
+    return -np.linalg.solve(jacobian.T, trade_sensitivities.T).T * quote_derivatives
+
+
+def portfolio_quote_sensitivities(trades, inputs, libor_curve, ois_curve, trade_weights=None):
+    """
+    Calculates the sensitivities of the weighted total value of the trades to the quotes of
+    the stripper inputs, with one adjoint pass.
+
+    The gradient of the total value with respect to the node DFs is found in a reverse pass
+    through the valuation. One linear solve with the transposed stripper Jacobian then gives
+    the adjoint of each input's equation, whatever the number of trades. For deposits and
+    swaps, the reverse pass runs over their compiled cashflows. For any other trades, such as
+    futures, their weighted node_sensitivities() are added, so a few of them in a large book
+    of swaps cost a few extra passes.
+
+    Args:
+        trades: a list of instruments with value() and node_sensitivities() methods.
+        inputs: the inputs that the curves were stripped from, as for quote_sensitivities().
+        libor_curve: the stripped Libor curve.
+        ois_curve: the stripped OIS curve, or the Libor curve itself for a single-curve strip.
+        trade_weights: optionally, a weight for each trade, e.g. the positions held. By default
+            every trade has a weight of 1.
+
+    Returns:
+        A NumPy array with one element for each input, holding the derivative of the total
+        value with respect to the input's quote. It is the weighted sum of the rows of
+        quote_sensitivities().
+    """
+    trade_weights = np.ones(len(trades)) if trade_weights is None else np.asarray(trade_weights, dtype=float)
+    compiled = [i for (i, trade) in enumerate(trades) if can_compile(trade)]
+    libor_sensitivities = np.zeros(len(libor_curve.dates))
+    ois_sensitivities = np.zeros(len(ois_curve.dates))
+    if compiled:
+        (libor_sensitivities, ois_sensitivities) = compile_cashflows([trades[i] for i in compiled]).node_sensitivities(
+            libor_curve, ois_curve, trade_weights[compiled])
+    for (trade, weight) in zip(trades, trade_weights):
+        if not can_compile(trade):
+            (trade_libor_sensitivities, trade_ois_sensitivities) = trade.node_sensitivities(libor_curve, ois_curve)
+            libor_sensitivities = libor_sensitivities + weight * trade_libor_sensitivities
+            ois_sensitivities = ois_sensitivities + weight * trade_ois_sensitivities
+    if libor_curve is ois_curve:
+        node_sensitivities = libor_sensitivities + ois_sensitivities
+    else:
+        node_sensitivities = np.concatenate([libor_sensitivities, ois_sensitivities])
+    (jacobian, quote_derivatives) = residual_sensitivities(inputs, libor_curve, ois_curve)
+    return -np.linalg.solve(jacobian.T, node_sensitivities) * quote_derivatives
+
+
+def _strip(base_date, inputs, ois_curve, method):
+    if ois_curve:
+        return strip_libor_and_ois_curves(base_date, inputs, method=method)
+    libor_curve = strip_libor_curve(base_date, inputs, method=method)
+    return libor_curve, libor_curve
+
+
+def _values(trades, curves):
+    return np.array([trade.value(*curves) for trade in trades])
+
+
+def _bumped_values(base_date, inputs, trades, ois_curve, method, bumped_index, bump):
+    bumped_input = input_with_quote(inputs[bumped_index], input_quote(inputs[bumped_index]) + bump)
+    bumped_inputs = inputs[:bumped_index] + [bumped_input] + inputs[bumped_index + 1:]
+    return _values(trades, _strip(base_date, bumped_inputs, ois_curve, method))
+
+
+def bumped_quote_sensitivities(trades, base_date, inputs, ois_curve=True, method="global", bump=1e-4,
+                               max_workers=None):
+    """
+    Calculates the same sensitivities as quote_sensitivities() by bumping and restripping.
+
+    Each quote is bumped in turn and the curves restripped, in a pool of processes. This takes
+    one strip per input, so it is meant for validating quote_sensitivities().
+
+    Args:
+        trades: a list of instruments with a value() method.
+        base_date: the date on which the curves are stripped.
+        inputs: the stripper inputs, as for strip_libor_and_ois_curves, or as for strip_libor_curve
+            if ois_curve is False.
+        ois_curve: whether to strip separate Libor and OIS curves, or a single Libor curve.
+        method: the stripping method, as for strip_libor_curve.
+        bump: the amount added to each quote.
+        max_workers: the number of processes, which defaults to the number of CPUs.
+
+    Returns:
+        A NumPy array with one row for each trade and one column for each input, as for
+        quote_sensitivities().
+    """
+    inputs = list(inputs)
+    base_values = _values(trades, _strip(base_date, inputs, ois_curve, method))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_bumped_values, base_date, inputs, trades, ois_curve, method, i, bump)
+                   for i in range(len(inputs))]
+        bumped_values = [future.result() for future in futures]
+    return (np.array(bumped_values).reshape(len(inputs), len(trades)).T - base_values[:, np.newaxis]) / bump
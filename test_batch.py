@@ -0,0 +1,74 @@
+import json
+import pytest
+from datetime import date
+from batch import main, strip_history
+from curvestore import CurveStore
+from curvestrippers import strip_libor_and_ois_curves
+from marketdata import build_input, read_quote_records, snapshot_records
+
+QUOTES = """base_date,instrument,tenor,quote
+2018-07-16,deposit,3,0.0150
+2018-07-16,future,2019-12,98.40
+2018-07-16,swap,60,0.0300
+2018-07-16,ois_basis,3,0.0005
+2018-07-16,ois_basis,60,0.0030
+2018-07-17,deposit,3,0.0151
+2018-07-17,future,2019-12,98.39
+2018-07-17,swap,60,0.0301
+2018-07-17,ois_basis,3,0.0005
+2018-07-17,ois_basis,60,0.0031
+2018-07-18,deposit,3,0.0151
+2018-07-18,bond,60,0.0301
+2018-07-19,deposit,3,0.0152
+2018-07-19,future,2019-12,98.38
+2018-07-19,swap,60,0.0302
+2018-07-19,ois_basis,3,0.0006
+2018-07-19,ois_basis,60,0.0031
+"""
+
+
+def test_main(tmp_path, capsys):
+    quote_file = tmp_path / "quotes.csv"
+    quote_file.write_text(QUOTES)
+    output_directory = tmp_path / "curves"
+    assert(main([str(quote_file), str(output_directory), "--workers", "2", "--chunk-size", "2"]) == 1)
+    assert("2018-07-18" in capsys.readouterr().err)
+
+    store = CurveStore(output_directory)
+    assert(store.has_ois_curves)
+    assert(store.base_dates == [date(2018, 7, 16), date(2018, 7, 17), date(2018, 7, 19)])
+    (base_date, quote_records) = list(snapshot_records(read_quote_records(quote_file)))[-1]
+    libor_curve, ois_curve = strip_libor_and_ois_curves(
+        base_date, [build_input(base_date, record) for record in quote_records])
+    (stored_libor_curve, stored_ois_curve) = store.curves(base_date)
+    assert(stored_libor_curve.dates == libor_curve.dates)
+    assert(stored_libor_curve.dfs == pytest.approx(libor_curve.dfs))
+    assert(stored_ois_curve.dates == ois_curve.dates)
+    assert(stored_ois_curve.dfs == pytest.approx(ois_curve.dfs))
+
+
+def test_main_repeated_base_date(tmp_path, capsys):
+    quote_file = tmp_path / "quotes.csv"
+    lines = QUOTES.splitlines()
+    # The quotes for 2018-07-16 appear again after those for 2018-07-17.
+    quote_file.write_text("\n".join(lines[:11] + lines[1:6]) + "\n")
+    output_directory = tmp_path / "curves"
+    assert(main([str(quote_file), str(output_directory), "--workers", "1", "--chunk-size", "1"]) == 1)
+    assert("2018-07-16 appear more than once" in capsys.readouterr().err)
+    store = CurveStore(output_directory)
+    assert(store.has_ois_curves)
+    assert(store.base_dates == [date(2018, 7, 16), date(2018, 7, 17)])
+
+
+def test_strip_history_single_curve(tmp_path):
+    quote_file = tmp_path / "quotes.jsonl"
+    lines = [line.split(",") for line in QUOTES.splitlines()[1:] if "ois_basis" not in line and "bond" not in line]
+    quote_file.write_text("".join(json.dumps(dict(zip(["base_date", "instrument", "tenor", "quote"], line))) + "\n"
+                                  for line in lines))
+    stripped = {}
+    failures = strip_history(snapshot_records(read_quote_records(quote_file)),
+                             lambda base_date, curves: stripped.setdefault(base_date, curves),
+                             ois_curve=False, method="bootstrap", max_workers=1)
+    assert(failures == [])
+    assert(sorted(stripped) == [date(2018, 7, 16), date(2018, 7, 17), date(2018, 7, 18), date(2018, 7, 19)])
+    assert(all(libor_curve is ois_curve for (libor_curve, ois_curve) in stripped.values()))
@@ -0,0 +1,26 @@
+import json
+from benchmarks import compare, main, run_benchmarks
+
+
+def test_run_benchmarks():
+    results = run_benchmarks("strip_libor_10", quick=True, min_seconds=0.0, max_repeats=1)
+    assert(sorted(results["results"]) == ["strip_libor_10"])
+    assert(all(result["seconds"] > 0.0 and result["repeats"] == 1 for result in results["results"].values()))
+
+
+def test_compare():
+    baseline = {"results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "c": {"seconds": 1.0}}}
+    results = {"results": {"a": {"seconds": 1.1}, "b": {"seconds": 1.3}, "d": {"seconds": 5.0}}}
+    assert(compare(results, baseline, tolerance=0.2) == [("b", 1.3, 1.0)])
+
+
+def test_main(tmp_path):
+    output_file = tmp_path / "results.json"
+    assert(main(["--filter", "curve_df_array", "--output", str(output_file)]) == 0)
+    results = json.loads(output_file.read_text())
+    assert(list(results["results"]) == ["curve_df_array_10k"])
+
+    results["results"]["curve_df_array_10k"]["seconds"] = 1e-12
+    baseline_file = tmp_path / "baseline.json"
+    baseline_file.write_text(json.dumps(results))
+    assert(main(["--filter", "curve_df_array", "--baseline", str(baseline_file)]) == 1)
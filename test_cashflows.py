@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from datetime import date
+from cashflows import can_compile, compile_cashflows
+from instruments import LiborDeposit, EurodollarFuture, InterestRateSwap, OisBasisSwap
+from interestratecurve import InterestRateCurve
+
+@pytest.fixture
+def test_curves():
+    base_date = date(2018, 7, 13)
+    libor_dates = [date(2018, 10, 15), date(2019, 1, 15), date(2019, 7, 15), date(2023, 7, 17)]
+    libor_dfs = [0.9950, 0.9880, 0.9750, 0.8900]
+    libor_curve = InterestRateCurve(base_date, libor_dates, libor_dfs)
+    ois_dates = [date(2018, 7, 15)] + libor_dates
+    ois_dfs = [0.9999, 0.9945, 0.9900, 0.9800, 0.9000]
+    ois_curve = InterestRateCurve(base_date, ois_dates, ois_dfs)
+    return libor_curve, ois_curve
+
+
+def test_values_match_instruments(test_curves):
+    libor_curve, ois_curve = test_curves
+    start_date = date(2018, 7, 17)
+    instruments = [LiborDeposit(1e6, start_date, 3, 0.0150),
+                   InterestRateSwap(1e6, start_date, 60, 0.0300),
+                   OisBasisSwap(-5e6, start_date, 24, 0.0020),
+                   InterestRateSwap(-2e7, date(2019, 7, 17), 24, 0.0250)]
+    compiled = compile_cashflows(instruments)
+    expected = [instrument.value(libor_curve, ois_curve) for instrument in instruments]
+    assert(compiled.values(libor_curve, ois_curve) == pytest.approx(expected, rel=1e-12, abs=1e-8))
+
+
+def test_node_sensitivities_match_instruments(test_curves):
+    libor_curve, ois_curve = test_curves
+    start_date = date(2018, 7, 17)
+    instruments = [LiborDeposit(1e6, start_date, 3, 0.0150),
+                   InterestRateSwap(1e6, start_date, 60, 0.0300),
+                   OisBasisSwap(-5e6, start_date, 24, 0.0020)]
+    weights = np.array([2.0, -1.0, 0.5])
+    compiled = compile_cashflows(instruments)
+    for (libor, ois) in [(libor_curve, ois_curve), (libor_curve, libor_curve)]:
+        (libor_sensitivities, ois_sensitivities) = compiled.node_sensitivities(libor, ois, weights)
+        expected = [sum(weight * instrument.node_sensitivities(libor, ois)[i]
+                        for (weight, instrument) in zip(weights, instruments)) for i in range(2)]
+        if libor is ois:
+            assert(libor_sensitivities + ois_sensitivities == pytest.approx(expected[0] + expected[1], rel=1e-10))
+        else:
+            assert(libor_sensitivities == pytest.approx(expected[0], rel=1e-10))
+            assert(ois_sensitivities == pytest.approx(expected[1], rel=1e-10))
+
+
+def test_empty_and_unsupported(test_curves):
+    libor_curve, ois_curve = test_curves
+    assert(len(compile_cashflows([]).values(libor_curve, ois_curve)) == 0)
+    assert(not can_compile(EurodollarFuture(2019, 6)))
+    assert(can_compile(LiborDeposit(1e6, date(2018, 7, 18), 3, 0.015)))
+    with pytest.raises(ValueError):
+        compile_cashflows([EurodollarFuture(2019, 6)])
@@ -0,0 +1,107 @@
+import threading
+import time
+import numpy as np
+import pytest
+from datetime import date
+import curvestrippers
+from curvecache import CurveCache, curve_key
+from instruments import InterestRateSwap, LiborDeposit, OisBasisSwap
+
+base_date = date(2018, 7, 16)
+spot_start_date = date(2018, 7, 18)
+
+
+def make_inputs(swap_rate=0.0300):
+    return [LiborDeposit(1e6, spot_start_date, 3, 0.0150),
+            InterestRateSwap(1e6, spot_start_date, 60, swap_rate),
+            OisBasisSwap(1e6, spot_start_date, 3, 0.0005),
+            OisBasisSwap(1e6, spot_start_date, 60, 0.0030)]
+
+
+def test_curve_key():
+    assert(curve_key(base_date, make_inputs()) == curve_key(base_date, make_inputs()))
+    assert(curve_key(base_date, make_inputs()) != curve_key(base_date, make_inputs(0.0301)))
+    assert(curve_key(base_date, make_inputs()) != curve_key(date(2018, 7, 17), make_inputs()))
+    assert(curve_key(base_date, make_inputs(), method="global")
+           != curve_key(base_date, make_inputs(), method="bootstrap"))
+
+
+def test_curve_key_numpy_scalars():
+    swap = InterestRateSwap(1e6, spot_start_date, 60, 0.0300)
+    assert(curve_key(base_date, [(swap, np.float64(0.03))], max_iterations=np.int64(20))
+           == curve_key(base_date, [(swap, 0.03)], max_iterations=20))
+
+
+def test_curve_key_inherited_slots():
+    class Base:
+        __slots__ = ("rate",)
+
+    class Derived(Base):
+        __slots__ = "tenor"
+
+        def __init__(self, rate, tenor):
+            self.rate = rate
+            self.tenor = tenor
+
+    assert(curve_key(base_date, [Derived(0.03, 60)]) == curve_key(base_date, [Derived(0.03, 60)]))
+    assert(curve_key(base_date, [Derived(0.03, 60)]) != curve_key(base_date, [Derived(0.04, 60)]))
+    assert(curve_key(base_date, [Derived(0.03, 60)]) != curve_key(base_date, [Derived(0.03, 120)]))
+
+
+def test_hits_misses_and_eviction():
+    now = [0.0]
+    cache = CurveCache(max_size=1, ttl_seconds=10.0, clock=lambda: now[0])
+    curves = cache.strip_libor_and_ois_curves(base_date, make_inputs())
+    assert(cache.strip_libor_and_ois_curves(base_date, make_inputs()) is curves)
+    assert(cache.stats() == {"hits": 1, "misses": 1, "coalesced": 0, "evictions": 0, "expirations": 0, "size": 1})
+
+    cache.strip_libor_and_ois_curves(base_date, make_inputs(0.0301))
+    assert(cache.stats()["evictions"] == 1)
+    now[0] = 11.0
+    cache.strip_libor_and_ois_curves(base_date, make_inputs(0.0301))
+    assert(cache.stats()["expirations"] == 1)
+    assert(cache.stats()["misses"] == 3)
+
+    libor_curve = cache.strip_libor_curve(base_date, make_inputs()[:2])
+    assert(libor_curve.dfs == pytest.approx(curvestrippers.strip_libor_curve(base_date, make_inputs()[:2]).dfs))
+
+
+def test_single_flight(monkeypatch):
+    release = threading.Event()
+    strips = []
+    strip = curvestrippers.strip_libor_and_ois_curves
+
+    def slow_strip(*args, **kwargs):
+        strips.append(args)
+        release.wait()
+        return strip(*args, **kwargs)
+
+    monkeypatch.setattr(curvestrippers, "strip_libor_and_ois_curves", slow_strip)
+    cache = CurveCache()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.strip_libor_and_ois_curves(base_date, make_inputs())))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 10.0
+    while cache.stats()["misses"] + cache.stats()["coalesced"] < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert(len(strips) == 1)
+    assert(all(result is results[0] for result in results))
+    assert(cache.stats()["coalesced"] == 3)
+
+
+def test_failed_strip_is_not_cached(monkeypatch):
+    def failing_strip(*args, **kwargs):
+        raise ValueError("Could not strip")
+
+    monkeypatch.setattr(curvestrippers, "strip_libor_and_ois_curves", failing_strip)
+    cache = CurveCache()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.strip_libor_and_ois_curves(base_date, make_inputs())
+    assert(cache.stats()["misses"] == 2)
+    assert(cache.stats()["size"] == 0)
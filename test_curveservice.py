@@ -0,0 +1,120 @@
+import asyncio
+import json
+import pytest
+from pytest import approx
+from datetime import date
+from curveservice import CurveService, replay_ticks
+from curvestrippers import strip_libor_and_ois_curves
+from instruments import EurodollarFuture, InterestRateSwap, LiborDeposit, OisBasisSwap
+
+BASE_DATE = date(2018, 7, 16)
+SPOT_START_DATE = date(2018, 7, 18)
+KEYS = ["3M", "EDZ9", "5Y", "OIS 2Y", "OIS 5Y"]
+
+
+def _inputs(deposit_rate=0.0150, future_price=98.40, swap_rate=0.0300, basis_2y=0.0020, basis_5y=0.0030):
+    return [LiborDeposit(1e6, SPOT_START_DATE, 3, deposit_rate),
+            (EurodollarFuture(2019, 12), future_price),
+            InterestRateSwap(1e6, SPOT_START_DATE, 60, swap_rate),
+            OisBasisSwap(1e6, SPOT_START_DATE, 24, basis_2y),
+            OisBasisSwap(1e6, SPOT_START_DATE, 60, basis_5y)]
+
+
+async def _feed(ticks):
+    for tick in ticks:
+        yield tick
+
+
+def test_burst_is_coalesced():
+    service = CurveService(BASE_DATE, _inputs(), keys=KEYS)
+    assert(service.latest.version == 0)
+    ticks = [("5Y", 0.0300 + 0.0001 * i) for i in range(20)] + [("OIS 5Y", 0.0031)]
+    # Ticks submitted before the service runs are all applied by one strip.
+    for (key, quote) in ticks:
+        service.submit(key, quote)
+    asyncio.run(service.run(_feed([])))
+    assert(service.stats()["ticks"] == 21)
+    assert(service.stats()["strips"] == 1)
+
+    snapshot = service.latest
+    assert(snapshot.version == 1)
+    assert(snapshot.quotes == (0.0150, 98.40, 0.0319, 0.0020, 0.0031))
+    (libor_curve, ois_curve) = strip_libor_and_ois_curves(BASE_DATE, _inputs(swap_rate=0.0319, basis_5y=0.0031))
+    assert(snapshot.libor_curve.dfs == approx(libor_curve.dfs, rel=1e-8))
+    assert(snapshot.ois_curve.dfs == approx(ois_curve.dfs, rel=1e-8))
+
+
+def test_replay(tmp_path):
+    tick_file = tmp_path / "ticks.jsonl"
+    ticks = [{"key": "3M", "quote": 0.0151, "time": 0.0}, {"key": "EDZ9", "quote": 98.35, "time": 0.01},
+             {"key": "3M", "quote": 0.0152, "time": 0.02}, {"key": "OIS 2Y", "quote": 0.0021, "time": 0.03}]
+    tick_file.write_text("".join(json.dumps(tick) + "\n" for tick in ticks))
+    service = CurveService(BASE_DATE, _inputs(), keys=KEYS)
+    seen_versions = []
+
+    async def read_curves(done):
+        while not done.is_set():
+            snapshot = service.latest
+            seen_versions.append(snapshot.version)
+            assert(len(snapshot.quotes) == len(KEYS))
+            await asyncio.sleep(0.001)
+
+    async def main():
+        done = asyncio.Event()
+        reader = asyncio.ensure_future(read_curves(done))
+        await service.run(replay_ticks(tick_file, speed=1.0))
+        done.set()
+        await reader
+
+    asyncio.run(main())
+    stats = service.stats()
+    assert(stats["ticks"] == 4)
+    assert(1 <= stats["strips"] <= 4)
+    assert(seen_versions == sorted(seen_versions))
+    assert(service.latest.quotes == (0.0152, 98.35, 0.0300, 0.0021, 0.0030))
+    (libor_curve, ois_curve) = strip_libor_and_ois_curves(
+        BASE_DATE, _inputs(deposit_rate=0.0152, future_price=98.35, basis_2y=0.0021))
+    assert(service.latest.libor_curve.dfs == approx(libor_curve.dfs, rel=1e-8))
+
+
+def test_failed_strip_keeps_curves():
+    service = CurveService(BASE_DATE, _inputs(), keys=KEYS)
+    service.submit("EDZ9", float("nan"))
+    asyncio.run(service.run(_feed([])))
+    assert(service.stats()["failed_strips"] == 1)
+    assert(service.latest.version == 0)
+    assert(service.last_error is not None)
+    asyncio.run(service.run(_feed([("EDZ9", 98.30)])))
+    assert(service.latest.version == 1)
+    assert(service.latest.quotes[1] == 98.30)
+
+
+def test_failed_ticks_are_kept():
+    service = CurveService(BASE_DATE, _inputs(), keys=KEYS)
+    # The good tick arrives with a bad one, and is still applied once the bad input ticks again.
+    service.submit("EDZ9", float("nan"))
+    service.submit("5Y", 0.0310)
+    asyncio.run(service.run(_feed([])))
+    assert(service.stats()["failed_strips"] == 1)
+    asyncio.run(service.run(_feed([("EDZ9", 98.30)])))
+    assert(service.latest.quotes == (0.0150, 98.30, 0.0310, 0.0020, 0.0030))
+    (libor_curve, _) = strip_libor_and_ois_curves(BASE_DATE, _inputs(future_price=98.30, swap_rate=0.0310))
+    assert(service.latest.libor_curve.dfs == approx(libor_curve.dfs, rel=1e-8))
+
+
+def test_malformed_tick():
+    service = CurveService(BASE_DATE, _inputs(), keys=KEYS)
+    asyncio.run(service.run(_feed([("3M", "0.0151")])))
+    assert(service.stats()["failed_strips"] == 1)
+    assert(service.last_error is not None)
+    assert(service.latest.version == 0)
+    asyncio.run(service.run(_feed([("3M", 0.0151)])))
+    assert(service.latest.version == 1)
+
+
+def test_unknown_key():
+    service = CurveService(BASE_DATE, _inputs(), keys=KEYS)
+    with pytest.raises(KeyError):
+        service.submit("10Y", 0.03)
+    with pytest.raises(ValueError):
+        CurveService(BASE_DATE, _inputs(), keys=KEYS[:-1])
@@ -0,0 +1,138 @@
+import numpy as np
+import os
+import pytest
+import subprocess
+import sys
+from datetime import date, timedelta
+from curvestore import CurveStore, append_curves, compact_store, save_curves
+from daycountconvention import actual_360
+from instruments import InterestRateSwap
+from interestratecurve import InterestRateCurve
+from interpolation import MonotoneConvexInterpolator
+
+
+def _curves():
+    curves = []
+    for day in range(10):
+        base_date = date(2018, 7, 2) + timedelta(days=day)
+        dates = [base_date + timedelta(days=days) for days in (91, 182, 365 + day, 1826)]
+        dfs = [0.995 - 0.0001 * day, 0.99, 0.975, 0.88 + 0.001 * day]
+        curves.append(InterestRateCurve(base_date, dates, dfs))
+    return curves
+
+
+def test_save_and_open(tmp_path):
+    curves = _curves()
+    save_curves(tmp_path, reversed(curves))
+    store = CurveStore(tmp_path)
+    assert(len(store) == 10)
+    assert(store.base_dates == [curve.base_date for curve in curves])
+    assert(date(2018, 7, 5) in store)
+    assert(date(2018, 8, 5) not in store)
+    assert(not store.has_ois_curves)
+    with pytest.raises(KeyError):
+        store.curve(date(2018, 8, 5))
+    (libor_curve, ois_curve) = store.curves(date(2018, 7, 5))
+    assert(libor_curve is ois_curve)
+
+    for curve in curves:
+        stored = store.curve(curve.base_date)
+        assert(stored.dates == curve.dates)
+        assert(stored.dfs == pytest.approx(curve.dfs, rel=1e-15))
+
+    curve = curves[3]
+    dates = [curve.base_date + timedelta(days=days) for days in range(0, 2000, 97)]
+    assert(np.allclose(store.df_array(curve.base_date, dates), curve.df_array(dates), rtol=1e-14))
+    start_dates = dates[:-1]
+    end_dates = dates[1:]
+    assert(np.allclose(store.forward_array(curve.base_date, start_dates, end_dates, actual_360),
+                       curve.forward_array(start_dates, end_dates, actual_360), rtol=1e-12))
+
+
+def test_interpolation(tmp_path):
+    curve = _curves()[0]
+    save_curves(tmp_path, [curve])
+    stored = CurveStore(tmp_path, interpolation=MonotoneConvexInterpolator).curve(curve.base_date)
+    assert(stored.interpolation is MonotoneConvexInterpolator)
+
+
+def test_duplicate_base_dates(tmp_path):
+    curve = _curves()[0]
+    with pytest.raises(ValueError):
+        save_curves(tmp_path, [curve, curve])
+
+
+def _ois_curves():
+    return [InterestRateCurve(curve.base_date, curve.dates, [df + 0.001 for df in curve.dfs]) for curve in _curves()]
+
+
+def test_libor_and_ois_curves(tmp_path):
+    curves = _curves()
+    ois_curves = _ois_curves()
+    save_curves(tmp_path, curves, reversed(ois_curves))
+    store = CurveStore(tmp_path)
+    assert(store.has_ois_curves)
+    for (curve, ois_curve) in zip(curves, ois_curves):
+        (stored_libor_curve, stored_ois_curve) = store.curves(curve.base_date)
+        assert(store.curve(curve.base_date).dfs == stored_libor_curve.dfs)
+        assert(stored_libor_curve.dfs == pytest.approx(curve.dfs, rel=1e-15))
+        assert(stored_ois_curve.dates == ois_curve.dates)
+        assert(stored_ois_curve.dfs == pytest.approx(ois_curve.dfs, rel=1e-15))
+    with pytest.raises(ValueError):
+        save_curves(tmp_path, curves, ois_curves[1:])
+
+    # Saving single-curve strips over the store drops its OIS curves.
+    save_curves(tmp_path, curves)
+    assert(not CurveStore(tmp_path).has_ois_curves)
+
+
+def test_pricing_does_not_import_scipy(tmp_path):
+    curve = _curves()[0]
+    ois_curve = _ois_curves()[0]
+    save_curves(tmp_path, [curve], [ois_curve])
+    script = ("import sys\n"
+              "from datetime import date\n"
+              "from curvestore import CurveStore\n"
+              "from instruments import InterestRateSwap\n"
+              "import curvestrippers\n"
+              "curves = CurveStore(sys.argv[1]).curves(date(2018, 7, 2))\n"
+              "print(InterestRateSwap(1e6, date(2018, 7, 4), 24, 0.025).value(*curves))\n"
+              "print(any(module.split('.')[0] == 'scipy' for module in sys.modules))\n")
+    output = subprocess.run([sys.executable, "-c", script, str(tmp_path)], check=True, capture_output=True,
+                            text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+    swap = InterestRateSwap(1e6, date(2018, 7, 4), 24, 0.025)
+    assert(float(output[0]) == pytest.approx(swap.value(curve, ois_curve), rel=1e-12))
+    assert(output[1] == "False")
+
+
+def test_append_and_compact(tmp_path):
+    curves = _curves()
+    ois_curves = _ois_curves()
+    append_curves(tmp_path, curves[:4], ois_curves[:4])
+    append_curves(tmp_path, curves[4:], ois_curves[4:])
+    # A later segment replaces the curves of a base date that is already stored.
+    replacement = InterestRateCurve(curves[2].base_date, curves[2].dates, [0.9, 0.8, 0.7, 0.6])
+    append_curves(tmp_path, [replacement], [ois_curves[2]])
+    store = CurveStore(tmp_path)
+    assert(store.has_ois_curves)
+    assert(store.base_dates == [curve.base_date for curve in curves])
+    assert(store.curve(curves[2].base_date).dfs == pytest.approx(replacement.dfs, rel=1e-15))
+    assert(store.curves(curves[7].base_date)[1].dfs == pytest.approx(ois_curves[7].dfs, rel=1e-15))
+
+    compact_store(tmp_path)
+    assert(len([name for name in os.listdir(tmp_path) if name.startswith("segment_")]) == 1)
+    compacted = CurveStore(tmp_path)
+    assert(compacted.base_dates == store.base_dates)
+    for base_date in store.base_dates:
+        assert(compacted.curves(base_date)[0].dfs == store.curves(base_date)[0].dfs)
+        assert(compacted.curves(base_date)[1].dfs == store.curves(base_date)[1].dfs)
+
+    # Appending single-curve strips to a store of two-curve strips is caught when it is opened.
+    append_curves(tmp_path, curves[:1])
+    with pytest.raises(ValueError):
+        CurveStore(tmp_path)
+    # Saving a new store removes the segments.
+    save_curves(tmp_path, curves[:2])
+    assert(CurveStore(tmp_path).base_dates == [curve.base_date for curve in curves[:2]])
+    with pytest.raises(FileNotFoundError):
+        CurveStore(tmp_path / "missing")
@@ -1,8 +1,10 @@
+import numpy as np
 import pytest
-from datetime import date
+from datetime import date, timedelta
 from dates import (is_business_day, adjust_following, adjust_preceding,
-                   adjust_modified_following, add_business_days, third_wednesday,
-                   add_months_mod_foll, date_schedule)
+                   adjust_modified_following, add_business_days, third_wednesday, third_wednesday_array,
+                   add_months_mod_foll, add_months_mod_foll_array, date_schedule, date_schedules, BusinessCalendar,
+                   schedule_cache_info, IMM_TABLE_START_YEAR, IMM_TABLE_END_YEAR)
 
 wednesday = date(2018, 7, 11)
 thursday = date(2018, 7, 12)
@@ -18,7 +20,6 @@ sunday_eom = date(2018, 9, 30)
 monday_eom = date(2018, 10, 1)
 
 
-@pytest.mark.xfail
 def test_is_business_day():
     assert(is_business_day(friday))
     assert(not is_business_day(saturday))
@@ -26,7 +27,6 @@ def test_is_business_day():
     assert(is_business_day(monday))
 
 
-@pytest.mark.xfail
 def test_adjust_following():
     assert(adjust_following(friday) == friday)
     assert(adjust_following(saturday) == monday)
@@ -36,7 +36,6 @@ def test_adjust_following():
     assert(adjust_following(sunday_eom) == monday_eom)
 
 
-@pytest.mark.xfail
 def test_adjust_modified_following():
     assert(adjust_modified_following(friday) == friday)
     assert(adjust_modified_following(saturday) == monday)
@@ -48,7 +47,6 @@ def test_adjust_modified_following():
     assert(adjust_modified_following(monday_eom) == monday_eom)
 
 
-@pytest.mark.xfail
 def test_add_business_days_usual():
     assert(add_business_days(wednesday, 1) == thursday)
     assert(add_business_days(wednesday, 2) == friday)
@@ -58,7 +56,6 @@ def test_add_business_days_usual():
     assert(add_business_days(thursday, 2) == monday)
 
 
-@pytest.mark.xfail
 def test_add_business_days_on_weekends():
     with pytest.raises(ValueError):
         add_business_days(saturday, 1)
@@ -66,7 +63,6 @@ def test_add_business_days_on_weekends():
         add_business_days(sunday, 3)
 
 
-@pytest.mark.xfail
 def test_add_business_days_zero_days():
     assert(add_business_days(wednesday, 0) == wednesday)
     assert(add_business_days(friday, 0) == friday)
@@ -76,7 +72,6 @@ def test_add_business_days_zero_days():
         add_business_days(sunday, 0)
 
 
-@pytest.mark.xfail
 def test_add_business_days_negative_days():
     with pytest.raises(ValueError):
         add_business_days(wednesday, -1)
@@ -84,7 +79,6 @@ def test_add_business_days_negative_days():
         add_business_days(friday, -2)
 
 
-@pytest.mark.xfail
 def test_add_months_mod_foll():
     assert(add_months_mod_foll(date(2018, 7, 26), 3) == date(2018, 10, 26))
     assert(add_months_mod_foll(date(2018, 7, 27), 3) == date(2018, 10, 29))
@@ -92,7 +86,16 @@ def test_add_months_mod_foll():
     assert(add_months_mod_foll(date(2018, 6, 29), 1) == date(2018, 7, 30))
 
 
-@pytest.mark.xfail
+def test_add_months_mod_foll_array():
+    start_dates = [date(1955, 1, 31) + timedelta(days=i) for i in range(0, 70000, 13)]
+    for num_months in (1, 3, 12):
+        expected = [add_months_mod_foll(start_date, num_months).toordinal() for start_date in start_dates]
+        assert(add_months_mod_foll_array(start_dates, num_months).tolist() == expected)
+    calendar = BusinessCalendar([date(2018, 10, 26)])
+    assert(add_months_mod_foll_array([date(2018, 7, 26)], 3, calendar).tolist()
+           == [calendar.adjust_modified_following(date(2018, 10, 26)).toordinal()])
+
+
 def test_date_schedule_1():
     start_date = date(2018, 7, 13)
     period_in_months = 6
@@ -103,7 +106,6 @@ def test_date_schedule_1():
            == [(start_date, six_months), (six_months, one_year)])
 
 
-@pytest.mark.xfail
 def test_date_schedule_2():
     start_date = date(2018, 10, 1)
     period_in_months = 3
@@ -116,7 +118,6 @@ def test_date_schedule_2():
            == [(start_date, d1), (d1, d2), (d2, d3), (d3, d4)])
 
 
-@pytest.mark.xfail
 def test_date_schedule_mf():
     start_date = date(2018, 6, 29)
     period_in_months = 3
@@ -141,3 +142,86 @@ def test_third_wednesday():
     assert(third_wednesday(2018, 10) == date(2018, 10, 17))
     assert(third_wednesday(2018, 11) == date(2018, 11, 21))
     assert(third_wednesday(2019, 1) == date(2019, 1, 16))
+
+
+def test_third_wednesday_outside_table():
+    for year in (IMM_TABLE_START_YEAR - 1, IMM_TABLE_START_YEAR, IMM_TABLE_END_YEAR, IMM_TABLE_END_YEAR + 1):
+        for month in range(1, 13):
+            wednesday = third_wednesday(year, month)
+            assert(wednesday.weekday() == 2 and wednesday.month == month and 15 <= wednesday.day <= 21)
+    with pytest.raises(ValueError):
+        third_wednesday(2018, 13)
+
+
+def test_third_wednesday_array():
+    years = np.array([2018, 2018, 2019, 2020, 2100])
+    months = np.array([7, 12, 3, 2, 6])
+    assert(third_wednesday_array(years, months).tolist()
+           == [third_wednesday(year, month).toordinal() for (year, month) in zip(years, months)])
+    with pytest.raises(ValueError):
+        third_wednesday_array([IMM_TABLE_END_YEAR + 1], [1])
+    with pytest.raises(ValueError):
+        third_wednesday_array([2018], [0])
+
+
+def test_business_calendar_weekends_only():
+    calendar = BusinessCalendar(start_date=date(2018, 1, 1), end_date=date(2019, 12, 31))
+    dates = [date(2018, 1, 1) + timedelta(days=i) for i in range(700)]
+    for d in dates:
+        assert(calendar.is_business_day(d) == is_business_day(d))
+        assert(calendar.adjust_following(d) == adjust_following(d))
+        assert(calendar.adjust_preceding(d) == adjust_preceding(d))
+        assert(calendar.adjust_modified_following(d) == adjust_modified_following(d))
+    assert(list(calendar.adjust_modified_following_array(dates))
+           == [adjust_modified_following(d).toordinal() for d in dates])
+    assert(list(calendar.is_business_day_array(np.array(dates, dtype='datetime64[D]')))
+           == [is_business_day(d) for d in dates])
+    business_days = [d for d in dates[:600] if is_business_day(d)]
+    assert(list(calendar.add_business_days_array(business_days, 7))
+           == [add_business_days(d, 7).toordinal() for d in business_days])
+    assert(calendar.add_business_days(wednesday, 3) == monday)
+    with pytest.raises(ValueError):
+        calendar.add_business_days(saturday, 1)
+    with pytest.raises(ValueError):
+        calendar.add_business_days(wednesday, -1)
+    with pytest.raises(ValueError):
+        calendar.is_business_day(date(2020, 1, 1))
+
+
+def test_business_calendar_holidays(tmp_path):
+    new_york = tmp_path / "new_york.txt"
+    new_york.write_text("# US holidays\n2018-07-04\n2018-09-03\n")
+    london = tmp_path / "london.txt"
+    london.write_text("2018-08-27\n\n")
+    calendar = BusinessCalendar.from_holiday_files([new_york, london])
+    assert(not calendar.is_business_day(date(2018, 7, 4)))
+    assert(calendar.adjust_following(date(2018, 9, 1)) == date(2018, 9, 4))
+    assert(calendar.adjust_preceding(date(2018, 8, 27)) == date(2018, 8, 24))
+    assert(calendar.add_business_days(date(2018, 7, 3), 1) == date(2018, 7, 5))
+    assert(add_months_mod_foll(date(2018, 6, 4), 3, calendar) == date(2018, 9, 4))
+    assert(date_schedule(date(2018, 6, 4), 3, 3, calendar) == [(date(2018, 6, 4), date(2018, 9, 4))])
+    with pytest.raises(ValueError):
+        date_schedule(date(2018, 7, 4), 3, 3, calendar)
+
+
+def test_date_schedule_cache():
+    start_date = date(2018, 6, 29)
+    schedule = date_schedule(start_date, 3, 24)
+    hits = schedule_cache_info().hits
+    schedule.append(None)  # Callers get their own copy of the cached schedule.
+    assert(date_schedule(start_date, 3, 24) == schedule[:-1])
+    assert(schedule_cache_info().hits == hits + 1)
+
+
+def test_date_schedules():
+    start_dates = [d for d in (date(2018, 1, 1) + timedelta(days=i) for i in range(400)) if is_business_day(d)]
+    schedules = date_schedules(start_dates, 3, 24)
+    assert(schedules.shape == (len(start_dates), 9))
+    for (start_date, row) in zip(start_dates, schedules):
+        schedule = date_schedule(start_date, 3, 24)
+        expected = [start_date] + [end_date for (_, end_date) in schedule]
+        assert(list(row) == [d.toordinal() for d in expected])
+    with pytest.raises(ValueError):
+        date_schedules([saturday], 3, 24)
+    with pytest.raises(ValueError):
+        date_schedules([friday], 3, 20)
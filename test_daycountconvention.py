@@ -0,0 +1,17 @@
+import numpy as np
+from datetime import date, timedelta
+from daycountconvention import actual_360, actual_365, thirty_360
+
+
+def test_yf_array_agrees_with_yf():
+    start_dates = [date(2016, 1, 1) + timedelta(days=i) for i in range(0, 1200, 7)]
+    end_dates = [start_date + timedelta(days=j) for start_date in start_dates for j in [0, 1, 29, 30, 31, 59, 92, 366]]
+    start_dates = [start_date for start_date in start_dates for _ in range(8)]
+    # Month ends, where the 30/360 rules apply.
+    start_dates += [date(2018, 1, 31), date(2018, 1, 30), date(2018, 2, 28), date(2016, 2, 29), date(2018, 3, 31)]
+    end_dates += [date(2018, 3, 31), date(2018, 3, 31), date(2018, 8, 31), date(2017, 2, 28), date(2018, 4, 30)]
+    for dcc in [actual_360, actual_365, thirty_360]:
+        expected = [dcc.yf(start_date, end_date) for (start_date, end_date) in zip(start_dates, end_dates)]
+        assert(list(dcc.yf_array(start_dates, end_dates)) == expected)
+        assert(list(dcc.yf_array(np.array(start_dates, dtype='datetime64[D]'),
+                                 [end_date.toordinal() for end_date in end_dates])) == expected)
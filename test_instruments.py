@@ -1,7 +1,8 @@
 import pytest
+import numpy as np
 from datetime import date
 from daycountconvention import actual_360, thirty_360
-from instruments import LiborDeposit, EurodollarFuture, InterestRateSwap, OisBasisSwap
+from instruments import LiborDeposit, EurodollarFuture, EurodollarFutureStrip, InterestRateSwap, OisBasisSwap
 from interestratecurve import InterestRateCurve
 
 # Define curves for use in all the tests
@@ -17,7 +18,16 @@ def test_curves():
     return libor_curve, ois_curve
 
 
-@pytest.mark.xfail
+def _bumped_sensitivities(value_function, curve, bump=1e-7):
+    """Central finite-difference sensitivities of a function of the curve to each of its node DFs."""
+    def bumped_value(i, bump):
+        bumped_dfs = list(curve.dfs)
+        bumped_dfs[i] += bump
+        return value_function(InterestRateCurve(curve.base_date, curve.dates, bumped_dfs))
+
+    return [(bumped_value(i, bump) - bumped_value(i, -bump)) / (2.0 * bump) for i in range(len(curve.dfs))]
+
+
 class TestLiborDeposit:
 
     def test_basic(self):
@@ -32,9 +42,16 @@ class TestLiborDeposit:
         ois_curve = InterestRateCurve(start_date, [end_date], [1.0])
         assert(abs(libor_deposit.value(libor_curve, ois_curve)) < 1e-6)
 
+    def test_node_sensitivities(self, test_curves):
+        libor_deposit = LiborDeposit(1e6, date(2018, 7, 17), 3, 0.02)
+        libor_curve, ois_curve = test_curves
+        libor_sensitivities, ois_sensitivities = libor_deposit.node_sensitivities(libor_curve, ois_curve)
+        assert(libor_sensitivities == pytest.approx(_bumped_sensitivities(
+            lambda curve: libor_deposit.value(curve, ois_curve), libor_curve), rel=1e-5))
+        assert(not ois_sensitivities.any())
+
 
 
-@pytest.mark.xfail
 class TestEurodollarFutures:
 
     def test_basic(self):
@@ -52,8 +69,50 @@ class TestEurodollarFutures:
                                         [start_df, end_df])
         assert(abs(edf.price(libor_curve) - 98.5) < 1e-9)
 
+    def test_price_sensitivities(self, test_curves):
+        edf = EurodollarFuture(2018, 12)
+        libor_curve, _ = test_curves
+        assert(edf.price_sensitivities(libor_curve)
+               == pytest.approx(_bumped_sensitivities(edf.price, libor_curve), rel=1e-5, abs=1e-6))
+
+    def test_node_sensitivities(self, test_curves):
+        edf = EurodollarFuture(2019, 3)
+        libor_curve, ois_curve = test_curves
+        assert(edf.value(libor_curve, ois_curve) == edf.price(libor_curve))
+        libor_sensitivities, ois_sensitivities = edf.node_sensitivities(libor_curve, ois_curve)
+        assert(list(libor_sensitivities) == pytest.approx(list(edf.price_sensitivities(libor_curve)), rel=1e-14))
+        assert(len(ois_sensitivities) == len(ois_curve.dates) and not ois_sensitivities.any())
+
+    def test_strip(self, test_curves):
+        libor_curve, _ = test_curves
+        futures = [EurodollarFuture(2018 + (i + 2) // 4, 3 * ((i + 2) % 4) + 3) for i in range(12)]
+        strip = EurodollarFutureStrip(futures)
+        assert(len(strip) == 12)
+        prices = strip.prices(libor_curve)
+        assert(prices.tolist() == pytest.approx([edf.price(libor_curve) for edf in futures], rel=1e-14))
+
+        adjusted_prices = strip.prices(libor_curve, convexity_volatility=0.01)
+        (t1, t2) = ((futures[-1].start_date - libor_curve.base_date).days / 365.0,
+                    (futures[-1].end_date - libor_curve.base_date).days / 365.0)
+        assert(prices[-1] - adjusted_prices[-1] == pytest.approx(100.0 * 0.5 * 0.01**2 * t1 * t2, rel=1e-9))
+        assert(all(adjusted_prices < prices))
+        assert(EurodollarFutureStrip([]).prices(libor_curve).shape == (0,))
+
+    def test_strip_from_expiries(self, test_curves):
+        libor_curve, _ = test_curves
+        years = [1950 + i // 12 for i in range(2400)]
+        months = [i % 12 + 1 for i in range(2400)]
+        futures = [EurodollarFuture(year, month) for (year, month) in zip(years, months)]
+        strip = EurodollarFutureStrip.from_expiries(np.array(years), np.array(months))
+        assert(len(strip) == 2400)
+        assert(strip.start_dates.tolist() == [future.start_date.toordinal() for future in futures])
+        assert(strip.end_dates.tolist() == [future.end_date.toordinal() for future in futures])
+        assert([(future.start_date, future.end_date) for future in strip.futures]
+               == [(future.start_date, future.end_date) for future in futures])
+        with pytest.raises(ValueError):
+            EurodollarFutureStrip.from_expiries([2151], [3])
+
 
-@pytest.mark.xfail
 class TestInterestRateSwap:
 
     def test_floating_leg_same_curve(self, test_curves):
@@ -121,9 +180,34 @@ class TestInterestRateSwap:
         swap2 = InterestRateSwap(-10.0 * notional, start_date, tenor_in_months, 2.0 * fixed_rate)
         swap_value2 = -10.0 * (swap_value - fixed_leg_value)
         assert(abs(swap2.value(libor_curve, ois_curve) - swap_value2) < 1e-9)
+
+    def test_node_sensitivities(self, test_curves):
+        swap = InterestRateSwap(1e6, date(2018, 7, 17), 18, 0.02)
+        libor_curve, ois_curve = test_curves
+        libor_sensitivities, ois_sensitivities = swap.node_sensitivities(libor_curve, ois_curve)
+        assert(libor_sensitivities == pytest.approx(_bumped_sensitivities(
+            lambda curve: swap.value(curve, ois_curve), libor_curve), rel=1e-5))
+        assert(ois_sensitivities == pytest.approx(_bumped_sensitivities(
+            lambda curve: swap.value(libor_curve, curve), ois_curve), rel=1e-5))
         
 
-@pytest.mark.xfail
+    def test_packed_legs(self, test_curves):
+        libor_curve, ois_curve = test_curves
+        swap = InterestRateSwap(1e6, date(2018, 7, 31), 24, 0.02)
+        assert(len(swap.fixed_leg) == 4 and len(swap.libor_leg) == 8)
+        fixed_flows = swap.fixed_flows
+        assert([flow.amount for flow in fixed_flows] == list(swap.fixed_leg["amount"]))
+        assert([flow.end_date.toordinal() for flow in swap.libor_flows] == list(swap.libor_leg["end_date"]))
+        flow_value = sum(flow.value(libor_curve, ois_curve) for flow in fixed_flows + swap.libor_flows)
+        assert(swap.value(libor_curve, ois_curve) == pytest.approx(flow_value, rel=1e-12))
+
+        moved_swap = swap.with_quote(0.03)
+        assert(moved_swap.libor_leg is swap.libor_leg)
+        assert(list(swap.fixed_leg["amount"]) == [flow.amount for flow in fixed_flows])
+        assert(moved_swap.value(libor_curve, ois_curve)
+               == pytest.approx(InterestRateSwap(1e6, date(2018, 7, 31), 24, 0.03).value(libor_curve, ois_curve)))
+
+
 class TestOisBasisSwap:
 
     def test_zero_value_for_same_curve(self, test_curves):
@@ -156,3 +240,12 @@ class TestOisBasisSwap:
 
         actual_value = swap.value(libor_curve, ois_curve)
         assert(abs(actual_value - expected_value) < 1e-9)
+
+    def test_node_sensitivities(self, test_curves):
+        swap = OisBasisSwap(1e6, date(2018, 7, 17), 12, 0.0020)
+        libor_curve, ois_curve = test_curves
+        libor_sensitivities, ois_sensitivities = swap.node_sensitivities(libor_curve, ois_curve)
+        assert(libor_sensitivities == pytest.approx(_bumped_sensitivities(
+            lambda curve: swap.value(curve, ois_curve), libor_curve), rel=1e-5))
+        assert(ois_sensitivities == pytest.approx(_bumped_sensitivities(
+            lambda curve: swap.value(libor_curve, curve), ois_curve), rel=1e-5))
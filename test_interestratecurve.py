@@ -1,8 +1,11 @@
+import numpy as np
 import pytest
 from math import log
 from datetime import date, timedelta
 from daycountconvention import actual_365, actual_360
-from interestratecurve import InterestRateCurve
+from interestratecurve import InterestRateCurve, MutableInterestRateCurve
+from interpolation import (LogLinearInterpolator, LinearZeroRateInterpolator,
+                           NaturalCubicLogDfInterpolator, MonotoneConvexInterpolator)
 
 def test_basic():
     base_date = date(2018, 7, 9)
@@ -47,3 +50,70 @@ def test_forward():
     forward = curve.forward(start_date, end_date, actual_360)
     yf = actual_360.yf(start_date, end_date)
     assert(abs(start_df / (1.0 + forward * yf) - end_df) < 1e-9)
+
+def test_df_array_and_forward_array():
+    base_date = date(2018, 7, 13)
+    dates = [date(2018, 10, 1), date(2019, 1, 1), date(2020, 1, 1)]
+    dfs = [0.97, 0.95, 0.90]
+    curve = InterestRateCurve(base_date, dates, dfs)
+
+    query_dates = [base_date, date(2018, 8, 15), date(2018, 10, 1), date(2019, 6, 3), date(2021, 2, 1)]
+    expected = [curve.df(d) for d in query_dates]
+    assert(curve.df_array(query_dates) == pytest.approx(expected, rel=1e-15))
+    assert(curve.df_array(np.array(query_dates, dtype='datetime64[D]'))
+           == pytest.approx(expected, rel=1e-15))
+    assert(curve.df_array([d.toordinal() for d in query_dates]) == pytest.approx(expected, rel=1e-15))
+    with pytest.raises(ValueError):
+        curve.df_array([base_date + timedelta(days=-1)])
+
+    start_dates = query_dates[:-1]
+    end_dates = query_dates[1:]
+    expected = [curve.forward(s, e, actual_360) for (s, e) in zip(start_dates, end_dates)]
+    assert(curve.forward_array(start_dates, end_dates, actual_360) == pytest.approx(expected, rel=1e-12))
+
+
+def test_df_gradient():
+    base_date = date(2018, 7, 13)
+    dates = [date(2018, 10, 1), date(2019, 1, 1), date(2020, 1, 1)]
+    dfs = [0.97, 0.95, 0.90]
+    curve = InterestRateCurve(base_date, dates, dfs)
+    bump = 1e-7
+    for query_date in [base_date, date(2018, 8, 15), date(2019, 1, 1), date(2019, 6, 3), date(2021, 2, 1)]:
+        gradient = curve.df_gradient(query_date)
+        for i in range(len(dfs)):
+            bumped_dfs = list(dfs)
+            bumped_dfs[i] += bump
+            bumped_curve = InterestRateCurve(base_date, dates, bumped_dfs)
+            finite_difference = (bumped_curve.df(query_date) - curve.df(query_date)) / bump
+            assert(gradient[i] == pytest.approx(finite_difference, abs=1e-6))
+
+    query_dates = [base_date, date(2018, 8, 15), date(2019, 1, 1), date(2021, 2, 1)]
+    gradients = curve.df_gradient_array(query_dates)
+    for (query_date, gradient) in zip(query_dates, gradients):
+        assert(list(gradient) == pytest.approx(list(curve.df_gradient(query_date)), rel=1e-14))
+    with pytest.raises(ValueError):
+        curve.df_gradient_array([date(2018, 7, 1)])
+
+    adjoints = np.array([1.0, -2.0, 0.5, 3.0])
+    assert(list(curve.df_adjoint(query_dates, adjoints)) == pytest.approx(list(adjoints @ gradients), rel=1e-14))
+
+
+@pytest.mark.parametrize("interpolation", [LogLinearInterpolator, LinearZeroRateInterpolator,
+                                           NaturalCubicLogDfInterpolator, MonotoneConvexInterpolator])
+def test_mutable_curve(interpolation):
+    base_date = date(2018, 7, 13)
+    dates = [date(2018, 10, 1), date(2019, 1, 1), date(2020, 1, 1)]
+    mutable_curve = MutableInterestRateCurve(base_date, dates, interpolation=interpolation)
+    query_dates = [base_date + timedelta(days=i) for i in range(0, 1000, 3)] + dates
+    for dfs in [[0.97, 0.95, 0.90], [0.99, 0.96, 0.85]]:
+        mutable_curve.set_dfs(dfs)
+        curve = InterestRateCurve(base_date, dates, dfs, interpolation)
+        assert(mutable_curve.dfs == dfs)
+        assert([mutable_curve.df(d) for d in query_dates] == [curve.df(d) for d in query_dates])
+        assert(list(mutable_curve.df_array(query_dates)) == list(curve.df_array(query_dates)))
+        assert(list(mutable_curve.df_gradient(date(2019, 6, 3))) == list(curve.df_gradient(date(2019, 6, 3))))
+        adjoints = np.linspace(-1.0, 1.0, len(query_dates))
+        assert(list(mutable_curve.df_adjoint(query_dates, adjoints)) == list(curve.df_adjoint(query_dates, adjoints)))
+        assert(mutable_curve.to_curve().dfs == dfs)
+    with pytest.raises(ValueError):
+        mutable_curve.df(base_date + timedelta(days=-1))
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from interpolation import (LogLinearInterpolator, LinearZeroRateInterpolator,
+                           NaturalCubicLogDfInterpolator, MonotoneConvexInterpolator,
+                           _monotone_convex_integral, _monotone_convex_integral_partials)
+
+schemes = [LogLinearInterpolator, LinearZeroRateInterpolator, NaturalCubicLogDfInterpolator,
+           MonotoneConvexInterpolator]
+node_yfs = [0.0, 0.25, 0.5, 1.0, 2.0, 5.0]
+node_log_dfs = [0.0, -0.004, -0.009, -0.021, -0.05, -0.14]
+query_yfs = [0.0, 0.1, 0.25, 0.3, 0.7, 1.0, 1.5, 3.3, 5.0, 7.5]
+
+
+@pytest.mark.parametrize("scheme", schemes)
+def test_passes_through_nodes(scheme):
+    interpolator = scheme(node_yfs, node_log_dfs)
+    assert([interpolator.log_df(yf) for yf in node_yfs] == pytest.approx(node_log_dfs, abs=1e-15))
+
+
+@pytest.mark.parametrize("scheme", schemes)
+def test_array_agrees_with_scalar(scheme):
+    interpolator = scheme(node_yfs, node_log_dfs)
+    assert(list(interpolator.log_df_array(np.array(query_yfs)))
+           == pytest.approx([interpolator.log_df(yf) for yf in query_yfs], rel=1e-15))
+
+
+@pytest.mark.parametrize("scheme", schemes)
+def test_gradient_array_agrees_with_scalar(scheme):
+    interpolator = scheme(node_yfs, node_log_dfs)
+    gradients = interpolator.log_df_gradient_array(np.array(query_yfs))
+    assert(gradients.shape == (len(query_yfs), len(node_yfs) - 1))
+    for (yf, gradient) in zip(query_yfs, gradients):
+        assert(list(gradient) == pytest.approx(list(interpolator.log_df_gradient(yf)), rel=1e-14, abs=1e-15))
+
+
+@pytest.mark.parametrize("scheme", schemes)
+def test_adjoint_agrees_with_gradient_array(scheme):
+    interpolator = scheme(node_yfs, node_log_dfs)
+    adjoints = np.linspace(-1.0, 2.0, len(query_yfs))
+    assert(list(interpolator.log_df_adjoint(np.array(query_yfs), adjoints))
+           == pytest.approx(list(adjoints @ interpolator.log_df_gradient_array(np.array(query_yfs))),
+                            rel=1e-13, abs=1e-15))
+
+
+@pytest.mark.parametrize("scheme", schemes)
+def test_gradient(scheme):
+    interpolator = scheme(node_yfs, node_log_dfs)
+    bump = 1e-7
+    for yf in query_yfs:
+        gradient = interpolator.log_df_gradient(yf)
+        assert(len(gradient) == len(node_yfs) - 1)
+        for node in range(1, len(node_yfs)):
+            up = list(node_log_dfs)
+            up[node] += bump
+            down = list(node_log_dfs)
+            down[node] -= bump
+            finite_difference = (scheme(node_yfs, up).log_df(yf) - scheme(node_yfs, down).log_df(yf)) / (2 * bump)
+            assert(gradient[node - 1] == pytest.approx(finite_difference, abs=1e-6))
+
+
+@pytest.mark.parametrize("scheme", schemes)
+def test_set_log_dfs(scheme):
+    interpolator = scheme(node_yfs, [0.0, -0.001, -0.002, -0.004, -0.01, -0.03])
+    interpolator.set_log_dfs(node_log_dfs)
+    fresh = scheme(node_yfs, node_log_dfs)
+    yfs = np.array(query_yfs)
+    assert(list(interpolator.log_df_array(yfs)) == list(fresh.log_df_array(yfs)))
+    assert(interpolator.log_df_gradient_array(yfs).tolist() == fresh.log_df_gradient_array(yfs).tolist())
+
+
+def test_monotone_convex_integral_partials():
+    bump = 1e-7
+    x = np.linspace(0.0, 1.0, 11)
+    # One pair of end-point adjustments in each of the four cases, and the origin.
+    for (g0, g1) in [(0.01, -0.015), (-0.01, 0.03), (0.01, -0.004), (0.01, 0.002), (-0.003, -0.02), (0.0, 0.0)]:
+        (partial_g0, partial_g1) = _monotone_convex_integral_partials(x, g0, g1)
+        if g0 == g1 == 0.0:
+            assert(list(partial_g0) == pytest.approx(list(x - 2.0 * x**2 + x**3), abs=1e-15))
+            continue
+        for (partial, up, down) in [(partial_g0, (g0 + bump, g1), (g0 - bump, g1)),
+                                    (partial_g1, (g0, g1 + bump), (g0, g1 - bump))]:
+            finite_difference = (_monotone_convex_integral(x, *up) - _monotone_convex_integral(x, *down)) / (2 * bump)
+            assert(list(partial) == pytest.approx(list(finite_difference), abs=1e-6))
+
+
+def test_monotone_convex_keeps_discrete_forwards():
+    interpolator = MonotoneConvexInterpolator(node_yfs, node_log_dfs)
+    fine_yfs = np.linspace(0.0, 5.0, 5001)
+    log_dfs = interpolator.log_df_array(fine_yfs)
+    forwards = -np.diff(log_dfs) / np.diff(fine_yfs)
+    # Decreasing log DFs give positive forwards everywhere in between.
+    assert(np.all(forwards > 0.0))
+
+
+def test_single_node():
+    for scheme in schemes:
+        interpolator = scheme([0.0, 1.0], [0.0, -0.02])
+        assert(interpolator.log_df(0.5) == pytest.approx(-0.01))
+        assert(interpolator.log_df(2.0) == pytest.approx(-0.04))
@@ -0,0 +1,58 @@
+import pytest
+from datetime import date
+from curvestrippers import input_quote
+from instruments import EurodollarFuture, InterestRateSwap, OisBasisSwap
+from marketdata import InputBuilder, build_input, load_snapshots
+
+RECORDS = [
+    {"base_date": "2018-07-27", "instrument": "deposit", "tenor": "3", "quote": "0.0170"},
+    {"base_date": "2018-07-27", "instrument": "future", "tenor": "2018-12", "quote": "97.90"},
+    {"base_date": "2018-07-27", "instrument": "swap", "tenor": "60", "quote": "0.0270"},
+    {"base_date": "2018-07-27", "instrument": "ois_basis", "tenor": "60", "quote": "0.0022"},
+    {"base_date": "2018-07-27", "snapshot": "close", "instrument": "swap", "tenor": "60", "quote": "0.0271"},
+    {"base_date": "2018-07-30", "instrument": "swap", "tenor": "60", "quote": "0.0272"},
+]
+
+
+def test_builder_matches_build_input():
+    builder = InputBuilder()
+    base_date = date(2018, 7, 27)
+    for record in RECORDS[:4] + [dict(record, quote="0.01") for record in RECORDS[:4] if record["instrument"] != "future"]:
+        built = builder.build(base_date, record)
+        expected = build_input(base_date, record)
+        assert(type(built) is type(expected))
+        assert(input_quote(built) == input_quote(expected))
+        if isinstance(built, InterestRateSwap):
+            assert([flow.amount for flow in built.fixed_flows] == [flow.amount for flow in expected.fixed_flows])
+            assert([flow.end_date for flow in built.libor_flows] == [flow.end_date for flow in expected.libor_flows])
+        if isinstance(built, OisBasisSwap):
+            assert([flow.spread for flow in built.ois_flows] == [flow.spread for flow in expected.ois_flows])
+
+
+def test_load_snapshots_shares_schedules():
+    snapshots = list(load_snapshots(iter(RECORDS)))
+    assert([(base_date, len(inputs)) for (base_date, inputs) in snapshots] ==
+           [(date(2018, 7, 27), 4), (date(2018, 7, 27), 1), (date(2018, 7, 30), 1)])
+    # The snapshots for the same base date have the same spot date, so their swaps share one template.
+    swap = snapshots[0][1][2]
+    close_swap = snapshots[1][1][0]
+    next_swap = snapshots[2][1][0]
+    assert(close_swap.libor_leg is swap.libor_leg)
+    assert(next_swap.libor_flows[0].start_date != swap.libor_flows[0].start_date)
+    assert((swap.fixed_rate, close_swap.fixed_rate, next_swap.fixed_rate) == (0.027, 0.0271, 0.0272))
+    (future, price) = snapshots[0][1][1]
+    assert(isinstance(future, EurodollarFuture) and price == 97.90)
+
+
+def test_load_snapshots_from_file(tmp_path):
+    quote_file = tmp_path / "quotes.csv"
+    quote_file.write_text("base_date,instrument,tenor,quote\n"
+                          + "".join(",".join([r["base_date"], r["instrument"], r["tenor"], r["quote"]]) + "\n"
+                                    for r in RECORDS))
+    snapshots = list(load_snapshots(str(quote_file)))
+    assert([base_date for (base_date, _) in snapshots] == [date(2018, 7, 27), date(2018, 7, 30)])
+
+
+def test_unknown_instrument():
+    with pytest.raises(ValueError):
+        InputBuilder().build(date(2018, 7, 27), dict(RECORDS[0], instrument="bond"))
@@ -0,0 +1,76 @@
+import threading
+from datetime import date
+from curvestrippers import strip_libor_curve
+from instruments import InterestRateSwap, LiborDeposit
+from interestratecurve import InterestRateCurve
+from interpolation import NaturalCubicLogDfInterpolator
+import metrics
+from metrics import collect_metrics
+
+
+def test_collect_metrics():
+    spot_start_date = date(2018, 7, 18)
+    inputs = [LiborDeposit(1e6, spot_start_date, 3, 0.0150),
+              InterestRateSwap(1e6, spot_start_date, 60, 0.0300)]
+    reports = []
+    with collect_metrics(callback=reports.append) as report:
+        for method in ["global", "bootstrap"]:
+            strip_libor_curve(date(2018, 7, 16), inputs, method=method)
+    assert(metrics.active_report() is None)
+    assert(reports == [report])
+    assert(report.counts["objective_evaluations"] > 0)
+    assert(report.counts["curve_constructions"] > 0)
+    assert(report.counts["df_calls"] > 0)
+    assert(report.counts["solver_iterations"] == sum(report.values["solver_iterations"]))
+    assert(len(report.values["residual_norms"]) == 2)
+    assert(max(report.values["residual_norms"]) < 1e-4)
+    assert(report.seconds["strip"] > 0.0)
+    assert(set(report.seconds) >= {"valuation.LiborDeposit", "valuation.InterestRateSwap",
+                                   "sensitivities.LiborDeposit", "sensitivities.InterestRateSwap"})
+    assert(report.as_dict()["counts"] == report.counts)
+
+
+def test_solver_iterations_recorded_once():
+    spot_start_date = date(2018, 7, 18)
+    inputs = [LiborDeposit(1e6, spot_start_date, 3, 0.0150),
+              InterestRateSwap(1e6, spot_start_date, 24, 0.0250),
+              InterestRateSwap(1e6, spot_start_date, 60, 0.0300)]
+    # The cubic scheme is not local, so bootstrapping hands over to the global solve.
+    with collect_metrics() as report:
+        strip_libor_curve(date(2018, 7, 16), inputs, method="bootstrap", interpolation=NaturalCubicLogDfInterpolator)
+    assert(len(report.values["solver_iterations"]) == 1)
+    assert(report.counts["solver_iterations"] == report.values["solver_iterations"][0])
+    assert(report.counts["solver_iterations"] <= report.counts["jacobian_evaluations"])
+
+
+def test_disabled():
+    with collect_metrics() as outer:
+        with collect_metrics() as inner:
+            InterestRateCurve(date(2018, 7, 16), [date(2019, 7, 16)], [0.98]).df(date(2019, 1, 16))
+        assert(metrics.active_report() is outer)
+    assert(inner.counts == {"curve_constructions": 1, "df_calls": 1})
+    assert(outer.counts == {})
+
+
+def test_threads_collect_separately():
+    # Each thread opens its block before the other closes its own.
+    both_open = threading.Barrier(2)
+    reports = {}
+
+    def collect(days):
+        with collect_metrics() as report:
+            both_open.wait()
+            curve = InterestRateCurve(date(2018, 7, 16), [date(2019, 7, 16)], [0.98])
+            for day in range(1, days + 1):
+                curve.df(date(2018, 7, 16 + day))
+            reports[days] = report
+            both_open.wait()
+
+    threads = [threading.Thread(target=collect, args=(days,)) for days in (3, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert(reports[3].counts == {"curve_constructions": 1, "df_calls": 3})
+    assert(reports[5].counts == {"curve_constructions": 1, "df_calls": 5})
+    assert(metrics.active_report() is None)
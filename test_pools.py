@@ -0,0 +1,40 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from pools import chunks, map_ahead
+
+
+def test_chunks():
+    assert(list(chunks(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]])
+    assert(list(chunks([], 3)) == [])
+
+
+@pytest.mark.parametrize("in_order", [True, False])
+def test_map_ahead(in_order):
+    submitted = []
+    lock = threading.Lock()
+    results = []
+
+    def tasks():
+        for i in range(20):
+            with lock:
+                submitted.append(i)
+                # No more than max_pending tasks are pending when the next one is read.
+                assert(len(submitted) - len(results) <= 3 + 1)
+            yield (i, [i])
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        map_ahead(executor, lambda i, items: items * 2, tasks(),
+                  lambda arguments, result: results.append((arguments[0], result)), 3, in_order)
+    if in_order:
+        assert([i for (i, _) in results] == list(range(20)))
+    assert(sorted(results) == [(i, [i, i]) for i in range(20)])
+
+
+def test_map_ahead_raises_task_errors():
+    def fail(i):
+        raise ValueError(str(i))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(ValueError):
+            map_ahead(executor, fail, [(i,) for i in range(5)], lambda arguments, result: None, 2)
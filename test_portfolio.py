@@ -0,0 +1,64 @@
+import numpy as np
+from datetime import date, timedelta
+from dates import add_business_days
+from instruments import InterestRateSwap, LiborDeposit, OisBasisSwap
+from interestratecurve import InterestRateCurve
+from interpolation import MonotoneConvexInterpolator
+from portfolio import value_portfolio
+
+BASE_DATE = date(2018, 7, 27)
+
+
+def _curve(dfs, interpolation=None):
+    dates = [BASE_DATE + timedelta(days=days) for days in (91, 365, 1095, 1826, 3652)]
+    if interpolation is None:
+        return InterestRateCurve(BASE_DATE, dates, dfs)
+    return InterestRateCurve(BASE_DATE, dates, dfs, interpolation)
+
+
+def _trades(count):
+    spot_start_date = date(2018, 7, 31)
+    trades = []
+    for i in range(count):
+        start_date = add_business_days(spot_start_date, i % 30)
+        if i % 3 == 0:
+            trades.append(InterestRateSwap(1e6 * (1 - 2 * (i % 2)), start_date, 12 * (1 + i % 5), 0.02 + 0.0001 * i))
+        elif i % 3 == 1:
+            trades.append(OisBasisSwap(1e6, start_date, 12 * (1 + i % 3), 0.001))
+        else:
+            trades.append(LiborDeposit(1e6, start_date, 3, 0.015))
+    return trades
+
+
+def test_value_portfolio():
+    libor_curve = _curve([0.996, 0.982, 0.935, 0.88, 0.75])
+    ois_curve = _curve([0.997, 0.985, 0.945, 0.895, 0.78], MonotoneConvexInterpolator)
+    trades = _trades(101)
+    values = value_portfolio(trades, libor_curve, ois_curve, max_workers=2, shard_size=17)
+    expected = np.array([trade.value(libor_curve, ois_curve) for trade in trades])
+    assert(np.allclose(values, expected, rtol=1e-10, atol=1e-6))
+
+
+class ScaledSwap:
+    def __init__(self, swap):
+        self.swap = swap
+
+    def value(self, libor_curve, ois_curve):
+        return 2.0 * self.swap.value(libor_curve, ois_curve)
+
+
+def test_single_curve_and_uncompilable_trades():
+    curve = _curve([0.996, 0.982, 0.935, 0.88, 0.75])
+    trades = [ScaledSwap(trade) for trade in _trades(6)]
+    values = value_portfolio(trades, curve, curve, max_workers=1, shard_size=4)
+    assert(np.allclose(values, [trade.value(curve, curve) for trade in trades], rtol=1e-12))
+    assert(len(value_portfolio([], curve, curve, max_workers=1)) == 0)
+
+
+def test_trades_sent_with_tasks(monkeypatch):
+    # Where the workers are not forked, the shards of trades are sent with the tasks.
+    monkeypatch.setattr("multiprocessing.get_start_method", lambda: "spawn")
+    curve = _curve([0.996, 0.982, 0.935, 0.88, 0.75])
+    trades = _trades(20)
+    values = value_portfolio(trades, curve, curve, max_workers=2, shard_size=6)
+    assert(np.allclose(values, [trade.value(curve, curve) for trade in trades], rtol=1e-10, atol=1e-6))
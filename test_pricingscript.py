@@ -0,0 +1,136 @@
+import csv
+import json
+import pytest
+from datetime import date
+from curvestrippers import strip_libor_and_ois_curves
+from dates import add_business_days
+from instruments import InterestRateSwap, LiborDeposit, OisBasisSwap
+from marketdata import build_input, read_quote_records
+from pricingscript import build_trade, main, strip_snapshot, value_trades
+
+QUOTES = """base_date,instrument,tenor,quote
+2018-07-27,deposit,3,0.0170
+2018-07-27,future,2019-12,97.50
+2018-07-27,swap,60,0.0270
+2018-07-27,ois_basis,3,0.0005
+2018-07-27,ois_basis,60,0.0022
+"""
+
+BASE_DATE = date(2018, 7, 27)
+
+
+def _trade_records(count):
+    instruments = [("swap", 0.0260), ("deposit", 0.0170), ("ois_basis", 0.0012)]
+    return [{"id": "T" + str(i), "instrument": instruments[i % 3][0], "notional": str(1e6 * (1 - 2 * (i % 2))),
+             "start_date": "2018-08-0" + str(1 + i % 3) if i % 4 else "",
+             "tenor": str(3 * (i % 3 == 1) + 12 * (i % 3 != 1) * (1 + i % 5)),
+             "rate": str(instruments[i % 3][1])} for i in range(count)]
+
+
+def _curves(tmp_path):
+    quote_file = tmp_path / "quotes.csv"
+    quote_file.write_text(QUOTES)
+    return strip_libor_and_ois_curves(BASE_DATE, [build_input(BASE_DATE, record)
+                                                  for record in read_quote_records(quote_file)])
+
+
+def test_strip_snapshot(tmp_path):
+    quote_file = tmp_path / "quotes.csv"
+    quote_file.write_text(QUOTES)
+    (base_date, (libor_curve, ois_curve)) = strip_snapshot(quote_file)
+    assert(base_date == BASE_DATE)
+    (expected_libor_curve, expected_ois_curve) = _curves(tmp_path)
+    assert(libor_curve.dfs == pytest.approx(expected_libor_curve.dfs, rel=1e-12))
+    assert(ois_curve.dfs == pytest.approx(expected_ois_curve.dfs, rel=1e-12))
+
+    (_, (libor_curve, ois_curve)) = strip_snapshot(quote_file, ois_curve=False)
+    assert(libor_curve is ois_curve)
+
+    quote_file.write_text(QUOTES + QUOTES.splitlines()[1].replace("07-27", "07-30") + "\n")
+    with pytest.raises(ValueError):
+        strip_snapshot(quote_file)
+    assert(strip_snapshot(quote_file, BASE_DATE)[0] == BASE_DATE)
+    with pytest.raises(ValueError):
+        strip_snapshot(quote_file, date(2018, 7, 31))
+
+
+def test_strip_snapshot_stops_at_base_date(tmp_path):
+    quote_file = tmp_path / "quotes.jsonl"
+    lines = [dict(zip(["base_date", "instrument", "tenor", "quote"], line.split(",")))
+             for line in QUOTES.splitlines()[1:]]
+    # The file is not read past the quotes for the base date, so the broken line is never parsed.
+    quote_file.write_text("".join(json.dumps(dict(line, base_date=base_date)) + "\n"
+                                  for base_date in ["2018-07-26", "2018-07-27", "2018-07-30"] for line in lines)
+                          + "{not json\n")
+    assert(strip_snapshot(quote_file, BASE_DATE)[0] == BASE_DATE)
+
+
+def test_build_trade():
+    spot_start_date = add_business_days(BASE_DATE, 2)
+    swap = build_trade(spot_start_date, {"instrument": "swap", "notional": "-5e7", "start_date": "2020-07-31",
+                                         "tenor": "60", "rate": "0.0305"})
+    assert(isinstance(swap, InterestRateSwap))
+    assert(swap.libor_leg["start_date"][0] == date(2020, 7, 31).toordinal())
+    assert(swap.notional == -5e7)
+    deposit = build_trade(spot_start_date, {"instrument": "deposit", "notional": 1e6, "tenor": 3, "rate": 0.017})
+    assert(isinstance(deposit, LiborDeposit))
+    assert(deposit.start_date == spot_start_date)
+    assert(deposit.flow_on_start_date == -1e6)
+    assert(isinstance(build_trade(spot_start_date, {"instrument": "ois_basis", "notional": 1e6, "tenor": 12,
+                                                    "rate": 0.001}), OisBasisSwap))
+    with pytest.raises(ValueError):
+        build_trade(spot_start_date, {"instrument": "bond", "notional": 1e6, "tenor": 12, "rate": 0.02})
+    with pytest.raises(ValueError, match="T7 is missing tenor"):
+        build_trade(spot_start_date, {"id": "T7", "instrument": "swap", "notional": 1e6, "rate": 0.02})
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_value_trades(tmp_path, max_workers):
+    curves = _curves(tmp_path)
+    records = _trade_records(50)
+    chunks = []
+    num_trades = value_trades(iter(records), BASE_DATE, curves, lambda chunk, values: chunks.append((chunk, values)),
+                              max_workers=max_workers, chunk_size=7)
+    assert(num_trades == 50)
+    assert([len(chunk) for (chunk, _) in chunks] == [7] * 7 + [1])
+    assert([record for (chunk, _) in chunks for record in chunk] == records)
+    spot_start_date = add_business_days(BASE_DATE, 2)
+    expected = [build_trade(spot_start_date, record).value(*curves) for record in records]
+    assert([value for (_, values) in chunks for value in values] == pytest.approx(expected, rel=1e-10, abs=1e-6))
+
+
+def test_main(tmp_path, capsys):
+    quote_file = tmp_path / "quotes.csv"
+    quote_file.write_text(QUOTES)
+    records = _trade_records(20)
+    for record in records[::3]:
+        del record["id"]
+    trade_file = tmp_path / "trades.jsonl"
+    trade_file.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    csv_output = tmp_path / "values.csv"
+    assert(main([str(quote_file), str(trade_file), str(csv_output), "--workers", "0", "--chunk-size", "6"]) == 0)
+    assert("Valued 20 trades" in capsys.readouterr().err)
+    rows = list(csv.DictReader(csv_output.open()))
+    assert([row["id"] for row in rows] == [record.get("id", str(i + 1)) for (i, record) in enumerate(records)])
+
+    jsonl_output = tmp_path / "values.jsonl"
+    assert(main([str(quote_file), str(trade_file), str(jsonl_output), "--workers", "2"]) == 0)
+    values = [json.loads(line) for line in jsonl_output.read_text().splitlines()]
+    assert([value["value"] for value in values] == pytest.approx([float(row["value"]) for row in rows], rel=1e-12))
+
+    bad_quote_file = tmp_path / "bad_quotes.csv"
+    bad_quote_file.write_text(QUOTES.replace("swap,60", "bond,60"))
+    assert(main([str(bad_quote_file), str(trade_file), str(csv_output)]) == 1)
+    assert("Could not strip curves" in capsys.readouterr().err)
+
+    trade_file.write_text(json.dumps(dict(records[1], instrument="bond")) + "\n")
+    assert(main([str(quote_file), str(trade_file), str(csv_output), "--workers", "0"]) == 1)
+    assert("Could not value trades" in capsys.readouterr().err)
+
+    # A CSV trade file without a tenor column.
+    trade_file = tmp_path / "trades.csv"
+    trade_file.write_text("id,instrument,notional,rate\nT1,swap,1e6,0.026\n")
+    for workers in ["0", "2"]:
+        assert(main([str(quote_file), str(trade_file), str(csv_output), "--workers", workers]) == 1)
+        assert("Could not value trades: Trade T1 is missing tenor." in capsys.readouterr().err)
@@ -0,0 +1,115 @@
+import pytest
+from datetime import date
+from curvestrippers import strip_libor_curve, strip_libor_and_ois_curves
+from instruments import EurodollarFuture, InterestRateSwap, LiborDeposit, OisBasisSwap
+from risk import bumped_quote_sensitivities, portfolio_quote_sensitivities, quote_sensitivities
+
+base_date = date(2018, 7, 16)
+spot_start_date = date(2018, 7, 18)
+
+
+def test_single_curve():
+    inputs = [LiborDeposit(1e6, spot_start_date, 3, 0.0150),
+              (EurodollarFuture(2018, 12), 98.20),
+              InterestRateSwap(1e6, spot_start_date, 24, 0.0250),
+              InterestRateSwap(1e6, spot_start_date, 60, 0.0300)]
+    trades = [InterestRateSwap(-5e6, date(2019, 7, 18), 36, 0.0290), inputs[2]]
+    libor_curve = strip_libor_curve(base_date, inputs)
+    sensitivities = quote_sensitivities(trades, inputs, libor_curve, libor_curve)
+    assert(sensitivities.shape == (2, 4))
+    # An input trade is only sensitive to its own quote, which makes the curves move to
+    # offset the change in its value at the new quote.
+    assert(sensitivities[1] == pytest.approx([0.0, 0.0, -inputs[2].quote_sensitivity(libor_curve, libor_curve), 0.0],
+                                             abs=1e-6))
+    bumped = bumped_quote_sensitivities(trades, base_date, inputs, ois_curve=False, bump=1e-6, max_workers=2)
+    assert(sensitivities == pytest.approx(bumped, rel=1e-3, abs=1e-2))
+
+
+def test_futures_position():
+    inputs = [LiborDeposit(1e6, spot_start_date, 3, 0.0150),
+              (EurodollarFuture(2018, 12), 98.20),
+              (EurodollarFuture(2019, 3), 98.10),
+              InterestRateSwap(1e6, spot_start_date, 24, 0.0250),
+              OisBasisSwap(1e6, spot_start_date, 3, 0.0005),
+              OisBasisSwap(1e6, spot_start_date, 24, 0.0030)]
+    trades = [EurodollarFuture(2018, 12), EurodollarFuture(2019, 6),
+              InterestRateSwap(-5e6, date(2019, 1, 18), 12, 0.0240)]
+    libor_curve, ois_curve = strip_libor_and_ois_curves(base_date, inputs)
+    sensitivities = quote_sensitivities(trades, inputs, libor_curve, ois_curve)
+    assert(sensitivities.shape == (3, 6))
+    # A futures position on an input moves one for one with the input's price.
+    assert(sensitivities[0] == pytest.approx([0.0, 1.0, 0.0, 0.0, 0.0, 0.0], abs=1e-9))
+    bumped = bumped_quote_sensitivities(trades, base_date, inputs, bump=1e-6, max_workers=2)
+    assert(sensitivities == pytest.approx(bumped, rel=1e-3, abs=1e-2))
+    weights = [2500.0, -2500.0, 1.0]
+    expected = weights @ sensitivities
+
+    # The swap is still valued through compiled cashflows when the book has futures in it.
+    trades[2] = UncompiledSensitivitiesSwap(-5e6, date(2019, 1, 18), 12, 0.0240)
+    assert(portfolio_quote_sensitivities(trades, inputs, libor_curve, ois_curve, weights)
+           == pytest.approx(expected, rel=1e-9, abs=1e-6))
+
+
+def test_two_curves():
+    inputs = [LiborDeposit(1e6, spot_start_date, 3, 0.0150),
+              InterestRateSwap(1e6, spot_start_date, 24, 0.0250),
+              InterestRateSwap(1e6, spot_start_date, 60, 0.0300),
+              OisBasisSwap(1e6, spot_start_date, 3, 0.0005),
+              OisBasisSwap(1e6, spot_start_date, 60, 0.0030)]
+    trades = [InterestRateSwap(-5e6, date(2019, 7, 18), 36, 0.0290)]
+    libor_curve, ois_curve = strip_libor_and_ois_curves(base_date, inputs)
+    sensitivities = quote_sensitivities(trades, inputs, libor_curve, ois_curve)
+    bumped = bumped_quote_sensitivities(trades, base_date, inputs, bump=1e-6, max_workers=2)
+    assert(sensitivities == pytest.approx(bumped, rel=1e-3, abs=1e-2))
+
+
+def test_portfolio_quote_sensitivities():
+    inputs = [LiborDeposit(1e6, spot_start_date, 3, 0.0150),
+              (EurodollarFuture(2018, 12), 98.20),
+              InterestRateSwap(1e6, spot_start_date, 24, 0.0250),
+              InterestRateSwap(1e6, spot_start_date, 60, 0.0300),
+              OisBasisSwap(1e6, spot_start_date, 12, 0.0005),
+              OisBasisSwap(1e6, spot_start_date, 60, 0.0030)]
+    trades = [InterestRateSwap(-5e6, date(2019, 7, 18), 36, 0.0290),
+              OisBasisSwap(2e6, date(2018, 8, 1), 24, 0.0010),
+              LiborDeposit(3e6, spot_start_date, 3, 0.0160)]
+    weights = [1.0, -2.0, 0.5]
+    libor_curve, ois_curve = strip_libor_and_ois_curves(base_date, inputs)
+    expected = weights @ quote_sensitivities(trades, inputs, libor_curve, ois_curve)
+    assert(portfolio_quote_sensitivities(trades, inputs, libor_curve, ois_curve, weights)
+           == pytest.approx(expected, rel=1e-9, abs=1e-6))
+
+    # Trades whose cashflows cannot be compiled use their own node sensitivities.
+    futures_inputs = [input for input in inputs if not isinstance(input, tuple)]
+    libor_curve, ois_curve = strip_libor_and_ois_curves(base_date, futures_inputs)
+    single_trade = [ScaledTrade(trades[0])]
+    assert(portfolio_quote_sensitivities(single_trade, futures_inputs, libor_curve, ois_curve)
+           == pytest.approx(2.0 * quote_sensitivities(trades[:1], futures_inputs, libor_curve, ois_curve)[0],
+                            rel=1e-9, abs=1e-6))
+
+
+def test_portfolio_quote_sensitivities_single_curve():
+    inputs = [LiborDeposit(1e6, spot_start_date, 3, 0.0150),
+              InterestRateSwap(1e6, spot_start_date, 24, 0.0250),
+              InterestRateSwap(1e6, spot_start_date, 60, 0.0300)]
+    trades = [InterestRateSwap(-5e6, date(2019, 7, 18), 36, 0.0290), inputs[1]]
+    libor_curve = strip_libor_curve(base_date, inputs)
+    expected = quote_sensitivities(trades, inputs, libor_curve, libor_curve).sum(axis=0)
+    assert(portfolio_quote_sensitivities(trades, inputs, libor_curve, libor_curve)
+           == pytest.approx(expected, rel=1e-9, abs=1e-6))
+
+
+class ScaledTrade:
+    def __init__(self, trade):
+        self.trade = trade
+
+    def value(self, libor_curve, ois_curve):
+        return 2.0 * self.trade.value(libor_curve, ois_curve)
+
+    def node_sensitivities(self, libor_curve, ois_curve):
+        return tuple(2.0 * sensitivities for sensitivities in self.trade.node_sensitivities(libor_curve, ois_curve))
+
+
+class UncompiledSensitivitiesSwap(InterestRateSwap):
+    def node_sensitivities(self, libor_curve, ois_curve):
+        raise AssertionError("The swap's node sensitivities were computed one trade at a time.")